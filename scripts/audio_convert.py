@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Audio Conversion
+Converts TTS output to 16kHz mono 16-bit WAV (required for microWakeWord)
+
+Two backends:
+- numpy: read into memory, polyphase resample in-process, write once
+- sox:   the original external 'sox' conversion (fallback)
+"""
+
+import io
+import os
+import subprocess
+import wave
+from functools import lru_cache
+from math import gcd
+
+import numpy as np
+
+TARGET_RATE = 16000
+CONVERTERS = ["numpy", "sox"]
+
+# Zero crossings of the windowed-sinc filter on each side
+FILTER_HALF_WIDTH = 10
+KAISER_BETA = 5.0
+
+# Output samples computed per vectorized block (bounds gather memory)
+RESAMPLE_BLOCK = 65536
+
+
+@lru_cache(maxsize=None)
+def _polyphase_filter(up, down):
+    """Design the anti-aliasing filter and split it into 'up' phases.
+    Cached: a process designs each rate pair's filter only once."""
+    max_rate = max(up, down)
+    num_taps = 2 * FILTER_HALF_WIDTH * max_rate + 1
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    cutoff = 1.0 / max_rate  # relative to the upsampled Nyquist
+    h = cutoff * np.sinc(cutoff * n) * np.kaiser(num_taps, KAISER_BETA)
+    h *= up  # compensate for zero-stuffing
+
+    taps_per_phase = -(-num_taps // up)
+    padded = np.zeros(taps_per_phase * up)
+    padded[:num_taps] = h
+    # bank[p, i] = h[p + i * up]
+    bank = padded.reshape(taps_per_phase, up).T.copy()
+    bank.setflags(write=False)  # Shared by every caller
+    return bank, (num_taps - 1) // 2
+
+
+def resample_poly(x, up, down):
+    """Resample a 1-D float signal by up/down with a polyphase FIR filter"""
+    x = np.asarray(x, dtype=np.float64)
+    g = gcd(up, down)
+    up, down = up // g, down // g
+    if up == down:
+        return x.copy()
+
+    bank, delay = _polyphase_filter(up, down)
+    taps_per_phase = bank.shape[1]
+
+    n_out = -(-len(x) * up // down)
+    # Pad so every gather index is valid
+    pad = taps_per_phase
+    xpad = np.concatenate([np.zeros(pad), x, np.zeros(pad + 1)])
+    tap_offsets = np.arange(taps_per_phase)
+
+    y = np.empty(n_out)
+    for start in range(0, n_out, RESAMPLE_BLOCK):
+        m = np.arange(start, min(start + RESAMPLE_BLOCK, n_out))
+        t = m * down + delay
+        phase = t % up
+        base = t // up + pad
+        idx = np.clip(base[:, None] - tap_offsets[None, :], 0, len(xpad) - 1)
+        y[start:start + len(m)] = np.einsum("ij,ij->i", bank[phase], xpad[idx])
+    return y
+
+
+def to_mono(samples):
+    """Average channels down to mono"""
+    if samples.ndim == 2:
+        return samples.mean(axis=1)
+    return samples
+
+
+def to_int16(samples):
+    """Convert float samples in [-1, 1] to int16 PCM"""
+    return (np.clip(samples, -1.0, 1.0) * 32767).round().astype(np.int16)
+
+
+def to_16k_mono(samples, rate):
+    """Convert float samples at any rate to 16kHz mono int16"""
+    mono = to_mono(np.asarray(samples, dtype=np.float64))
+    if rate != TARGET_RATE:
+        mono = resample_poly(mono, TARGET_RATE, rate)
+    return to_int16(mono)
+
+
+def read_wav(source):
+    """Read a PCM WAV (path or bytes) into float64 samples in [-1, 1]"""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    elif isinstance(source, os.PathLike):
+        source = str(source)
+    with wave.open(source, "rb") as w:
+        rate = w.getframerate()
+        channels = w.getnchannels()
+        width = w.getsampwidth()
+        raw = w.readframes(w.getnframes())
+
+    if width == 2:
+        samples = np.frombuffer(raw, dtype="<i2") / 32768.0
+    elif width == 3:
+        # Little-endian 24-bit: place each sample in the top of an int32
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        wide = np.zeros((len(packed), 4), dtype=np.uint8)
+        wide[:, 1:] = packed
+        samples = wide.view("<i4")[:, 0] / 2147483648.0
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype="<i4") / 2147483648.0
+    elif width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8) - 128.0) / 128.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+
+    if channels > 1:
+        samples = samples.reshape(-1, channels)
+    return samples, rate
+
+
+def write_wav(path, samples, rate=TARGET_RATE):
+    """Write int16 mono samples as a WAV file"""
+    samples = np.asarray(samples, dtype="<i2")
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(samples.tobytes())
+
+
+def convert_with_sox(input_path, output_path):
+    """Original conversion path: spawn sox to write 16kHz mono 16-bit"""
+    subprocess.run([
+        'sox', str(input_path),
+        '-r', str(TARGET_RATE),  # 16kHz sample rate
+        '-c', '1',               # Mono
+        '-b', '16',              # 16-bit
+        str(output_path)
+    ], check=True, capture_output=True)
+
+
+def convert_file(input_path, output_path, converter="numpy"):
+    """Convert a TTS output file to the final 16kHz WAV and delete the input"""
+    if converter == "sox":
+        convert_with_sox(input_path, output_path)
+    else:
+        with open(input_path, "rb") as f:
+            data = f.read()
+        samples, rate = read_wav(data)
+        write_wav(output_path, to_16k_mono(samples, rate))
+    os.remove(input_path)
+    return output_path
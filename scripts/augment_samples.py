@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Sample Augmenter
+Grows the dataset with varied copies of every 16kHz clip
+
+Each variant gets a random mix of:
+- speed/pitch perturbation (0.9-1.1x)
+- time shift (up to 0.2s of added lead-in; onsets are never trimmed)
+- synthetic room reverb (exponentially decaying noise impulse response)
+- additive background noise at a target SNR (5-30 dB)
+- gain (-12 to +6 dB, peak-limited)
+
+Clips are processed in batches as zero-padded NumPy arrays and batches
+are spread over processes. Every clip variant has its own seed derived
+from --seed, the clip's content hash and the variant number, so the same
+command always produces the same audio and adding or removing clips
+leaves the augmentations of every other clip unchanged.
+
+Variants are written next to their source as aug_<name>_NN.wav (aug_
+clips are never augmented again). Variants whose source is gone, or whose
+number is at or past --variants, are deleted. Background noise comes from WAVs in
+--noise-dir if given, otherwise synthetic white/pink/brown noise.
+
+Usage: python scripts/augment_samples.py [--variants 40] [--seed 0] [--jobs N]
+"""
+
+import argparse
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, read_wav, to_16k_mono, to_int16, write_wav
+from dataset_index import DatasetIndex, register_clips
+from instrumentation import add_trace_arguments, sampled, span, start_trace
+from synth_engine import add_jobs_argument
+
+AUG_PREFIX = "aug_"
+
+SPEED_RANGE = (0.9, 1.1)
+MAX_SHIFT_SECONDS = 0.2
+REVERB_PROBABILITY = 0.5
+RT60_RANGE = (0.15, 0.8)
+IMPULSE_SECONDS = 0.5
+NOISE_PROBABILITY = 0.8
+SNR_DB_RANGE = (5.0, 30.0)
+GAIN_DB_RANGE = (-12.0, 6.0)
+PEAK_LIMIT = 0.99
+
+
+def load_clip(path):
+    samples, rate = read_wav(path)
+    return to_16k_mono(samples, rate).astype(np.float32) / 32768.0
+
+
+@lru_cache(maxsize=None)
+def load_noise_clips(noise_dir):
+    """Background noise clips, loaded once per worker process"""
+    if not noise_dir:
+        return ()
+    return tuple(load_clip(p) for p in sorted(Path(noise_dir).glob("*.wav")))
+
+
+def clip_seed(path):
+    """Stable 64-bit seed from a clip's content"""
+    return int.from_bytes(hashlib.sha256(Path(path).read_bytes()).digest()[:8], "little")
+
+
+def pad_batch(clips, length):
+    """Stack clips into a zero-padded (batch, length) array"""
+    batch = np.zeros((len(clips), length), dtype=np.float32)
+    for i, clip in enumerate(clips):
+        batch[i, :min(len(clip), length)] = clip[:length]
+    return batch
+
+
+def row_energy(batch, lengths):
+    """Sum of squares of each row up to its own length (summing over the
+    padding would change the float rounding with the batch width)"""
+    return np.array([np.dot(row[:n], row[:n]) for row, n in zip(batch, lengths)], dtype=np.float64)
+
+
+def speed_and_shift(batch, lengths, factors, shifts, out_len):
+    """Resample each row by its speed factor and delay it by its shift,
+    with one vectorized linear-interpolation gather"""
+    t = np.arange(out_len, dtype=np.float32)[None, :]
+    pos = (t - shifts[:, None]) * factors[:, None]
+    valid = (pos >= 0) & (pos <= (lengths[:, None] - 1))
+    pos = np.clip(pos, 0, batch.shape[1] - 1)
+    i0 = np.floor(pos).astype(np.int64)
+    i1 = np.minimum(i0 + 1, batch.shape[1] - 1)
+    frac = pos - i0
+    x0 = np.take_along_axis(batch, i0, axis=1)
+    x1 = np.take_along_axis(batch, i1, axis=1)
+    return np.where(valid, x0 + (x1 - x0) * frac, 0.0).astype(np.float32)
+
+
+def room_impulses(rng, count):
+    """Synthetic room impulse responses, shape (count, taps)"""
+    taps = int(IMPULSE_SECONDS * TARGET_RATE)
+    t = np.arange(taps) / TARGET_RATE
+    rt60 = rng.uniform(*RT60_RANGE, size=(count, 1))
+    decay = np.exp(-6.9078 * t[None, :] / rt60)  # -60 dB at rt60
+    ir = rng.standard_normal((count, taps)) * decay
+    ir[:, 0] = 1.0  # Direct path
+    return (ir / np.sqrt(np.sum(ir * ir, axis=1, keepdims=True))).astype(np.float32)
+
+
+def apply_reverb(batch, impulses, valid):
+    """Convolve every row with its impulse response via batched FFTs.
+    Rows are grouped by an FFT size taken from their own length, and the
+    reverb tail is cut where each row's valid mask ends, so a row comes out
+    the same whatever else is in the batch."""
+    width, lengths = batch.shape[1], valid.sum(axis=1)
+    sizes = np.array([1 << int(n + impulses.shape[1] - 2).bit_length() for n in lengths])
+    wet = np.empty_like(batch)
+    for size in np.unique(sizes):
+        rows = sizes == size
+        full = np.fft.irfft(np.fft.rfft(batch[rows], size) * np.fft.rfft(impulses[rows], size), size)
+        wet[rows] = np.pad(full, ((0, 0), (0, max(0, width - size))))[:, :width]
+    wet *= valid
+    # Keep the dry level so SNR and gain stay meaningful
+    scale = np.sqrt((row_energy(batch, lengths) + 1e-9) / (row_energy(wet, lengths) + 1e-9))
+    return wet * scale[:, None].astype(np.float32)
+
+
+def colored_noise(rng, count, length):
+    """White, pink or brown noise per row via spectral shaping"""
+    spectrum = np.fft.rfft(rng.standard_normal((count, length)), axis=1)
+    freqs = np.fft.rfftfreq(length)
+    freqs[0] = freqs[1]
+    exponent = rng.choice([0.0, 0.5, 1.0], size=(count, 1))  # white / pink / brown
+    noise = np.fft.irfft(spectrum / freqs[None, :] ** exponent, length, axis=1)
+    return noise.astype(np.float32)
+
+
+def background_noise(rng, noise_clips, count, length):
+    """Random excerpts of real noise clips, or synthetic noise"""
+    if not noise_clips:
+        return colored_noise(rng, count, length)
+    out = np.empty((count, length), dtype=np.float32)
+    for i in range(count):
+        clip = noise_clips[rng.integers(len(noise_clips))]
+        if len(clip) < length:
+            clip = np.tile(clip, -(-length // len(clip)))
+        start = rng.integers(len(clip) - length + 1)
+        out[i] = clip[start:start + length]
+    return out
+
+
+def augment_batch(batch, lengths, rngs, noise_clips=()):
+    """Return (augmented batch, new lengths) for one variant of every row.
+    Row i draws all of its randomness from rngs[i], so a row's result does
+    not depend on which other rows share its batch."""
+    max_shift = MAX_SHIFT_SECONDS * TARGET_RATE
+    factors = np.array([rng.uniform(*SPEED_RANGE) for rng in rngs], dtype=np.float32)
+    # Delay only: clips start right at speech onset, so trimming the start
+    # would cut "hey" off a positive
+    shifts = np.array([rng.uniform(0, max_shift) for rng in rngs], dtype=np.float32)
+    reverb = np.array([rng.random() < REVERB_PROBABILITY for rng in rngs])
+    noisy = np.array([rng.random() < NOISE_PROBABILITY for rng in rngs])
+    snr_db = np.array([rng.uniform(*SNR_DB_RANGE) for rng in rngs])
+    gain = 10 ** (np.array([rng.uniform(*GAIN_DB_RANGE) for rng in rngs]) / 20)
+    new_lengths = np.ceil(lengths / factors).astype(np.int64)
+    new_lengths = np.maximum(new_lengths + np.round(shifts).astype(np.int64), TARGET_RATE // 10)
+    out_len = int(new_lengths.max())
+
+    valid = np.arange(out_len)[None, :] < new_lengths[:, None]
+    out = speed_and_shift(batch, lengths, factors, shifts, out_len) * valid
+
+    if reverb.any():
+        impulses = np.concatenate([room_impulses(rng, 1) for rng, r in zip(rngs, reverb) if r])
+        out[reverb] = apply_reverb(out[reverb], impulses, valid[reverb])
+
+    signal_power = row_energy(out, new_lengths) / new_lengths + 1e-10
+
+    for i in np.flatnonzero(noisy):
+        # Noise spans the row's own length so it is the same in any batch
+        noise = background_noise(rngs[i], noise_clips, 1, int(new_lengths[i]))[0]
+        noise_power = np.mean(noise * noise) + 1e-10
+        scale = np.sqrt(signal_power[i] / (noise_power * 10 ** (snr_db[i] / 10)))
+        out[i, :len(noise)] += noise * np.float32(scale)
+
+    out *= gain[:, None].astype(np.float32)
+    peak = np.max(np.abs(out), axis=1) + 1e-9
+    out *= np.minimum(1.0, PEAK_LIMIT / peak)[:, None].astype(np.float32)
+    return out, new_lengths
+
+
+def process_batch(task):
+    """Worker: augment one batch of clips into variants and index them.
+    Returns clips written."""
+    paths, variants, seed, noise_dir = task
+    with span("augment batch", cat="item", clips=len(paths)), sampled("augment batch"):
+        clips = [load_clip(p) for p in paths]
+        lengths = np.array([len(c) for c in clips], dtype=np.int64)
+        batch = pad_batch(clips, int(lengths.max()))
+        noise_clips = load_noise_clips(noise_dir)
+        clip_seeds = [clip_seed(p) for p in paths]
+
+        written, meta = [], []
+        for variant in range(variants):
+            rngs = [np.random.default_rng([seed, clip, variant]) for clip in clip_seeds]
+            out, new_lengths = augment_batch(batch, lengths, rngs, noise_clips)
+            for path, row, length in zip(paths, out, new_lengths):
+                target = variant_path(path, variant)
+                write_wav(target, to_int16(row[:length]))
+                written.append(target)
+                meta.append({"augmented_from": Path(path).name, "variant": variant, "seed": seed})
+        register_clips(written, "augment_samples", meta)
+    return len(written)
+
+
+def find_sources(folders):
+    sources = []
+    for folder in folders:
+        sources += sorted(p for p in Path(folder).glob("*.wav") if not p.name.startswith(AUG_PREFIX))
+    return sources
+
+
+def variant_path(source, variant):
+    return Path(source).with_name(f"{AUG_PREFIX}{Path(source).stem}_{variant:02d}.wav")
+
+
+def remove_stale_variants(folders, sources, variants):
+    """Delete (and unindex) aug_ clips the current run will not write.
+    Returns how many were removed."""
+    wanted = {variant_path(p, v) for p in sources for v in range(variants)}
+    stale = [p for folder in folders for p in Path(folder).glob(f"{AUG_PREFIX}*.wav")
+             if p not in wanted]
+    for path in stale:
+        path.unlink(missing_ok=True)
+    if stale:
+        with DatasetIndex() as index:
+            index.remove(stale)
+    return len(stale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Augment 16kHz samples with noise, reverb, speed and gain")
+    parser.add_argument("folders", nargs="*", default=["samples/positive", "samples/negative"])
+    parser.add_argument("-n", "--variants", type=int, default=40, help="augmented copies per clip")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--noise-dir", default=None, help="folder of background noise WAVs")
+    add_jobs_argument(parser, "parallel augmentation processes")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("augment_samples", args)
+
+    print("🎛️  HEY ARNIE - Sample Augmenter")
+    print("=" * 45)
+
+    sources = find_sources(args.folders)
+    removed = remove_stale_variants(args.folders, sources, args.variants)
+    if removed:
+        print(f"🧹 Removed {removed} stale augmented clips")
+    if not sources:
+        print("❌ No clips found to augment")
+        return
+
+    # Sort by length so padded batches waste little space
+    sources.sort(key=lambda p: p.stat().st_size)
+    tasks = [
+        ([str(p) for p in sources[i:i + args.batch_size]], args.variants, args.seed, args.noise_dir)
+        for i in range(0, len(sources), args.batch_size)
+    ]
+    print(f"🔄 {len(sources)} clips x {args.variants} variants in {len(tasks)} batches, "
+          f"{args.jobs} workers...")
+
+    start = time.perf_counter()
+    written = 0
+    with span("augment", clips=len(sources)), ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for count in pool.map(process_batch, tasks):
+            written += count
+    elapsed = time.perf_counter() - start
+
+    print(f"\n✅ Wrote {written} augmented clips in {elapsed:.1f}s ({written / elapsed:.0f} clips/s)")
+
+if __name__ == "__main__":
+    main()
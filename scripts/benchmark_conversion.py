@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Conversion Benchmark
+Measures 16kHz conversion throughput (samples/second) for the old and new paths
+
+- sox path:   write TTS file, spawn sox, delete TTS file (skipped if sox is missing)
+- numpy path: read TTS file into memory, polyphase resample, write final WAV once
+
+TTS output is simulated with 22.05kHz 16-bit WAVs like 'say' produces.
+
+Usage: python scripts/benchmark_conversion.py [--clips 200]
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import convert_file, to_int16, write_wav
+from instrumentation import add_trace_arguments, start_trace
+
+TTS_RATE = 22050
+
+def fake_tts_audio(rng, seconds):
+    """A voiced-ish test signal: a few harmonics plus a little noise"""
+    t = np.arange(int(TTS_RATE * seconds)) / TTS_RATE
+    f0 = rng.uniform(90, 220)
+    audio = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+    audio += 0.05 * rng.standard_normal(len(t))
+    return to_int16(0.3 * audio / np.abs(audio).max())
+
+def run_path(converter, clips, workdir):
+    rng = np.random.default_rng(0)
+    tts_audio = [fake_tts_audio(rng, rng.uniform(0.5, 1.5)) for _ in range(8)]
+
+    start = time.perf_counter()
+    for i in range(clips):
+        # Writing the TTS output is part of both paths
+        tts_path = workdir / f"clip_{i:04d}.tts.wav"
+        write_wav(tts_path, tts_audio[i % len(tts_audio)], TTS_RATE)
+        convert_file(tts_path, workdir / f"clip_{i:04d}.wav", converter)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sox vs in-process conversion")
+    parser.add_argument("--clips", type=int, default=200)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("benchmark_conversion", args)
+
+    print("⏱️  HEY ARNIE - Conversion Benchmark")
+    print("=" * 45)
+    print(f"Clips: {args.clips} ({TTS_RATE}Hz -> 16000Hz)")
+
+    results = {}
+    for converter in ["sox", "numpy"]:
+        if converter == "sox" and shutil.which("sox") is None:
+            print("  sox:   skipped (sox not installed)")
+            continue
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed = run_path(converter, args.clips, Path(tmp))
+        results[converter] = args.clips / elapsed
+        print(f"  {converter + ':':6} {elapsed:6.2f}s  {results[converter]:7.1f} samples/s")
+
+    if len(results) == 2:
+        print(f"\n✅ numpy path is {results['numpy'] / results['sox']:.2f}x the sox throughput")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Dataset Read Benchmark
+Full-dataset read time: one WAV file per clip vs packed shards
+
+Writes a synthetic dataset of --clips short WAVs (like samples/positive
+and samples/negative), packs it with pack_dataset.py, then reads every
+clip's audio:
+- loose:            open + parse + read each WAV
+- shards:           memory-mapped shards in order
+- shards, shuffled: block-shuffled order, as a training loop reads them
+Each is timed cold (file pages evicted from the OS cache first, where
+the OS allows it) and warm.
+
+Usage: python scripts/benchmark_dataset_read.py [--clips 20000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, write_wav
+from instrumentation import add_trace_arguments, start_trace
+from pack_dataset import PackedDataset, pack, read_clip
+from synth_engine import default_jobs
+
+
+def make_dataset(root, clips, seed=0):
+    """Short noise-burst clips split between positive/ and negative/.
+    Returns [(path, label, fake sha)]."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for label in ("positive", "negative"):
+        (root / label).mkdir(parents=True)
+    for i in range(clips):
+        label = "positive" if i % 3 == 0 else "negative"
+        n = int(rng.uniform(0.8, 2.0) * TARGET_RATE)
+        audio = (rng.standard_normal(n) * np.hanning(n) * 3000).astype(np.int16)
+        path = root / label / f"clip_{i:05d}.wav"
+        write_wav(path, audio)
+        rows.append((str(path), label, f"{i:064x}"))
+    return rows
+
+
+def evict(paths):
+    """Ask the OS to drop these files from its page cache. Returns False if it can't."""
+    if not hasattr(os, "posix_fadvise"):
+        return False
+    os.sync()
+    for path in paths:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    return True
+
+
+def read_loose(rows):
+    total = 0
+    for path, _, _ in rows:
+        total += int(read_clip(path).sum(dtype=np.int64))
+    return total
+
+
+def read_shards(pack_dir, shuffled=False):
+    dataset = PackedDataset(pack_dir)
+    clips = (clip for _, clip in dataset.shuffled()) if shuffled else iter(dataset)
+    return sum(int(clip.sum(dtype=np.int64)) for clip in clips)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loose WAV vs packed shard reads")
+    parser.add_argument("--clips", type=int, default=20000)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("benchmark_dataset_read", args)
+
+    print("⏱️  HEY ARNIE - Dataset Read Benchmark")
+    print("=" * 45)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        start = time.perf_counter()
+        rows = make_dataset(root / "samples", args.clips)
+        print(f"Wrote {args.clips} clips in {time.perf_counter() - start:.1f}s")
+        start = time.perf_counter()
+        pack(rows, root / "packed", default_jobs())
+        print(f"Packed them in {time.perf_counter() - start:.1f}s")
+
+        wavs = [path for path, _, _ in rows]
+        shards = [str(p) for p in (root / "packed").glob("shard_*.i16")]
+        runs = [("loose WAVs", wavs, lambda: read_loose(rows)),
+                ("shards", shards, lambda: read_shards(root / "packed")),
+                ("shards, shuffled", shards, lambda: read_shards(root / "packed", shuffled=True))]
+
+        print(f"\n{'':18} {'cold':>10} {'warm':>10}")
+        checksums = set()
+        for name, files, run in runs:
+            times = []
+            for cold in (True, False):
+                if cold and not evict(files):
+                    times.append(None)
+                    continue
+                start = time.perf_counter()
+                checksums.add(run())
+                times.append(time.perf_counter() - start)
+            print(f"{name:18} " + " ".join(f"{t:9.2f}s" if t is not None else f"{'n/a':>10}"
+                                           for t in times))
+        print(f"\n{'✅' if len(checksums) == 1 else '❌'} All methods read identical audio")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Segmentation Benchmark
+Times silence splitting of a synthetic long recording
+
+The recording alternates 0.4-1.6s voiced bursts with 0.5-2.0s pauses over
+a quiet noise floor, so the expected number of clips is known up front.
+Compares the in-process NumPy splitter, its streaming mode and the sox
+path (if installed).
+
+--verify checks that streaming finds exactly the same segment boundaries
+as the whole-recording splitter, for several block sizes (including ones
+that don't line up with 10ms frames), and exits non-zero if not.
+
+Usage: python scripts/benchmark_segmentation.py [--minutes 5] [--verify]
+"""
+
+import argparse
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, to_int16, write_wav
+from instrumentation import add_trace_arguments, start_trace
+from process_iphone_recordings import process_recording
+from segmentation import StreamingSegmenter, find_segments
+
+def synthetic_recording(minutes, seed=0):
+    """Return (int16 samples, number of bursts) for a fake voice memo"""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * TARGET_RATE)
+    audio = 0.001 * rng.standard_normal(total)  # ~-60 dBFS noise floor
+    pos = int(rng.uniform(0.5, 1.0) * TARGET_RATE)
+    bursts = 0
+    while True:
+        length = int(rng.uniform(0.4, 1.6) * TARGET_RATE)
+        if pos + length >= total:
+            break
+        t = np.arange(length) / TARGET_RATE
+        f0 = rng.uniform(100, 250)
+        envelope = np.hanning(length) ** 0.25
+        audio[pos:pos + length] += 0.3 * envelope * np.sin(2 * np.pi * f0 * t)
+        bursts += 1
+        pos += length + int(rng.uniform(0.5, 2.0) * TARGET_RATE)
+    return to_int16(audio), bursts
+
+def time_splitter(splitter, recording, stream=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp) / "out"
+        start = time.perf_counter()
+        count = process_recording(recording, out, prefix="bench", splitter=splitter, stream=stream,
+                                  index=False)
+        return time.perf_counter() - start, count
+
+def verify_streaming(samples):
+    """Streaming boundaries (and audio) must match the whole-recording splitter"""
+    # Two minutes is plenty; tiny blocks make longer checks slow.
+    # A 5s burst exercises the overlong path, a burst at the end the flush.
+    samples = samples[:TARGET_RATE * 120].copy()
+    samples[TARGET_RATE * 10:TARGET_RATE * 15] = 8000
+    samples[-TARGET_RATE // 5:] = 8000
+    expected = find_segments(samples)
+
+    ok = True
+    for block_size in [159, 160, 4001, 16001, 77777, len(samples)]:
+        segmenter = StreamingSegmenter()
+        found = []
+        for i in range(0, len(samples), block_size):
+            found += segmenter.feed(samples[i:i + block_size])
+        found += segmenter.flush()
+
+        same = [(s, e) for s, e, _ in found] == expected and all(
+            clip is None or np.array_equal(clip, samples[s:e]) for s, e, clip in found)
+        print(f"  block {block_size:>8}: {'✅ identical' if same else '❌ MISMATCH'} "
+              f"({len(found)} segments)")
+        ok = ok and same
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark silence splitting")
+    parser.add_argument("--minutes", type=float, default=5.0)
+    parser.add_argument("--verify", action="store_true",
+                        help="check streaming matches whole-recording boundaries")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("benchmark_segmentation", args)
+
+    print("⏱️  HEY ARNIE - Segmentation Benchmark")
+    print("=" * 45)
+
+    samples, bursts = synthetic_recording(args.minutes)
+    if args.verify:
+        print("Verifying streaming segmentation...")
+        if not verify_streaming(samples):
+            sys.exit(1)
+        print()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        recording = Path(tmp) / "memo.wav"
+        write_wav(recording, samples)
+        print(f"Recording: {args.minutes:g} min, {bursts} utterances\n")
+
+        results = {}
+        for splitter in ["sox", "numpy"]:
+            if splitter == "sox" and shutil.which("sox") is None:
+                print("  sox:   skipped (sox not installed)\n")
+                continue
+            results[splitter] = time_splitter(splitter, recording)
+            print()
+        results["stream"] = time_splitter("numpy", recording, stream=True)
+        print()
+
+    for splitter, (elapsed, count) in results.items():
+        print(f"  {splitter + ':':7} {elapsed:6.2f}s  {count} clips "
+              f"({args.minutes * 60 / elapsed:.0f}x real time)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Synthesis Benchmark
+Compares serial, parallel and persistent-worker synthesis wall-clock time
+
+By default uses the deterministic stand-in TTS backend. It sleeps for
+--latency to mimic starting the engine and loading a voice (per clip,
+or once per worker and voice when persistent), then renders synthetic
+speech and converts it to 16kHz. So it runs on Linux without macOS 'say'
+or sox. Pass --backend to measure a real engine. Each run prints where
+the per-clip time went (spawn, synthesis, conversion, write).
+
+Usage: python scripts/benchmark_synthesis.py [--clips 100] [--jobs N] [--latency 0.05]
+                                             [--backend standin|say|piper|espeak]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from instrumentation import add_trace_arguments, start_trace
+from synth_engine import SynthJob, default_jobs, run_jobs, summarize
+from tts_backends import StageTimings, StandInBackend, get_backend
+from tts_workers import job_synthesizer
+
+def make_jobs(output_dir, clips, voices):
+    phrases = ["hey arnie", "arnie", "hey arnold", "hay arnie"]
+    rates = [140, 160, 180, 200, 220]
+    return [
+        SynthJob(i, phrases[i % len(phrases)], voices[i % len(voices)], rates[i % len(rates)],
+                 str(output_dir / f"bench_{i:04d}.wav"))
+        for i in range(clips)
+    ]
+
+def time_run(backend, clips, workers, mode):
+    timings = StageTimings()
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = make_jobs(Path(tmp), clips, backend.pick_voices(limit=3))
+        start = time.perf_counter()
+        with job_synthesizer(backend, "numpy", workers, mode, timings) as synthesize:
+            results = run_jobs(jobs, synthesize, max_workers=workers, quiet=True)
+        elapsed = time.perf_counter() - start
+    ok, failed = summarize(results)
+    if failed:
+        print(f"  ⚠️ {failed} jobs failed: {results[0].error}")
+    return elapsed, ok, timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs parallel synthesis")
+    parser.add_argument("--clips", type=int, default=100)
+    parser.add_argument("-j", "--jobs", type=int, default=default_jobs())
+    parser.add_argument("--latency", type=float, default=0.05,
+                        help="stand-in TTS start-up + voice load time (seconds)")
+    parser.add_argument("--backend", choices=["standin", "say", "piper", "espeak"],
+                        default="standin")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("benchmark_synthesis", args)
+
+    print("⏱️  HEY ARNIE - Synthesis Benchmark")
+    print("=" * 45)
+    if args.backend == "standin":
+        backend = StandInBackend(args.latency)
+        print(f"Clips: {args.clips}, stand-in latency: {args.latency}s")
+    else:
+        backend = get_backend(args.backend)
+        print(f"Clips: {args.clips}, backend: {backend.version}")
+
+    elapsed = {}
+    for workers in (1, args.jobs):
+        for mode in ("per-clip", "persistent"):
+            seconds, ok, timings = time_run(backend, args.clips, workers, mode)
+            elapsed[workers, mode] = seconds
+            print(f"\n  {mode:10s} x {workers:2d} workers: {seconds:6.2f}s  "
+                  f"{ok / seconds:7.1f} clips/s")
+            timings.report(indent="    ")
+
+    baseline = elapsed[1, "per-clip"]
+    print(f"\n✅ Speedup over serial per-clip: "
+          f"persistent {baseline / elapsed[1, 'persistent']:.2f}x, "
+          f"parallel {baseline / elapsed[args.jobs, 'per-clip']:.2f}x, "
+          f"parallel persistent {baseline / elapsed[args.jobs, 'persistent']:.2f}x")
+
+if __name__ == "__main__":
+    main()
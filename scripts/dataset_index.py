@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Dataset Index
+One SQLite manifest of every clip in samples/
+
+Each clip's path, label (the folder: positive, negative, holdout...),
+SHA-256, duration, sample rate, channels, RMS, peak, source script and
+any extra metadata (phrase, voice, recording...) is recorded once, when
+the script that made it writes it. Registration is one transaction per
+batch, and SQLite's WAL mode lets parallel workers register at the same
+time. Queries such as "positives under 0.5s" use an index instead of
+rescanning and re-reading folders.
+
+Clips added by hand are picked up by 'sync', which only reads files
+whose size or mtime changed.
+
+Usage: python scripts/dataset_index.py sync              # reconcile with samples/
+       python scripts/dataset_index.py stats
+       python scripts/dataset_index.py query --label positive --max-duration 0.5
+       python scripts/dataset_index.py duplicates
+       python scripts/dataset_index.py verify           # re-hash every clip
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import read_wav
+from instrumentation import add_trace_arguments, span, start_trace
+
+DEFAULT_INDEX = Path("samples/dataset_index.sqlite")
+SAMPLE_DIRS = ["samples/positive", "samples/negative", "samples/holdout"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    path        TEXT PRIMARY KEY,
+    label       TEXT NOT NULL,
+    sha256      TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    duration    REAL,
+    sample_rate INTEGER,
+    channels    INTEGER,
+    rms         REAL,
+    peak        REAL,
+    source      TEXT,
+    meta        TEXT,
+    added       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clips_label_duration ON clips (label, duration);
+CREATE INDEX IF NOT EXISTS clips_sha256 ON clips (sha256);
+CREATE INDEX IF NOT EXISTS clips_source ON clips (source);
+"""
+
+COLUMNS = ["path", "label", "sha256", "size", "mtime_ns", "duration", "sample_rate",
+           "channels", "rms", "peak", "source", "meta", "added"]
+
+
+def clip_key(path):
+    """The path as stored: relative to the working directory when inside it"""
+    path = Path(path)
+    try:
+        return str(path.resolve().relative_to(Path.cwd().resolve()))
+    except ValueError:
+        return str(path.resolve())
+
+
+def label_for(path):
+    """A clip's label is its folder name (samples/positive -> positive)"""
+    return Path(path).parent.name
+
+
+def describe(path, source=None, meta=None, label=None):
+    """Read a clip once and return its index row as a dict"""
+    st = os.stat(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    row = {
+        "path": clip_key(path), "label": label or label_for(path),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+        "duration": None, "sample_rate": None, "channels": None, "rms": None, "peak": None,
+        "source": source, "meta": json.dumps(meta) if meta else None, "added": time.time(),
+    }
+    try:
+        samples, rate = read_wav(data)
+    except (EOFError, ValueError, wave.Error):
+        return row  # Unreadable: indexed with no audio stats (lint_dataset flags it)
+    channels = samples.shape[1] if samples.ndim == 2 else 1
+    row.update(duration=len(samples) / rate, sample_rate=rate, channels=channels,
+               rms=float(np.sqrt(np.mean(samples ** 2))) if samples.size else 0.0,
+               peak=float(np.max(np.abs(samples))) if samples.size else 0.0)
+    return row
+
+
+class DatasetIndex:
+    """The clips table, with batch registration and common queries"""
+
+    def __init__(self, path=DEFAULT_INDEX):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(self.path, timeout=60)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.db.close()
+
+    def add(self, rows):
+        """Insert or replace rows (dicts from describe) in one transaction"""
+        rows = list(rows)
+        with self.db:
+            self.db.executemany(
+                f"INSERT OR REPLACE INTO clips ({', '.join(COLUMNS)}) "
+                f"VALUES ({', '.join(':' + c for c in COLUMNS)})", rows)
+        return len(rows)
+
+    def remove(self, paths):
+        with self.db:
+            self.db.executemany("DELETE FROM clips WHERE path = ?", [(clip_key(p),) for p in paths])
+
+    def clips(self, label=None, min_duration=None, max_duration=None, source=None):
+        """Rows matching every given filter, ordered by path"""
+        where, params = [], []
+        for clause, value in (("label = ?", label), ("duration >= ?", min_duration),
+                              ("duration < ?", max_duration), ("source = ?", source)):
+            if value is not None:
+                where.append(clause)
+                params.append(value)
+        sql = "SELECT * FROM clips" + (" WHERE " + " AND ".join(where) if where else "")
+        return self.db.execute(sql + " ORDER BY path", params).fetchall()
+
+    def paths(self, label=None, **filters):
+        return [Path(row["path"]) for row in self.clips(label, **filters)]
+
+    def counts(self):
+        """{label: clip count}"""
+        return dict(self.db.execute("SELECT label, COUNT(*) FROM clips GROUP BY label"))
+
+    def summary(self):
+        """(label, clips, total seconds, mean seconds) per label"""
+        return self.db.execute(
+            "SELECT label, COUNT(*), SUM(duration), AVG(duration) FROM clips "
+            "GROUP BY label ORDER BY label").fetchall()
+
+    def duplicates(self):
+        """Lists of paths whose contents are byte-identical"""
+        groups = self.db.execute(
+            "SELECT group_concat(path, char(10)) FROM clips GROUP BY sha256 "
+            "HAVING COUNT(*) > 1").fetchall()
+        return [g[0].split("\n") for g in groups]
+
+    def sync(self, folders=SAMPLE_DIRS, source="sync"):
+        """Reconcile with the WAVs on disk. Returns (added, updated, removed)."""
+        known = {row["path"]: row for row in
+                 self.db.execute("SELECT path, size, mtime_ns, source, meta FROM clips")}
+        on_disk = {}
+        for folder in folders:
+            if not Path(folder).is_dir():
+                continue
+            folder_key = Path(clip_key(folder))
+            for entry in os.scandir(folder):
+                if (entry.name.endswith(".wav") and not entry.name.endswith(".tts.wav")
+                        and not entry.name.startswith(".") and entry.is_file()):
+                    on_disk[str(folder_key / entry.name)] = entry
+
+        new_rows, added, updated = [], 0, 0
+        for key, entry in on_disk.items():
+            st = entry.stat()
+            row = known.get(key)
+            if row and row["size"] == st.st_size and row["mtime_ns"] == st.st_mtime_ns:
+                continue
+            if row:
+                # Changed in place: keep where it came from
+                meta = json.loads(row["meta"]) if row["meta"] else None
+                new_rows.append(describe(entry.path, row["source"], meta))
+                updated += 1
+            else:
+                new_rows.append(describe(entry.path, source=source))
+                added += 1
+        scanned = {str(Path(clip_key(f))) for f in folders}
+        gone = [key for key in known if key not in on_disk and str(Path(key).parent) in scanned]
+        self.add(new_rows)
+        self.remove(gone)
+        return added, updated, len(gone)
+
+    def verify(self):
+        """Paths whose file is missing or whose contents no longer match the hash"""
+        bad = []
+        for row in self.db.execute("SELECT path, sha256 FROM clips"):
+            try:
+                with open(row["path"], "rb") as f:
+                    ok = hashlib.sha256(f.read()).hexdigest() == row["sha256"]
+            except FileNotFoundError:
+                ok = False
+            if not ok:
+                bad.append(row["path"])
+        return bad
+
+
+def register_clips(paths, source, meta=None, index_path=DEFAULT_INDEX):
+    """Describe and register freshly written clips in one transaction.
+    meta is an optional list of per-clip dicts (phrase, voice, ...)."""
+    paths = list(paths)
+    if not paths:
+        return 0
+    metas = meta or [None] * len(paths)
+    with span("register clips", clips=len(paths), source=source):
+        rows = [describe(p, source, m) for p, m in zip(paths, metas)]
+        with DatasetIndex(index_path) as index:
+            return index.add(rows)
+
+
+def indexed_clips(label, index_path=DEFAULT_INDEX, folders=SAMPLE_DIRS):
+    """Paths of every clip with a label. The index is synced first (stat-only,
+    so cheap): deleted clips drop out and clips added by hand come in."""
+    with DatasetIndex(index_path) as index:
+        index.sync(folders)
+        return index.paths(label)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and maintain the dataset index")
+    parser.add_argument("command", choices=["sync", "stats", "query", "duplicates", "verify"])
+    parser.add_argument("--index", default=str(DEFAULT_INDEX))
+    parser.add_argument("--label")
+    parser.add_argument("--source")
+    parser.add_argument("--min-duration", type=float)
+    parser.add_argument("--max-duration", type=float)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("dataset_index", args)
+
+    with DatasetIndex(args.index) as index:
+        if args.command == "sync":
+            start = time.perf_counter()
+            with span("sync"):
+                added, updated, removed = index.sync()
+            print(f"🗂️  +{added} added, ~{updated} updated, -{removed} removed "
+                  f"in {time.perf_counter() - start:.2f}s")
+        elif args.command == "stats":
+            print(f"{'label':>10} {'clips':>8} {'hours':>8} {'mean s':>8}")
+            for label, count, total, mean in index.summary():
+                print(f"{label:>10} {count:8d} {(total or 0) / 3600:8.2f} {mean or 0:8.2f}")
+        elif args.command == "query":
+            start = time.perf_counter()
+            rows = index.clips(args.label, args.min_duration, args.max_duration, args.source)
+            elapsed = time.perf_counter() - start
+            for row in rows:
+                print(f"{row['path']}\t{row['duration'] or 0:.2f}s\t{row['source'] or ''}")
+            print(f"🔎 {len(rows)} clips in {elapsed * 1000:.1f}ms")
+        elif args.command == "duplicates":
+            groups = index.duplicates()
+            for group in groups:
+                print("  " + "\n  ".join(group) + "\n")
+            print(f"🔁 {len(groups)} groups of identical clips")
+        elif args.command == "verify":
+            bad = index.verify()
+            for path in bad:
+                print(f"  ❌ {path}")
+            print(f"{'✅' if not bad else '⚠️ '} {len(bad)} missing or modified clips")
+
+
+if __name__ == "__main__":
+    main()
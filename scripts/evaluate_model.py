@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Model Evaluation
+False accepts per hour on negative audio vs false-reject rate on positives
+
+Runs the trained model over hours of negative audio (short clips are
+concatenated into one continuous stream, long recordings are cut into
+chunks) and over held-out positive clips. It then sweeps
+probability_cutoff and sliding_window_size and prints the FA/hour vs
+FRR trade-off for every combination.
+
+Each model call's probability is computed once and cached on disk
+(.cache/probabilities/, keyed by model, frontend and audio). Every
+setting is then scored from those probabilities with micro_wake_word's
+decision rule. One cumulative-sum moving average per window size is
+shared by all cutoffs. Uncached chunks and clip batches run in parallel,
+one model instance per process, so a day of audio takes minutes rather
+than a day, and re-sweeping is nearly instant.
+
+The best setting (lowest FRR within --target-fa-per-hour) is printed as
+a micro_wake_word config block shaped like esphome_config_example.yaml.
+
+Usage: python scripts/evaluate_model.py --negatives samples/negative ~/ambient \\
+           --positives samples/holdout [--jobs N] [--csv results.csv]
+           [--target-fa-per-hour 0.5] [--config-out recommended.yaml]
+"""
+
+import argparse
+import csv
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, to_16k_mono, to_mono
+from process_iphone_recordings import expand_recordings
+from segmentation import decode_recording
+from frontend import StreamingFrontend
+from instrumentation import add_trace_arguments, sampled, span, start_trace
+from probability_cache import ProbabilityCache, audio_identity
+from stream_detector import DEFAULT_MODEL, StreamingModel, ignore_calls
+from synth_engine import add_jobs_argument
+
+CUTOFFS = [round(c, 2) for c in np.arange(0.05, 1.0, 0.05)]
+WINDOWS = [1, 2, 3, 5, 7, 10, 15, 20, 30]
+TARGET_FA_PER_HOUR = 0.5
+
+CHUNK_SECONDS = 600          # Negative audio per worker task
+WARMUP_SECONDS = 1.0         # Silence before each positive so model state settles
+TAIL_SECONDS = 0.5           # Silence after each positive (late detections count)
+POSITIVE_BATCH = 64          # Positive clips per worker task
+
+
+def audio_duration(path):
+    """Seconds of audio in a file (from its header), or None if neither
+    soundfile nor sox can tell"""
+    try:
+        import soundfile as sf
+        info = sf.info(str(path))
+        return info.frames / info.samplerate
+    except Exception:
+        pass
+    try:
+        result = subprocess.run(['sox', '--i', '-D', str(path)],
+                                capture_output=True, text=True, check=True)
+        return float(result.stdout.strip())
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def plan_negative_chunks(paths, chunk_seconds=CHUNK_SECONDS):
+    """Group negative files into ~chunk_seconds tasks of (path, start, end) pieces.
+    Long files are cut into several tasks, whatever their sample rate or format."""
+    chunks, current, current_seconds = [], [], 0.0
+    for path in paths:
+        duration = audio_duration(path)
+        if duration is None or duration <= chunk_seconds:
+            current.append((str(path), None, None))
+            current_seconds += duration or 0.0
+            if current_seconds >= chunk_seconds:
+                chunks.append(current)
+                current, current_seconds = [], 0.0
+            continue
+        for start in np.arange(0.0, duration, chunk_seconds):
+            chunks.append([(str(path), float(start), float(min(start + chunk_seconds, duration)))])
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def read_piece(path, start, end):
+    """16kHz mono int16 samples of a file, or of its [start, end) seconds.
+    A piece is read by seeking at the file's own rate and resampled on its
+    own, so long recordings are never decoded whole."""
+    if start is None:
+        return decode_recording(path)
+    try:
+        import soundfile as sf
+        rate = sf.info(str(path)).samplerate
+    except Exception:
+        return decode_recording(path, start, end)  # e.g. m4a: sox decodes just the piece
+    samples, _ = sf.read(str(path), start=int(start * rate), stop=int(end * rate),
+                         dtype="int16", always_2d=True)
+    if rate != TARGET_RATE:
+        return to_16k_mono(to_mono(samples.astype(np.float32)) / 32768, rate)
+    return samples.mean(axis=1).round().astype(np.int16) if samples.shape[1] > 1 else samples[:, 0]
+
+
+def negative_probabilities(task):
+    """Worker: one continuous stream through a fresh model. Returns (probs, seconds)."""
+    model_path, frontend_name, pieces = task
+    model = StreamingModel(model_path)
+    frontend = StreamingFrontend(frontend_name)
+    probabilities = []
+    samples_seen = 0
+    with span("negative chunk", cat="item", pieces=len(pieces)), sampled("inference"):
+        for path, start, end in pieces:
+            samples = read_piece(path, start, end)
+            model.process_features(frontend.process(samples), probabilities)
+            samples_seen += len(samples)
+    return np.asarray(probabilities, dtype=np.uint8), samples_seen / TARGET_RATE
+
+
+def positive_probabilities(task):
+    """Worker: each clip from fresh model state, after a short silent warm-up.
+    Returns one probability array per clip, covering only the clip (+ tail)."""
+    model_path, frontend_name, paths = task
+    model = StreamingModel(model_path)
+    warmup = np.zeros(int(WARMUP_SECONDS * TARGET_RATE), dtype=np.int16)
+    tail = np.zeros(int(TAIL_SECONDS * TARGET_RATE), dtype=np.int16)
+    results = []
+    with span("positive batch", cat="item", clips=len(paths)), sampled("inference"):
+        for path in paths:
+            model.reset()
+            frontend = StreamingFrontend(frontend_name)
+            model.process_features(frontend.process(warmup))
+            probabilities = model.process_features(frontend.process(decode_recording(path)))
+            model.process_features(frontend.process(tail), probabilities)
+            results.append(np.asarray(probabilities, dtype=np.uint8))
+    return results
+
+
+def moving_average(probabilities, window):
+    """Mean of the last 'window' probabilities at every call (zeros before
+    the start), as a 0-1 fraction, from one cumulative sum"""
+    csum = np.cumsum(probabilities, dtype=np.int64)
+    total = csum.copy()
+    total[window:] -= csum[:-window]
+    return total / (255.0 * window)
+
+
+def detections_from_average(average, cutoff, stride=1):
+    """Count micro_wake_word detections given the moving average of a model
+    with this stride. The first MIN_SLICES_BEFORE_DETECTION feature slices,
+    and as many after each detection, are ignored."""
+    ignore = ignore_calls(stride)
+    candidates = np.flatnonzero(average > cutoff)
+    count = 0
+    next_allowed = ignore
+    while True:
+        i = np.searchsorted(candidates, next_allowed)
+        if i == len(candidates):
+            return count
+        count += 1
+        next_allowed = candidates[i] + ignore + 1
+
+
+def count_detections(probabilities, cutoff, window, stride=1):
+    """Detections micro_wake_word would report for a probability stream"""
+    return detections_from_average(moving_average(probabilities, window), cutoff, stride)
+
+
+def sweep(negatives, negative_hours, positives, cutoffs=CUTOFFS, windows=WINDOWS, stride=1):
+    """Score every (cutoff, window). Returns rows of
+    (cutoff, window, false_accepts, fa_per_hour, false_rejects, frr)."""
+    cutoffs = sorted(cutoffs)
+    rows = []
+    for window in windows:
+        negative_averages = [moving_average(p, window) for p in negatives]
+        # A positive is caught iff its peak average beats the cutoff
+        # (warmed-up state: no start-up ignore period), so FRR for every
+        # cutoff comes from one sorted array
+        peaks = np.sort([moving_average(p, window).max() if len(p) else 0.0 for p in positives])
+        missed = np.searchsorted(peaks, cutoffs, side="right")
+        for cutoff, false_rejects in zip(cutoffs, missed):
+            false_accepts = sum(detections_from_average(a, cutoff, stride)
+                                for a in negative_averages)
+            rows.append((cutoff, window, false_accepts,
+                         false_accepts / negative_hours if negative_hours else 0.0,
+                         int(false_rejects), false_rejects / len(positives) if positives else 0.0))
+    return rows
+
+
+def pareto_rows(rows):
+    """Rows no other row beats on both FA/hour and FRR"""
+    best = []
+    for row in sorted(rows, key=lambda r: (r[3], r[5], -r[0], r[1])):
+        if not best or row[5] < best[-1][5]:
+            best.append(row)
+    return best
+
+
+def recommend(rows, target_fa_per_hour=TARGET_FA_PER_HOUR):
+    """Lowest-FRR setting within the FA/hour budget (or the lowest FA/hour
+    if none fits). Ties prefer fewer false accepts, then a shorter window."""
+    within = [r for r in rows if r[3] <= target_fa_per_hour]
+    if within:
+        return min(within, key=lambda r: (r[5], r[3], r[1], -r[0]))
+    return min(rows, key=lambda r: (r[3], r[5], r[1]))
+
+
+def config_block(row, model_name="hey_arnie.tflite"):
+    """A micro_wake_word block in the shape of esphome_config_example.yaml"""
+    cutoff, window, _, fa_hour, _, frr = row
+    return (
+        "micro_wake_word:\n"
+        "  models:\n"
+        f"    - model: {model_name}\n"
+        f"      probability_cutoff: {cutoff:.2f}      # FA/hour {fa_hour:.2f}, FRR {frr:.1%} on evaluation audio\n"
+        f"      sliding_window_size: {window:<3d}      # Frames to average\n"
+    )
+
+
+def print_table(rows):
+    print(f"\n{'cutoff':>7} {'window':>7} {'FA':>6} {'FA/hour':>9} {'FR':>6} {'FRR':>7}")
+    print("-" * 47)
+    for cutoff, window, fa, fa_hour, fr, frr in rows:
+        print(f"{cutoff:>7.2f} {window:>7d} {fa:>6d} {fa_hour:>9.2f} {fr:>6d} {frr:>7.1%}")
+
+
+def write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["probability_cutoff", "sliding_window_size", "false_accepts",
+                         "fa_per_hour", "false_rejects", "frr"])
+        writer.writerows(rows)
+
+
+def compute_probabilities(model_path, negative_paths, positive_paths, jobs, frontend=None,
+                          use_cache=True):
+    """Run the model over all evaluation audio in parallel, reusing cached
+    probabilities. Returns (negative prob arrays, negative hours, positive prob arrays)."""
+    cache = ProbabilityCache(model_path, frontend, settings=[WARMUP_SECONDS, TAIL_SECONDS]) \
+        if use_cache else None
+
+    def lookup(identity):
+        if cache is None:
+            return None, None
+        key = cache.key(identity)
+        return key, cache.load(key)
+
+    chunks = plan_negative_chunks(negative_paths)
+    negatives, seconds = [None] * len(chunks), 0.0
+    neg_todo = []
+    for i, chunk in enumerate(chunks):
+        key, hit = lookup([audio_identity(*piece) for piece in chunk])
+        if hit is None:
+            neg_todo.append((i, key))
+        else:
+            negatives[i] = hit["probabilities"]
+            seconds += float(hit["seconds"])
+
+    positives = [None] * len(positive_paths)
+    pos_todo = []
+    for i, path in enumerate(positive_paths):
+        key, hit = lookup(audio_identity(path))
+        if hit is None:
+            pos_todo.append((i, key))
+        else:
+            positives[i] = hit["probabilities"]
+
+    cached = len(chunks) - len(neg_todo) + len(positive_paths) - len(pos_todo)
+    if cached:
+        print(f"♻️  Reusing cached probabilities for {cached} streams/clips")
+
+    neg_tasks = [(str(model_path), frontend, chunks[i]) for i, _ in neg_todo]
+    pos_batches = [pos_todo[i:i + POSITIVE_BATCH] for i in range(0, len(pos_todo), POSITIVE_BATCH)]
+    pos_tasks = [(str(model_path), frontend, [str(positive_paths[i]) for i, _ in batch])
+                 for batch in pos_batches]
+
+    if neg_tasks or pos_tasks:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            pos_futures = [pool.submit(positive_probabilities, t) for t in pos_tasks]
+            for (i, key), (probabilities, chunk_seconds) in zip(
+                    neg_todo, pool.map(negative_probabilities, neg_tasks)):
+                negatives[i] = probabilities
+                seconds += chunk_seconds
+                if cache is not None:
+                    cache.store(key, probabilities=probabilities, seconds=chunk_seconds)
+            for batch, future in zip(pos_batches, pos_futures):
+                for (i, key), probabilities in zip(batch, future.result()):
+                    positives[i] = probabilities
+                    if cache is not None:
+                        cache.store(key, probabilities=probabilities)
+    return negatives, seconds / 3600, positives
+
+
+def add_evaluation_arguments(parser):
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    parser.add_argument("--negatives", nargs="+", default=["samples/negative"],
+                        help="negative clips, long recordings, or folders of them")
+    parser.add_argument("--positives", nargs="+", default=["samples/holdout"],
+                        help="held-out positive clips or folders (not used for training)")
+    parser.add_argument("--cutoffs", type=float, nargs="+", default=CUTOFFS)
+    parser.add_argument("--windows", type=int, nargs="+", default=WINDOWS)
+    parser.add_argument("--frontend", choices=["micro", "numpy"], default=None)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="recompute probabilities instead of using the cache")
+    add_jobs_argument(parser, "parallel model processes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FA/hour vs FRR evaluation of the wake word model")
+    add_evaluation_arguments(parser)
+    parser.add_argument("--csv", help="also write the full sweep to this CSV file")
+    parser.add_argument("--target-fa-per-hour", type=float, default=TARGET_FA_PER_HOUR,
+                        help=f"false accepts per hour budget for the recommendation "
+                             f"(default {TARGET_FA_PER_HOUR})")
+    parser.add_argument("--config-out", help="write the recommended config block to this file")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("evaluate_model", args)
+
+    print("📈 HEY ARNIE - Model Evaluation")
+    print("=" * 45)
+
+    negative_paths = expand_recordings(args.negatives)
+    positive_paths = expand_recordings(args.positives)
+    if not positive_paths:
+        print(f"⚠️  No held-out positives in {' '.join(args.positives)} - reporting FA/hour only")
+    print(f"Model: {args.model}")
+    print(f"Negatives: {len(negative_paths)} files, positives: {len(positive_paths)} clips")
+
+    start = time.perf_counter()
+    with span("inference"):
+        negatives, hours, positives = compute_probabilities(
+            args.model, negative_paths, positive_paths, args.jobs, args.frontend,
+            use_cache=not args.no_cache)
+    elapsed = time.perf_counter() - start
+    print(f"⏱️  Inference: {hours:.2f}h of negatives + {len(positives)} positives in "
+          f"{elapsed:.1f}s ({hours * 3600 / max(elapsed, 1e-9):.0f}x real time)")
+
+    start = time.perf_counter()
+    with span("sweep"):
+        rows = sweep(negatives, hours, positives, args.cutoffs, args.windows,
+                     StreamingModel(args.model).stride)
+    print(f"⏱️  Scored {len(rows)} settings in {time.perf_counter() - start:.2f}s")
+
+    print("\nBest trade-offs (no other setting has both fewer FA/hour and lower FRR):")
+    print_table(pareto_rows(rows))
+    if args.csv:
+        write_csv(args.csv, rows)
+        print(f"\n📄 Wrote all {len(rows)} settings to {args.csv}")
+
+    block = config_block(recommend(rows, args.target_fa_per_hour), Path(args.model).name)
+    print(f"\n✅ Recommended (target ≤ {args.target_fa_per_hour} FA/hour):\n")
+    print(block)
+    if args.config_out:
+        Path(args.config_out).write_text(block)
+        print(f"📄 Wrote {args.config_out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Feature Store
+Precomputed spectrogram features for every staged clip, memory-mapped
+
+All features live in one flat float32 file (rows of FEATURE_CHANNELS)
+plus a JSON index mapping each clip's SHA-256 to its row offset and
+frame count. Only clips whose hash isn't in the index are computed
+(in parallel); readers get zero-copy views into the memory map.
+Compaction writes a new data file and then swaps the index over to it,
+so an interrupted run never leaves the index pointing at the wrong rows.
+
+Usage: python scripts/feature_store.py [train_dir] [--jobs N]
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import read_wav, to_16k_mono
+from frontend import FEATURE_CHANNELS, compute_features, default_frontend, frontend_version
+from instrumentation import add_trace_arguments, span, start_trace
+from staging import staged_clips
+
+DATA_NAME = "features.f32"
+INDEX_NAME = "features_index.json"
+DEFAULT_STORE_DIR = Path("microWakeWord/training_data/hey_arnie/features")
+
+
+def clip_features(path, frontend=None):
+    """Read a WAV and compute its features"""
+    samples, rate = read_wav(path)
+    return compute_features(to_16k_mono(samples, rate), frontend)
+
+
+class FeatureStore:
+    """Append-only memory-mapped feature rows keyed by clip hash"""
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR, frontend=None):
+        self.store_dir = Path(store_dir)
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        self.frontend = frontend or default_frontend()
+        self.index_path = self.store_dir / INDEX_NAME
+        self._mmap = None
+        self._load_index()
+
+    @property
+    def data_path(self):
+        return self.store_dir / self.index.get("data", DATA_NAME)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            index = {}
+        if index.get("version") != frontend_version(self.frontend):
+            # Different frontend: every stored feature is stale
+            index = {"version": frontend_version(self.frontend), "rows": 0, "clips": {}}
+        self.index = index
+        # Data files the index doesn't name: an older frontend's, or an
+        # interrupted compaction's
+        for path in self.store_dir.glob(f"{Path(DATA_NAME).stem}*.f32*"):
+            if path.name != self.data_path.name:
+                path.unlink()
+
+    def _save_index(self):
+        tmp = self.index_path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.index, f, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    def __contains__(self, clip_hash):
+        return clip_hash in self.index["clips"]
+
+    def __len__(self):
+        return len(self.index["clips"])
+
+    def memmap(self):
+        """The whole store as a read-only (rows, FEATURE_CHANNELS) array"""
+        if self._mmap is None or len(self._mmap) != self.index["rows"]:
+            if self.index["rows"] == 0:
+                return np.zeros((0, FEATURE_CHANNELS), dtype=np.float32)
+            self._mmap = np.memmap(self.data_path, dtype="<f4", mode="r",
+                                   shape=(self.index["rows"], FEATURE_CHANNELS))
+        return self._mmap
+
+    def get(self, clip_hash):
+        """Zero-copy (frames, FEATURE_CHANNELS) view of one clip's features"""
+        offset, frames = self.index["clips"][clip_hash]
+        return self.memmap()[offset:offset + frames]
+
+    def _append(self, arrays):
+        """Append feature arrays in order, returning their row offsets"""
+        offsets = []
+        rows = self.index["rows"]
+        with open(self.data_path, "r+b" if self.data_path.exists() else "wb") as f:
+            # Drop any rows written after the last saved index (interrupted run)
+            f.truncate(rows * FEATURE_CHANNELS * 4)
+            f.seek(0, os.SEEK_END)
+            for arr in arrays:
+                offsets.append(rows)
+                f.write(np.ascontiguousarray(arr, dtype="<f4").tobytes())
+                rows += len(arr)
+        self.index["rows"] = rows
+        self._mmap = None
+        return offsets
+
+    def update(self, clips, jobs=None):
+        """Make the store hold exactly the given {clip_hash: wav_path} clips.
+        Returns (computed, reused, dropped) counts."""
+        clips = dict(clips)
+        stored = self.index["clips"]
+        missing = [h for h in clips if h not in stored]
+        dropped = [h for h in stored if h not in clips]
+        for h in dropped:
+            del stored[h]
+
+        if missing:
+            paths = [str(clips[h]) for h in missing]
+            with span("compute features", clips=len(paths)):
+                with ProcessPoolExecutor(max_workers=jobs) as pool:
+                    arrays = list(pool.map(clip_features, paths, [self.frontend] * len(paths),
+                                           chunksize=16))
+            for h, offset, arr in zip(missing, self._append(arrays), arrays):
+                stored[h] = [offset, len(arr)]
+
+        live = sum(frames for _, frames in stored.values())
+        if self.index["rows"] > 2 * live:
+            self.compact()
+        self._save_index()
+        return len(missing), len(clips) - len(missing), len(dropped)
+
+    def compact(self):
+        """Rewrite the data file without rows of clips no longer indexed.
+        The rows go to a new data file; saving the index is what switches
+        readers over, and only then is the old file removed."""
+        old, old_path = self.memmap(), self.data_path
+        generation = self.index.get("generation", 0) + 1
+        new_path = self.store_dir / f"{Path(DATA_NAME).stem}.{generation}.f32"
+        tmp = new_path.with_name(new_path.name + ".tmp")
+        clips, rows = {}, 0
+        with open(tmp, "wb") as f:
+            for h, (offset, frames) in sorted(self.index["clips"].items(), key=lambda kv: kv[1][0]):
+                f.write(np.asarray(old[offset:offset + frames]).tobytes())
+                clips[h] = [rows, frames]
+                rows += frames
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, new_path)
+        self._mmap = None
+        del old
+        self.index.update(clips=clips, rows=rows, data=new_path.name, generation=generation)
+        self._save_index()
+        old_path.unlink(missing_ok=True)
+
+
+def build_store(clips, store_dir=DEFAULT_STORE_DIR, jobs=None):
+    """Update the feature store for {clip_hash: wav_path}, with a progress report"""
+    start = time.perf_counter()
+    store = FeatureStore(store_dir)
+    computed, reused, dropped = store.update(clips, jobs)
+    print(f"   🧮 Features ({store.frontend}): {computed} computed, {reused} reused, "
+          f"{dropped} dropped in {time.perf_counter() - start:.2f}s")
+    return store
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute features for staged clips")
+    parser.add_argument("train_dir", nargs="?", default="microWakeWord/training_data/hey_arnie")
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("feature_store", args)
+
+    build_store(staged_clips(args.train_dir), Path(args.train_dir) / "features", args.jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Audio Frontend
+Turns 16kHz audio into the spectrogram features microWakeWord models use
+
+microWakeWord feeds its models 40-channel features from the TFLite Micro
+audio frontend (30ms window, 10ms step, 125-7500Hz, PCAN + log scaling).
+- micro: the real frontend via pymicro_features (pip install pymicro-features)
+- numpy: a log-mel approximation with the same shape and framing, used
+         when pymicro_features isn't installed
+
+Usage: python scripts/frontend.py --verify   # streaming rows == whole-clip rows
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from instrumentation import add_trace_arguments, start_trace
+
+SAMPLE_RATE = 16000
+WINDOW_SAMPLES = 480     # 30ms
+STEP_SAMPLES = 160       # 10ms
+FEATURE_CHANNELS = 40
+LOWER_BAND_HZ = 125
+UPPER_BAND_HZ = 7500
+FFT_SIZE = 512
+
+try:
+    from pymicro_features import MicroFrontend
+except ImportError:
+    MicroFrontend = None
+
+FRONTENDS = ["micro", "numpy"]
+
+
+def default_frontend():
+    return "micro" if MicroFrontend is not None else "numpy"
+
+
+def frontend_version(frontend=None):
+    """Changes whenever features computed by this module would change"""
+    return f"{frontend or default_frontend()}-v1-{FEATURE_CHANNELS}x{STEP_SAMPLES}"
+
+
+def _hz_to_mel(hz):
+    return 1127.0 * np.log1p(hz / 700.0)
+
+
+def _mel_filterbank():
+    """Triangular mel filters, shape (FFT_SIZE // 2 + 1, FEATURE_CHANNELS)"""
+    bins = np.fft.rfftfreq(FFT_SIZE, 1.0 / SAMPLE_RATE)
+    edges = np.linspace(_hz_to_mel(LOWER_BAND_HZ), _hz_to_mel(UPPER_BAND_HZ),
+                        FEATURE_CHANNELS + 2)
+    mel = _hz_to_mel(bins)[:, None]
+    left, center, right = edges[:-2], edges[1:-1], edges[2:]
+    up = (mel - left) / (center - left)
+    down = (right - mel) / (right - center)
+    return np.maximum(0.0, np.minimum(up, down)).astype(np.float32)
+
+
+_FILTERBANK = _mel_filterbank()
+_WINDOW = np.hanning(WINDOW_SAMPLES).astype(np.float32)
+
+
+def numpy_features(samples):
+    """Log-mel features for int16 samples, shape (frames, FEATURE_CHANNELS)"""
+    samples = np.asarray(samples, dtype=np.float32)
+    n_frames = 1 + (len(samples) - WINDOW_SAMPLES) // STEP_SAMPLES
+    if n_frames <= 0:
+        return np.zeros((0, FEATURE_CHANNELS), dtype=np.float32)
+    frames = np.lib.stride_tricks.sliding_window_view(samples, WINDOW_SAMPLES)[::STEP_SAMPLES]
+    spectrum = np.abs(np.fft.rfft(frames[:n_frames] * _WINDOW, FFT_SIZE)) ** 2
+    energy = spectrum @ _FILTERBANK
+    # Roughly matches the 0-26 range of scaled microfrontend output
+    return np.log(energy + 1.0).astype(np.float32)
+
+
+def micro_features(samples, frontend=None):
+    """Features from the TFLite Micro frontend, as microWakeWord computes them"""
+    frontend = frontend or MicroFrontend()
+    audio_bytes = np.asarray(samples, dtype="<i2").tobytes()
+    features = []
+    idx = 0
+    # Strictly less, as microWakeWord does: a final step ending exactly on
+    # the clip's last sample is not processed
+    while idx + STEP_SAMPLES * 2 < len(audio_bytes):
+        result = frontend.ProcessSamples(audio_bytes[idx:idx + STEP_SAMPLES * 2])
+        idx += result.samples_read * 2
+        if result.features:
+            features.append(result.features)
+    if not features:
+        return np.zeros((0, FEATURE_CHANNELS), dtype=np.float32)
+    # pymicro_features already applies microWakeWord's 0.0390625 output scale
+    return np.asarray(features, dtype=np.float32)
+
+
+def compute_features(samples, frontend=None):
+    """Features for a whole clip of 16kHz int16 samples"""
+    frontend = frontend or default_frontend()
+    if frontend == "micro":
+        if MicroFrontend is None:
+            raise RuntimeError("pymicro_features is not installed (pip install pymicro-features)")
+        return micro_features(samples)
+    return numpy_features(samples)
+
+
+class StreamingFrontend:
+    """Computes features incrementally as audio arrives, 10ms at a time
+
+    process() accepts any number of samples and returns the feature rows
+    they complete; leftover samples are carried to the next call. The
+    rows match compute_features() on the concatenated audio.
+    """
+
+    def __init__(self, frontend=None):
+        self.frontend = frontend or default_frontend()
+        self._micro = MicroFrontend() if self.frontend == "micro" else None
+        self._pending = np.zeros(0, dtype=np.int16)
+
+    def process(self, samples):
+        samples = np.concatenate([self._pending, np.asarray(samples, dtype=np.int16)])
+        if self._micro is not None:
+            return self._process_micro(samples)
+
+        if len(samples) < WINDOW_SAMPLES:
+            self._pending = samples
+            return np.zeros((0, FEATURE_CHANNELS), dtype=np.float32)
+        features = numpy_features(samples)
+        # Keep the overlap the next window needs
+        self._pending = samples[len(features) * STEP_SAMPLES:]
+        return features
+
+    def _process_micro(self, samples):
+        audio_bytes = samples.astype("<i2").tobytes()
+        features = []
+        idx = 0
+        # Same bound as micro_features(): a final full step waits for more
+        # audio, so a stream that ends there gives the same rows as the clip
+        while idx + STEP_SAMPLES * 2 < len(audio_bytes):
+            result = self._micro.ProcessSamples(audio_bytes[idx:idx + STEP_SAMPLES * 2])
+            idx += result.samples_read * 2
+            if result.features:
+                features.append(result.features)
+        self._pending = samples[idx // 2:]
+        if not features:
+            return np.zeros((0, FEATURE_CHANNELS), dtype=np.float32)
+        return np.asarray(features, dtype=np.float32)
+
+
+def verify_streaming(frontend, seed=0):
+    """Streaming rows must match compute_features() on the whole clip"""
+    rng = np.random.default_rng(seed)
+    ok = True
+    # Exact step multiples, one sample either side, and odd lengths
+    for length in [WINDOW_SAMPLES, STEP_SAMPLES * 100, STEP_SAMPLES * 100 + 1,
+                   STEP_SAMPLES * 100 - 1, 12345]:
+        samples = (rng.standard_normal(length) * 3000).astype(np.int16)
+        expected = compute_features(samples, frontend)
+        for block_size in [1, 159, 160, 161, 4001, length]:
+            streaming = StreamingFrontend(frontend)
+            rows = [streaming.process(samples[i:i + block_size])
+                    for i in range(0, length, block_size)]
+            found = np.concatenate(rows) if rows else np.zeros((0, FEATURE_CHANNELS))
+            same = found.shape == expected.shape and np.allclose(found, expected, atol=1e-4)
+            if not same:
+                print(f"  {frontend} length {length} block {block_size}: ❌ MISMATCH "
+                      f"({len(found)} rows vs {len(expected)})")
+            ok = ok and same
+    print(f"  {frontend}: {'✅ identical' if ok else '❌ mismatched'}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the audio frontends")
+    parser.add_argument("--verify", action="store_true",
+                        help="check streaming features match whole-clip features")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("frontend", args)
+
+    print(f"🎛️  HEY ARNIE - Audio Frontend ({frontend_version()})")
+    print("=" * 45)
+    if not args.verify:
+        return
+    ok = True
+    for frontend in FRONTENDS:
+        if frontend == "micro" and MicroFrontend is None:
+            print("  micro: skipped (pymicro_features not installed)")
+            continue
+        ok = verify_streaming(frontend) and ok
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,12 +7,23 @@ These include:
 - Similar sounding words
 - Common household phrases
 - Random speech
+
+Run: python generate_negative_samples.py [--jobs N] [--backend auto|say|piper|espeak|standin]
+                                         [--converter numpy|sox] [--tts-mode persistent|per-clip]
+                                         [--no-cache] [--count N] [--seed 0]
+                                         [--plan-out plan.jsonl | --plan plan.jsonl --shard I/N]
 """
 
-import subprocess
-import os
+import argparse
 from pathlib import Path
-import random
+
+from audio_convert import CONVERTERS
+from instrumentation import add_trace_arguments, span, start_trace
+import synth_cache
+from job_planner import PITCHES, add_plan_arguments, plan_jobs as plan_balanced, resolve_jobs
+from synth_engine import add_jobs_argument, register_results, run_jobs, summarize
+from tts_backends import StageTimings, add_backend_argument, get_backend
+from tts_workers import add_tts_mode_argument, job_synthesizer
 
 # Phrases that should NOT trigger "Hey Arnie"
 NEGATIVE_PHRASES = [
@@ -66,58 +77,67 @@ NEGATIVE_PHRASES = [
 MACOS_VOICES = ["Alex", "Daniel", "Samantha", "Karen", "Oliver"]
 RATES = [160, 180, 200]
 
-def get_available_voices():
-    result = subprocess.run(['say', '-v', '?'], capture_output=True, text=True)
-    available = []
-    for line in result.stdout.strip().split('\n'):
-        voice_name = line.split()[0]
-        if voice_name in MACOS_VOICES:
-            available.append(voice_name)
-    return available if available else ["Alex"]
+def get_available_voices(backend):
+    return backend.pick_voices(MACOS_VOICES)
 
-def generate_sample(text, voice, rate, output_path):
-    aiff_path = output_path.replace('.wav', '.aiff')
-    
-    subprocess.run([
-        'say', '-v', voice, '-r', str(rate), '-o', aiff_path, text
-    ], check=True, capture_output=True)
-    
-    subprocess.run([
-        'sox', aiff_path, '-r', '16000', '-c', '1', '-b', '16', output_path
-    ], check=True, capture_output=True)
-    
-    os.remove(aiff_path)
+def sample_filename(index, voice, rate, pitch):
+    return f"negative_{index:04d}.wav"
+
+def plan_jobs(voices, output_dir, count=len(NEGATIVE_PHRASES), pitches=PITCHES, seed=0):
+    """Coverage-balanced (phrase x voice x rate x pitch) jobs; by default
+    every phrase once, spread evenly over voices, rates and pitches"""
+    return plan_balanced(NEGATIVE_PHRASES, voices, RATES, pitches, count,
+                         output_dir, sample_filename, seed)
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate negative (non wake word) samples")
+    add_jobs_argument(parser)
+    parser.add_argument("--converter", choices=CONVERTERS, default="numpy",
+                        help="16kHz conversion backend (default: numpy, in-process)")
+    add_backend_argument(parser)
+    add_tts_mode_argument(parser)
+    synth_cache.add_cache_arguments(parser)
+    add_plan_arguments(parser, default_count=len(NEGATIVE_PHRASES))
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("generate_negative_samples", args)
+
     print("🚫 HEY ARNIE - Negative Sample Generator")
     print("=" * 45)
     
     output_dir = Path("samples/negative")
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    voices = get_available_voices()
-    print(f"✅ Using voices: {', '.join(voices)}")
+    try:
+        backend = get_backend(args.backend)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    voices = get_available_voices(backend)
+    print(f"✅ Using {backend.name} voices: {', '.join(voices)}")
     
-    sample_count = 0
+    pitches = PITCHES if backend.supports_pitch else [0]
+    jobs = resolve_jobs(args, lambda: plan_jobs(voices, output_dir, args.count, pitches,
+                                                args.seed),
+                        output_dir, "negative_*.wav")
+    if jobs is None:
+        return
     
-    print(f"\n🔄 Generating negative samples...")
+    print(f"\n🔄 Generating {len(jobs)} negative samples with {args.jobs} workers...")
     
-    for phrase in NEGATIVE_PHRASES:
-        voice = random.choice(voices)
-        rate = random.choice(RATES)
-        
-        filename = f"negative_{sample_count:04d}.wav"
-        output_path = output_dir / filename
-        
-        try:
-            generate_sample(phrase, voice, rate, str(output_path))
-            sample_count += 1
-            
-            if sample_count % 10 == 0:
-                print(f"  Generated {sample_count} samples...")
-        
-        except Exception as e:
-            print(f"  ⚠️ Failed: {phrase} - {e}")
+    timings = StageTimings()
+    with span("synthesize", clips=len(jobs)):
+        with job_synthesizer(backend, args.converter, min(args.jobs, len(jobs)), args.tts_mode,
+                             timings) as synthesize:
+            synth = synth_cache.cached(synthesize, args, backend.cache_version(args.converter))
+            results = run_jobs(jobs, synth, max_workers=args.jobs, progress_every=10)
+    synth_cache.report(synth)
+    timings.report()
+    with span("register"):
+        register_results(results, "generate_negative_samples", backend.version)
+    sample_count, failed = summarize(results)
+    if failed:
+        print(f"  ⚠️ {failed} samples failed")
     
     print(f"\n✅ Generated {sample_count} negative samples in {output_dir}/")
     print("\n💡 For better training, also add:")
@@ -2,14 +2,24 @@
 """
 Hey Arnie - Synthetic Sample Generator
 Generates TTS samples for wake word training using macOS voices
+(or espeak-ng/piper on Linux, see tts_backends.py)
 
-Run: python generate_samples.py
+Run: python generate_samples.py [--jobs N] [--backend auto|say|piper|espeak|standin]
+                                [--converter numpy|sox] [--tts-mode persistent|per-clip]
+                                [--no-cache] [--count 200] [--seed 0]
+                                [--plan-out plan.jsonl | --plan plan.jsonl --shard I/N]
 """
 
-import subprocess
-import os
+import argparse
 from pathlib import Path
-import random
+
+from audio_convert import CONVERTERS
+from instrumentation import add_trace_arguments, span, start_trace
+import synth_cache
+from job_planner import PITCHES, add_plan_arguments, plan_jobs as plan_balanced, resolve_jobs
+from synth_engine import add_jobs_argument, register_results, run_jobs, summarize
+from tts_backends import StageTimings, add_backend_argument, get_backend
+from tts_workers import add_tts_mode_argument, job_synthesizer
 
 # Wake word variations
 WAKE_WORDS = [
@@ -39,90 +49,69 @@ MACOS_VOICES = [
 # Rate variations (words per minute)
 RATES = [140, 160, 180, 200, 220]
 
-def get_available_voices():
-    """Get list of voices actually installed on this Mac"""
-    result = subprocess.run(['say', '-v', '?'], capture_output=True, text=True)
-    available = []
-    for line in result.stdout.strip().split('\n'):
-        voice_name = line.split()[0]
-        if voice_name in MACOS_VOICES:
-            available.append(voice_name)
-    
+def get_available_voices(backend):
+    """Get list of voices actually installed for this backend"""
     # If none of our preferred voices, use whatever's available
-    if not available:
-        for line in result.stdout.strip().split('\n'):
-            available.append(line.split()[0])
-    
-    return available[:10]  # Max 10 voices
+    return backend.pick_voices(MACOS_VOICES, limit=10)  # Max 10 voices
 
-def generate_sample(text, voice, rate, output_path):
-    """Generate a single audio sample using macOS say command"""
-    # Generate AIFF first (native format)
-    aiff_path = output_path.replace('.wav', '.aiff')
-    
-    cmd = [
-        'say',
-        '-v', voice,
-        '-r', str(rate),
-        '-o', aiff_path,
-        text
-    ]
-    
-    subprocess.run(cmd, check=True, capture_output=True)
-    
-    # Convert to WAV (16kHz mono - required for microWakeWord)
-    subprocess.run([
-        'sox', aiff_path, 
-        '-r', '16000',  # 16kHz sample rate
-        '-c', '1',       # Mono
-        '-b', '16',      # 16-bit
-        output_path
-    ], check=True, capture_output=True)
-    
-    # Clean up AIFF
-    os.remove(aiff_path)
-    
-    return output_path
+def sample_filename(index, voice, rate, pitch):
+    pitch_tag = f"_p{pitch:+d}" if pitch else ""
+    return f"synthetic_{index:04d}_{voice}_{rate}{pitch_tag}.wav"
+
+def plan_jobs(voices, output_dir, target_samples, pitches=PITCHES, seed=0):
+    """Pick a coverage-balanced set of (wake word x voice x rate x pitch) jobs"""
+    return plan_balanced(WAKE_WORDS, voices, RATES, pitches, target_samples,
+                         output_dir, sample_filename, seed)
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic 'Hey Arnie' samples")
+    add_jobs_argument(parser)
+    parser.add_argument("--converter", choices=CONVERTERS, default="numpy",
+                        help="16kHz conversion backend (default: numpy, in-process)")
+    add_backend_argument(parser)
+    add_tts_mode_argument(parser)
+    synth_cache.add_cache_arguments(parser)
+    add_plan_arguments(parser, default_count=200)  # Generate 200 synthetic samples
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("generate_samples", args)
+
     print("🎤 HEY ARNIE - Synthetic Sample Generator")
     print("=" * 45)
     
     output_dir = Path("samples/positive")
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    voices = get_available_voices()
-    print(f"✅ Found {len(voices)} voices: {', '.join(voices)}")
+    try:
+        backend = get_backend(args.backend)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    voices = get_available_voices(backend)
+    print(f"✅ Found {len(voices)} {backend.name} voices: {', '.join(voices)}")
     
-    sample_count = 0
-    target_samples = 200  # Generate 200 synthetic samples
+    pitches = PITCHES if backend.supports_pitch else [0]
+    jobs = resolve_jobs(args, lambda: plan_jobs(voices, output_dir, args.count, pitches,
+                                                args.seed) if voices else [],
+                        output_dir, "synthetic_*.wav")
+    if jobs is None:
+        return
     
-    print(f"\n🔄 Generating {target_samples} samples...")
+    print(f"\n🔄 Generating {len(jobs)} samples with {args.jobs} workers...")
     
-    while sample_count < target_samples:
-        for wake_word in WAKE_WORDS:
-            for voice in voices:
-                for rate in RATES:
-                    if sample_count >= target_samples:
-                        break
-                    
-                    filename = f"synthetic_{sample_count:04d}_{voice}_{rate}.wav"
-                    output_path = output_dir / filename
-                    
-                    try:
-                        generate_sample(wake_word, voice, rate, str(output_path))
-                        sample_count += 1
-                        
-                        if sample_count % 20 == 0:
-                            print(f"  Generated {sample_count}/{target_samples} samples...")
-                    
-                    except Exception as e:
-                        print(f"  ⚠️ Failed: {voice} @ {rate}wpm - {e}")
-                
-                if sample_count >= target_samples:
-                    break
-            if sample_count >= target_samples:
-                break
+    timings = StageTimings()
+    with span("synthesize", clips=len(jobs)):
+        with job_synthesizer(backend, args.converter, min(args.jobs, len(jobs)), args.tts_mode,
+                             timings) as synthesize:
+            synth = synth_cache.cached(synthesize, args, backend.cache_version(args.converter))
+            results = run_jobs(jobs, synth, max_workers=args.jobs)
+    synth_cache.report(synth)
+    timings.report()
+    with span("register"):
+        register_results(results, "generate_samples", backend.version)
+    sample_count, failed = summarize(results)
+    if failed:
+        print(f"  ⚠️ {failed} samples failed")
     
     print(f"\n✅ Generated {sample_count} synthetic samples in {output_dir}/")
     print("\n💪 Next: Record real samples with your iPhone!")
@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Instrumentation
+Where the time, CPU, memory, subprocesses and disk writes of a run go
+
+Every script calls start_trace() from main(). Tracing is off unless
+the script is run with --trace [FILE] (or --profile), or HEY_ARNIE_TRACE
+is set to a report path. When off, span() returns a shared no-op context
+and costs one attribute check.
+
+When on, every span records:
+- wall time
+- process CPU time, the current thread's CPU time, and the CPU time of
+  reaped child processes (say, sox, ffmpeg, ...)
+- peak RSS of the process and of its largest child
+- subprocesses started
+- bytes written (Linux /proc/self/io; not available on macOS)
+Spans are written as trace events, one JSON line each, to a run
+folder named in the environment. Worker processes, persistent TTS
+workers and scripts started by pipeline.py all append to the same run.
+At exit the top-level script merges them into one Chrome trace-event
+JSON report (open it in https://ui.perfetto.dev or chrome://tracing)
+with a per-span summary added.
+
+--profile also runs a sampling profiler over the hot loops wrapped in
+sampled(): the stacks of those threads are counted every 5ms and
+written next to the report as FILE.folded (flamegraph.pl / speedscope).
+
+Usage: python scripts/generate_samples.py --trace                # .cache/traces/<script>-<time>.json
+       python scripts/pipeline.py --trace run.json --profile
+       python scripts/instrumentation.py summary run.json
+       python scripts/instrumentation.py compare baseline.json run.json [--tolerance 0.2]
+       python scripts/instrumentation.py overhead
+"""
+
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import process as mp_process
+from pathlib import Path
+
+TRACE_DIR = Path(".cache/traces")
+ENV_REPORT = "HEY_ARNIE_TRACE"          # Set by you: trace this script to this report
+ENV_RUN = "HEY_ARNIE_TRACE_DIR"         # Set by the top-level script for everything it starts
+ENV_PROFILE = "HEY_ARNIE_PROFILE"
+PROFILE_INTERVAL = 0.005                # Seconds between profiler samples
+PROFILE_DEPTH = 48                      # Innermost frames kept per sample
+PROFILE_TOP = 200                       # Stacks per profiled loop kept in the JSON report
+MIN_REGRESSION_SECONDS = 0.05           # Ignore smaller changes when comparing runs
+MIN_REGRESSION_MB = 10
+MAXRSS_BYTES = 1 if sys.platform == "darwin" else 1024  # ru_maxrss units
+
+_NULL = contextlib.nullcontext()
+
+
+class _Tracer:
+    """Per-process tracing state"""
+
+    def __init__(self):
+        self.run_dir = os.environ.get(ENV_RUN)
+        self.profile = ENV_PROFILE in os.environ
+        self.subprocesses = 0
+        self.pid = None
+        self.fd = None
+        self.io_fd = None
+        self.sampler = None
+        self.lock = threading.Lock()
+
+    def reopen(self):
+        """Per-process files (again, after a fork)"""
+        self.pid = os.getpid()
+        self.fd = os.open(os.path.join(self.run_dir, f"{self.pid}.jsonl"),
+                          os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            self.io_fd = os.open("/proc/self/io", os.O_RDONLY)
+        except OSError:
+            self.io_fd = None
+        self.sampler = None
+        name = Path(sys.argv[0]).stem or "python"
+        self.write({"ph": "M", "name": "process_name", "pid": self.pid, "tid": 0,
+                    "args": {"name": f"{name} ({self.pid})"}})
+
+    def write(self, record):
+        """Append one record (a single write, so lines from different processes never mix)"""
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.reopen()
+        os.write(self.fd, (json.dumps(record, separators=(",", ":")) + "\n").encode())
+
+    def written(self):
+        """Bytes this process (and its reaped children) passed to write(), or None"""
+        if self.pid != os.getpid():
+            with self.lock:
+                if self.pid != os.getpid():
+                    self.reopen()
+        if self.io_fd is None:
+            return None
+        for line in os.pread(self.io_fd, 512, 0).split(b"\n"):
+            if line.startswith(b"wchar:"):
+                return int(line.split()[1])
+        return None
+
+
+_tracer = _Tracer()
+
+
+def _counting(start):
+    """Wrap a process-starting method so each call counts as a subprocess"""
+    def counted(self, *args, **kwargs):
+        _tracer.subprocesses += 1
+        return start(self, *args, **kwargs)
+    counted.counts_subprocesses = True
+    return counted
+
+
+def _install_hooks():
+    if not getattr(subprocess.Popen.__init__, "counts_subprocesses", False):
+        subprocess.Popen.__init__ = _counting(subprocess.Popen.__init__)
+        mp_process.BaseProcess.start = _counting(mp_process.BaseProcess.start)
+
+
+if _tracer.run_dir is not None:
+    _install_hooks()  # A worker or script started by a traced run
+
+
+def _snapshot():
+    times = os.times()
+    return (time.perf_counter(), times.user + times.system,
+            times.children_user + times.children_system, time.thread_time(),
+            _tracer.subprocesses, _tracer.written())
+
+
+class _Span:
+    def __init__(self, name, cat, args):
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.ts = time.time()
+        self.start = _snapshot()
+        return self
+
+    def __exit__(self, *exc):
+        end = _snapshot()
+        wall, cpu, child_cpu, thread_cpu, subprocesses, written = (
+            None if b is None or a is None else b - a for a, b in zip(self.start, end))
+        args = dict(self.args, cpu=round(cpu, 6), thread_cpu=round(thread_cpu, 6),
+                    child_cpu=round(child_cpu, 6), subprocesses=subprocesses,
+                    peak_rss_mb=round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                                      * MAXRSS_BYTES / 1e6, 1),
+                    child_peak_rss_mb=round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+                                            * MAXRSS_BYTES / 1e6, 1))
+        if written is not None:
+            args["bytes_written"] = written
+        if exc[0] is not None:
+            args["error"] = exc[0].__name__
+        _tracer.write({"ph": "X", "name": self.name, "cat": self.cat,
+                       "ts": round(self.ts * 1e6), "dur": round(wall * 1e6),
+                       "pid": os.getpid(), "tid": threading.get_ident(), "args": args})
+        return False
+
+
+def span(name, cat="stage", **args):
+    """Time a block: a stage of a script (cat="stage") or one item of a loop (cat="item").
+    Extra keyword arguments are stored with the event."""
+    if _tracer.run_dir is None:
+        return _NULL
+    return _Span(name, cat, args)
+
+
+class _Sampler(threading.Thread):
+    """Counts the stacks of registered threads every PROFILE_INTERVAL"""
+
+    def __init__(self):
+        super().__init__(daemon=True, name="instrumentation-sampler")
+        self.watched = {}  # thread id -> (name, {stack: count})
+        self.lock = threading.Lock()
+
+    def run(self):
+        while True:
+            time.sleep(PROFILE_INTERVAL)
+            frames = sys._current_frames()
+            with self.lock:
+                for tid, (_, counts) in self.watched.items():
+                    frame = frames.get(tid)
+                    stack = []
+                    while frame is not None and len(stack) < PROFILE_DEPTH:
+                        code = frame.f_code
+                        stack.append(f"{Path(code.co_filename).stem}.{code.co_name}:{frame.f_lineno}")
+                        frame = frame.f_back
+                    if stack:
+                        key = ";".join(reversed(stack))
+                        counts[key] = counts.get(key, 0) + 1
+
+
+class _Sampled:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        with _tracer.lock:
+            if _tracer.sampler is None or not _tracer.sampler.is_alive():
+                _tracer.sampler = _Sampler()
+                _tracer.sampler.start()
+        self.sampler = _tracer.sampler
+        with self.sampler.lock:
+            self.sampler.watched[threading.get_ident()] = (self.name, {})
+        return self
+
+    def __exit__(self, *exc):
+        with self.sampler.lock:
+            _, counts = self.sampler.watched.pop(threading.get_ident())
+        if counts:
+            _tracer.write({"ph": "P", "name": self.name, "pid": os.getpid(), "stacks": counts})
+        return False
+
+
+def sampled(name):
+    """Profile a hot loop with the sampling profiler (only with --profile)"""
+    if _tracer.run_dir is None or not _tracer.profile:
+        return _NULL
+    return _Sampled(name)
+
+
+def add_trace_arguments(parser):
+    """Add the shared --trace / --profile options to an argparse parser"""
+    parser.add_argument("--trace", nargs="?", const="", metavar="REPORT",
+                        help=f"write a timing/resource report (default {TRACE_DIR}/<script>-<time>.json)")
+    parser.add_argument("--profile", action="store_true",
+                        help="with --trace: also sample the stacks of the hot loops")
+
+
+def start_trace(script, args=None):
+    """Trace this script if asked to. Call once from main(), after parsing arguments."""
+    report = getattr(args, "trace", None)
+    profile = getattr(args, "profile", False)
+    if report is None:
+        report = os.environ.get(ENV_REPORT)
+    if report is None and profile:
+        report = ""
+    if _tracer.run_dir is None and report is None:
+        return
+    _install_hooks()
+    root = _tracer.run_dir is None
+    if root:
+        if not report:
+            report = TRACE_DIR / f"{script}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        report = os.path.abspath(report)  # Scripts may chdir (train_model.py does)
+        TRACE_DIR.mkdir(parents=True, exist_ok=True)
+        _tracer.run_dir = tempfile.mkdtemp(prefix=f"{script}-", dir=TRACE_DIR.resolve())
+        os.environ[ENV_RUN] = _tracer.run_dir
+        if profile:
+            _tracer.profile = True
+            os.environ[ENV_PROFILE] = "1"
+    whole = span(script, cat="run", argv=sys.argv[1:])
+    whole.__enter__()
+
+    def finish():
+        whole.__exit__(None, None, None)
+        if root:
+            path = write_report(_tracer.run_dir, report, script)
+            shutil.rmtree(_tracer.run_dir, ignore_errors=True)
+            print(f"📈 Trace written to {path}")
+    atexit.register(finish)
+
+
+def summarize(events):
+    """Totals per span name over complete events"""
+    groups = {}
+    for event in events:
+        if event.get("ph") == "X":
+            groups.setdefault(event["name"], []).append(event)
+    summary = {}
+    for name, group in groups.items():
+        walls = sorted(e["dur"] / 1e6 for e in group)
+        args = [e["args"] for e in group]
+        written = [a["bytes_written"] for a in args if "bytes_written" in a]
+        summary[name] = {
+            "cat": group[0].get("cat"),
+            "count": len(group),
+            "wall_s": round(sum(walls), 4),
+            "wall_mean_ms": round(sum(walls) / len(walls) * 1000, 3),
+            "wall_p95_ms": round(walls[min(len(walls) - 1, int(len(walls) * 0.95))] * 1000, 3),
+            "cpu_s": round(sum(a["cpu"] for a in args), 4),
+            "thread_cpu_s": round(sum(a["thread_cpu"] for a in args), 4),
+            "child_cpu_s": round(sum(a["child_cpu"] for a in args), 4),
+            "subprocesses": sum(a["subprocesses"] for a in args),
+            "bytes_written": sum(written) if written else None,
+            "peak_rss_mb": max(a["peak_rss_mb"] for a in args),
+            "child_peak_rss_mb": max(a["child_peak_rss_mb"] for a in args),
+            "errors": sum("error" in a for a in args),
+        }
+    return summary
+
+
+def write_report(run_dir, report, script):
+    """Merge a run's per-process event files into one trace-event report (and .folded profile)"""
+    events, profiles = [], {}
+    for path in sorted(Path(run_dir).glob("*.jsonl")):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line of a process that was killed mid-write
+                if record["ph"] == "P":
+                    counts = profiles.setdefault(record["name"], {})
+                    for stack, n in record["stacks"].items():
+                        counts[stack] = counts.get(stack, 0) + n
+                else:
+                    events.append(record)
+    events.sort(key=lambda e: e.get("ts", 0))
+    report = Path(report)
+    report.parent.mkdir(parents=True, exist_ok=True)
+    data = {"traceEvents": events, "displayTimeUnit": "ms",
+            "metadata": {"script": script, "argv": sys.argv[1:], "python": sys.version.split()[0],
+                         "platform": sys.platform, "cpus": os.cpu_count(),
+                         "finished": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "summary": summarize(events)}
+    if profiles:
+        data["profile"] = {name: dict(sorted(counts.items(), key=lambda kv: -kv[1])[:PROFILE_TOP])
+                           for name, counts in profiles.items()}
+        with open(f"{report}.folded", "w") as f:
+            for name, counts in profiles.items():
+                for stack, n in counts.items():
+                    f.write(f"{name};{stack} {n}\n")
+    tmp = report.with_name(report.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, report)
+    return report
+
+
+def load_summary(path):
+    with open(path) as f:
+        return json.load(f)["summary"]
+
+
+def print_summary(summary, limit=None):
+    rows = sorted(summary.items(), key=lambda kv: -kv[1]["wall_s"])[:limit]
+    print(f"{'span':32} {'count':>6} {'wall':>9} {'mean':>9} {'cpu':>8} {'child':>8} "
+          f"{'procs':>6} {'written':>9} {'rss':>7}")
+    for name, s in rows:
+        written = f"{s['bytes_written'] / 1e6:8.1f}M" if s["bytes_written"] is not None else f"{'n/a':>9}"
+        print(f"{name[:32]:32} {s['count']:6d} {s['wall_s']:8.2f}s {s['wall_mean_ms']:7.1f}ms "
+              f"{s['cpu_s']:7.2f}s {s['child_cpu_s']:7.2f}s {s['subprocesses']:6d} {written} "
+              f"{s['peak_rss_mb']:5.0f}MB")
+
+
+def compare(base, new, tolerance):
+    """Print how each span changed. Returns the regressions (more than tolerance slower/larger)."""
+    regressions = []
+    print(f"{'span':32} {'wall':>18} {'cpu':>18} {'peak rss':>18}")
+    for name in sorted(base.keys() | new.keys(), key=lambda n: -(new.get(n) or base[n])["wall_s"]):
+        if name not in base or name not in new:
+            print(f"{name[:32]:32} {'only in ' + ('new' if name in new else 'baseline'):>18}")
+            continue
+        cells = []
+        for key, unit, floor in (("wall_s", "s", MIN_REGRESSION_SECONDS),
+                                 ("cpu_s", "s", MIN_REGRESSION_SECONDS),
+                                 ("peak_rss_mb", "MB", MIN_REGRESSION_MB)):
+            a, b = base[name][key], new[name][key]
+            change = (b - a) / a if a else 0.0
+            cells.append(f"{b:7.2f}{unit} {change:+6.0%}")
+            if b - a > floor and change > tolerance:
+                regressions.append((name, key, a, b))
+        print(f"{name[:32]:32} " + " ".join(f"{c:>18}" for c in cells))
+    return regressions
+
+
+def measure_overhead(spans=20000):
+    """Seconds per span with tracing off and on"""
+    global _tracer
+    saved = _tracer
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for run_dir in (None, tmp):
+            _tracer = _Tracer()
+            _tracer.run_dir = run_dir
+            start = time.perf_counter()
+            for i in range(spans):
+                with span("overhead", cat="item", i=i):
+                    pass
+            results.append((time.perf_counter() - start) / spans)
+    _tracer = saved
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize and compare run reports")
+    sub = parser.add_subparsers(dest="command", required=True)
+    summary = sub.add_parser("summary", help="per-span totals of a report")
+    summary.add_argument("report")
+    summary.add_argument("--top", type=int, default=None, help="only the N slowest spans")
+    comparison = sub.add_parser("compare", help="compare a run with a baseline; exit 1 on regressions")
+    comparison.add_argument("baseline")
+    comparison.add_argument("report")
+    comparison.add_argument("--tolerance", type=float, default=0.2,
+                            help="allowed fractional increase (default 0.2 = 20%%)")
+    sub.add_parser("overhead", help="measure the cost of one span")
+    args = parser.parse_args()
+
+    print("📈 HEY ARNIE - Instrumentation")
+    print("=" * 45)
+
+    if args.command == "summary":
+        print_summary(load_summary(args.report), args.top)
+    elif args.command == "compare":
+        regressions = compare(load_summary(args.baseline), load_summary(args.report), args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regressions over {args.tolerance:.0%}:")
+            for name, key, a, b in regressions:
+                print(f"   {name}: {key} {a:.2f} -> {b:.2f}")
+            sys.exit(1)
+        print(f"\n✅ No regressions over {args.tolerance:.0%}")
+    else:
+        off, on = measure_overhead()
+        print(f"Per span: {off * 1e6:.2f}µs with tracing off, {on * 1e6:.1f}µs with tracing on")
+
+
+if __name__ == "__main__":
+    main()
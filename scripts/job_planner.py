@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Synthesis Job Planner
+Picks which (phrase, voice, rate, pitch) combinations to synthesize
+
+The full space is enumerated once and deduplicated (listing a phrase
+twice doubles its weight rather than synthesizing the same audio
+twice). A subset of any size is then picked greedily. Each pick is the
+combination that keeps every factor, and every pair of factors, closest
+to its weighted share. Any budget therefore spreads evenly over voices,
+rates and pitches instead of exhausting the first few. Ties are broken
+by a seeded hash of each combination, so the same seed gives the same
+plan, and adding a phrase, voice or rate leaves the tie order of every
+other combination (and so most picks, and their synthesis cache hits)
+unchanged.
+
+Plans are JSONL job lists with fixed indexes and output paths. They can
+be written once and split with --shard I/N across workers or machines;
+each shard is balanced on its own. Clips in the output folder that the
+plan no longer names (e.g. after lowering --count) are deleted.
+
+Usage: python scripts/generate_samples.py --count 1000 --plan-out plan.jsonl
+       python scripts/generate_samples.py --plan plan.jsonl --shard 2/4
+       python scripts/job_planner.py plan.jsonl [--shard 2/4]   # coverage report
+"""
+
+import argparse
+import hashlib
+import json
+from collections import Counter
+from itertools import combinations
+from pathlib import Path
+
+import numpy as np
+
+from dataset_index import DatasetIndex
+from instrumentation import add_trace_arguments, start_trace
+from synth_engine import SynthJob
+
+# Pitch offsets in semitones (0 = the voice's own pitch)
+PITCHES = [-2, 0, 2]
+FACTORS = ["text", "voice", "rate", "pitch"]
+
+
+def enumerate_space(phrases, voices, rates, pitches=(0,)):
+    """Unique (phrase, voice, rate, pitch) combinations, and each phrase's weight
+    (how often it is listed)"""
+    weights = Counter(phrases)
+    space = [(phrase, voice, rate, pitch)
+             for phrase in weights
+             for voice in dict.fromkeys(voices)
+             for rate in dict.fromkeys(rates)
+             for pitch in dict.fromkeys(pitches)]
+    return space, weights
+
+
+def tie_break_key(seed, combination):
+    """Seeded order of one combination, independent of the rest of the space"""
+    return hashlib.sha256(json.dumps([seed, *combination]).encode()).digest()
+
+
+def balanced_subset(space, count, phrase_weights=None, seed=0):
+    """Greedily pick 'count' distinct combinations with balanced coverage
+
+    Cost of a candidate = sum over every factor and factor pair of
+    (times its value(s) were already picked + 1) / weight. The cheapest
+    candidate is taken each round, so shares stay proportional to the
+    weights (equal, except phrases listed more than once).
+    """
+    count = min(count, len(space))
+    space = sorted(space, key=lambda c: tie_break_key(seed, c))
+    phrase_weights = phrase_weights or {}
+
+    # Integer code of every factor value per candidate
+    codes, weights = [], []
+    for f in range(len(FACTORS)):
+        values = list(dict.fromkeys(c[f] for c in space))
+        lookup = {v: i for i, v in enumerate(values)}
+        codes.append(np.array([lookup[c[f]] for c in space]))
+        w = [float(phrase_weights.get(v, 1)) if f == 0 else 1.0 for v in values]
+        weights.append(np.array(w))
+
+    groups = [(f,) for f in range(len(FACTORS))] + list(combinations(range(len(FACTORS)), 2))
+    tables = []
+    for group in groups:
+        if len(group) == 1:
+            f, = group
+            index, weight, size = codes[f], weights[f][codes[f]], len(weights[f])
+        else:
+            a, b = group
+            index = codes[a] * len(weights[b]) + codes[b]
+            weight = weights[a][codes[a]] * weights[b][codes[b]]
+            size = len(weights[a]) * len(weights[b])
+        tables.append((index, 1.0 / weight, np.zeros(size)))
+
+    available = np.ones(len(space), dtype=bool)
+    chosen = []
+    for _ in range(count):
+        cost = np.zeros(len(space))
+        for index, inverse_weight, counts in tables:
+            cost += (counts[index] + 1) * inverse_weight
+        cost[~available] = np.inf
+        pick = int(np.argmin(cost))  # First minimum = seeded tie-break
+        available[pick] = False
+        chosen.append(space[pick])
+        for index, _, counts in tables:
+            counts[index[pick]] += 1
+    return chosen
+
+
+def plan_jobs(phrases, voices, rates, pitches, count, output_dir, filename, seed=0):
+    """A balanced SynthJob list. filename(index, voice, rate, pitch) names each clip."""
+    space, weights = enumerate_space(phrases, voices, rates, pitches)
+    picks = balanced_subset(space, count, weights, seed)
+    return [SynthJob(index, phrase, voice, rate,
+                     str(output_dir / filename(index, voice, rate, pitch)), pitch)
+            for index, (phrase, voice, rate, pitch) in enumerate(picks)]
+
+
+def write_plan(path, jobs):
+    with open(path, "w") as f:
+        for job in jobs:
+            f.write(json.dumps(job._asdict()) + "\n")
+
+
+def read_plan(path):
+    with open(path) as f:
+        return [SynthJob(**json.loads(line)) for line in f if line.strip()]
+
+
+def parse_shard(spec):
+    """'I/N' (1-based) -> (I, N)"""
+    try:
+        part, total = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"shard must look like 2/4, not {spec!r}") from None
+    if not 1 <= part <= total:
+        raise argparse.ArgumentTypeError(f"shard {part} is not in 1..{total}")
+    return part, total
+
+
+def shard(jobs, spec):
+    """This shard's jobs. Jobs are dealt out in plan order to the shard
+    that has seen their factor values least (among the shards no more than
+    one job ahead), so each shard is itself balanced. The deal depends only
+    on the plan, so every machine computes the same split."""
+    if spec is None:
+        return list(jobs)
+    part, total = spec
+    sizes = [0] * total
+    seen = [Counter() for _ in range(total)]
+    mine = []
+    for job in sorted(jobs, key=lambda j: j.index):
+        values = [(factor, getattr(job, factor)) for factor in FACTORS]
+        smallest = min(sizes)
+        target = min((s for s in range(total) if sizes[s] <= smallest + 1),
+                     key=lambda s: (sum(seen[s][v] for v in values), sizes[s], s))
+        sizes[target] += 1
+        seen[target].update(values)
+        if target == part - 1:
+            mine.append(job)
+    return mine
+
+
+def add_plan_arguments(parser, default_count):
+    """Add the shared planning options to an argparse parser"""
+    parser.add_argument("--count", type=int, default=default_count,
+                        help=f"clips to plan (default: {default_count})")
+    parser.add_argument("--seed", type=int, default=0, help="tie-break seed for the plan")
+    parser.add_argument("--plan", help="synthesize this JSONL plan instead of planning")
+    parser.add_argument("--plan-out", help="write the plan to this JSONL file and exit")
+    parser.add_argument("--shard", type=parse_shard, default=None,
+                        help="only synthesize shard I of N (e.g. 2/4)")
+
+
+def remove_unplanned(jobs, output_dir, pattern):
+    """Delete (and unindex) clips matching pattern in output_dir that the
+    plan doesn't name, e.g. left over from a larger --count. Returns how
+    many were removed."""
+    planned = {Path(job.output_path).resolve() for job in jobs}
+    stale = [p for p in Path(output_dir).glob(pattern)
+             if not p.name.endswith(".tts.wav") and p.resolve() not in planned]
+    for path in stale:
+        path.unlink(missing_ok=True)
+    if stale:
+        with DatasetIndex() as index:
+            index.remove(stale)
+        print(f"🧹 Removed {len(stale)} clips no longer in the plan")
+    return len(stale)
+
+
+def resolve_jobs(args, make_plan, output_dir=None, pattern=None):
+    """The jobs this run should synthesize, or None when only writing a plan.
+    With output_dir and pattern, clips there that the whole plan (not just
+    this shard) doesn't name are removed first."""
+    jobs = read_plan(args.plan) if args.plan else make_plan()
+    if args.plan_out:
+        write_plan(args.plan_out, jobs)
+        print(f"📄 Wrote {len(jobs)} planned jobs to {args.plan_out}")
+        coverage_report(jobs)
+        return None
+    if output_dir is not None and jobs:
+        remove_unplanned(jobs, output_dir, pattern)
+    return shard(jobs, args.shard)
+
+
+def coverage_report(jobs):
+    """Print how evenly the jobs cover each factor"""
+    for factor in FACTORS:
+        counts = Counter(getattr(job, factor) for job in jobs)
+        if not counts:
+            continue
+        print(f"   {factor:6s} {len(counts):3d} values, "
+              f"{min(counts.values())}-{max(counts.values())} clips each")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the coverage of a synthesis plan")
+    parser.add_argument("plan")
+    parser.add_argument("--shard", type=parse_shard, default=None)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("job_planner", args)
+
+    jobs = shard(read_plan(args.plan), args.shard)
+    print(f"📋 {len(jobs)} jobs in {args.plan}")
+    coverage_report(jobs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Dataset Lint
+Finds near-duplicate clips and bad takes across the whole dataset
+
+Every clip is read once (in parallel batches) and checked for:
+- format:   not 16kHz / mono / 16-bit, or unreadable
+- silence:  peak below -40 dBFS
+- clipping: more than 0.1% of samples at full scale
+- dc:       mean offset above 2% of full scale
+It also gets a compact spectral fingerprint. This is a log-mel
+spectrogram with quiet edges trimmed, resampled to 32 frames x 20 bands,
+mean-subtracted and L2-normalised. Near-duplicates
+(cosine similarity >= --threshold, similar duration) are found with
+random-hyperplane LSH. Clips are only compared when they share a bucket
+in at least one band, so the cost grows roughly linearly with the
+dataset instead of comparing every pair. Buckets too large to compare
+pairwise (many copies of one clip, or degenerate fingerprints) are
+split by exact fingerprint instead, so big groups of identical clips
+are still reported.
+
+Augmented (aug_*) clips are checked but left out of duplicate search,
+since they are variants of their source by design.
+
+--verify also runs the exact all-pairs comparison on a sample of up to
+3000 clips and reports how many of its duplicate pairs LSH found.
+
+Usage: python scripts/lint_dataset.py                  # every clip in the dataset index
+       python scripts/lint_dataset.py samples/positive --threshold 0.97 --json lint.json
+       python scripts/lint_dataset.py --verify --strict
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, read_wav
+from augment_samples import AUG_PREFIX
+from dataset_index import DatasetIndex, DEFAULT_INDEX
+from frontend import numpy_features
+from instrumentation import add_trace_arguments, span, start_trace
+from synth_engine import add_jobs_argument
+
+FINGERPRINT_FRAMES = 32
+FINGERPRINT_BANDS = 20
+TRIM_DB = 30.0                  # Dynamic range kept: quieter edges are trimmed, quieter bins floored
+
+SILENCE_PEAK = 0.01             # -40 dBFS
+CLIP_LEVEL = 32767 / 32768.0
+CLIP_FRACTION = 0.001
+DC_OFFSET = 0.02
+
+DUPLICATE_THRESHOLD = 0.95
+MAX_DURATION_RATIO = 1.25       # Near-duplicates must have similar lengths
+LSH_BANDS = 24
+LSH_BITS = 18
+MAX_BUCKET = 256                # Larger buckets are only searched for exact fingerprint matches
+BATCH_SIZE = 256
+PAIR_CHUNK = 65536               # Candidate pairs compared per step (bounds memory)
+VERIFY_SAMPLE = 3000            # Clips in the exact all-pairs check
+
+
+def fingerprint(samples):
+    """Fixed-size spectral fingerprint of float samples in [-1, 1] at 16kHz"""
+    features = numpy_features(samples * 32768.0)
+    if len(features) < 2:
+        return np.zeros(FINGERPRINT_FRAMES * FINGERPRINT_BANDS, dtype=np.float32)
+    # Trim quiet frames at both ends so leading/trailing silence doesn't matter,
+    # and floor the rest so background hiss doesn't either
+    energy = features.max(axis=1)
+    loud = np.flatnonzero(energy >= energy.max() - TRIM_DB / 10 * np.log(10))
+    features = features[loud[0]:loud[-1] + 1]
+    features = np.maximum(features, features.max() - TRIM_DB / 10 * np.log(10))
+    # Pool 40 channels into 20 bands, then resample time to a fixed length
+    bands = features.reshape(len(features), FINGERPRINT_BANDS, -1).mean(axis=2)
+    t = np.linspace(0, len(bands) - 1, FINGERPRINT_FRAMES)
+    i0 = np.floor(t).astype(int)
+    i1 = np.minimum(i0 + 1, len(bands) - 1)
+    frac = (t - i0)[:, None]
+    fixed = bands[i0] * (1 - frac) + bands[i1] * frac
+    return (fixed - fixed.mean()).ravel().astype(np.float32)  # Log domain: gain-invariant
+
+
+def lint_clip(path):
+    """Read one clip and return (problems, duration, fingerprint)"""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        with wave.open(io.BytesIO(data)) as w:
+            rate, channels, width = w.getframerate(), w.getnchannels(), w.getsampwidth()
+        samples, _ = read_wav(data)
+    except (OSError, EOFError, ValueError, wave.Error) as e:
+        return [f"unreadable: {e}"], 0.0, None
+
+    problems = []
+    if rate != TARGET_RATE or channels != 1 or width != 2:
+        problems.append(f"format: {rate}Hz, {channels} channel(s), {8 * width}-bit")
+    mono = samples.mean(axis=1) if samples.ndim == 2 else samples
+    duration = len(mono) / rate
+    if not len(mono):
+        return problems + ["silence: empty"], 0.0, None
+
+    peak = float(np.max(np.abs(mono)))
+    if peak < SILENCE_PEAK:
+        problems.append(f"silence: peak {20 * np.log10(peak + 1e-12):.0f} dBFS")
+    clipped = float(np.mean(np.abs(mono) >= CLIP_LEVEL))
+    if clipped > CLIP_FRACTION:
+        problems.append(f"clipping: {clipped:.2%} of samples at full scale")
+    dc = float(np.mean(mono))
+    if abs(dc) > DC_OFFSET:
+        problems.append(f"dc: offset {dc:+.3f}")
+
+    if rate != TARGET_RATE:
+        return problems, duration, None  # Fingerprints are only comparable at 16kHz
+    return problems, duration, fingerprint(mono)
+
+
+def lint_batch(paths):
+    with span("lint batch", cat="item", clips=len(paths)):
+        return [lint_clip(p) for p in paths]
+
+
+def lsh_pairs(vectors, bands=LSH_BANDS, bits=LSH_BITS, seed=0):
+    """Candidate (i, j) pairs (i < j) that share a bucket in any LSH band"""
+    n = len(vectors)
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((vectors.shape[1], bands * bits)).astype(np.float32)
+    signs = (vectors @ planes > 0).reshape(n, bands, bits)
+    codes = signs.astype(np.int64) @ (1 << np.arange(bits, dtype=np.int64))  # (n, bands)
+
+    found = []
+    for band in range(bands):
+        order = np.argsort(codes[:, band], kind="stable")
+        sorted_codes = codes[order, band]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]])
+        sizes = np.diff(np.r_[starts, n])
+        for start, size in zip(starts[sizes > 1], sizes[sizes > 1]):
+            members = np.sort(order[start:start + size])
+            if size > MAX_BUCKET:
+                found.append(exact_pairs(vectors, members) @ np.array([n, 1]))
+                continue
+            a, b = np.triu_indices(size, 1)
+            found.append(members[a] * n + members[b])
+    if not found:
+        return np.zeros((0, 2), dtype=np.int64)
+    keys = np.unique(np.concatenate(found))
+    return np.stack([keys // n, keys % n], axis=1)
+
+
+def exact_pairs(vectors, members):
+    """(i, j) pairs chaining together the members (sorted row numbers)
+    whose fingerprints are identical. A chain is enough: groups are
+    formed by connecting pairs."""
+    _, inverse = np.unique(vectors[members], axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    order = np.argsort(inverse, kind="stable")
+    same = inverse[order[1:]] == inverse[order[:-1]]
+    return np.stack([members[order[:-1]][same], members[order[1:]][same]], axis=1).reshape(-1, 2)
+
+
+def unit_vectors(vectors):
+    """Fingerprints scaled to unit length"""
+    return vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-9)
+
+
+def matching_pairs(unit, durations, pairs, threshold):
+    """The pairs whose cosine similarity and duration ratio mark them as duplicates"""
+    kept = []
+    for start in range(0, len(pairs), PAIR_CHUNK):
+        chunk = pairs[start:start + PAIR_CHUNK]
+        i, j = chunk[:, 0], chunk[:, 1]
+        similarity = np.einsum("ij,ij->i", unit[i], unit[j])
+        longer = np.maximum(durations[i], durations[j])
+        shorter = np.maximum(np.minimum(durations[i], durations[j]), 1e-9)
+        kept.append(chunk[(similarity >= threshold) & (longer / shorter <= MAX_DURATION_RATIO)])
+    return np.concatenate(kept) if kept else pairs
+
+
+def group_pairs(n, pairs):
+    """Connected groups (lists of row numbers) of matching pairs"""
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in pairs:
+        parent[find(a)] = find(b)
+    groups = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def near_duplicates(vectors, durations, threshold=DUPLICATE_THRESHOLD):
+    """Near-duplicate groups of fingerprints, and how many LSH candidates were checked"""
+    if len(vectors) < 2:
+        return [], 0
+    unit = unit_vectors(vectors)
+    candidates = lsh_pairs(unit)
+    return group_pairs(len(vectors), matching_pairs(unit, durations, candidates, threshold)), \
+        len(candidates)
+
+
+def verify_recall(vectors, durations, threshold=DUPLICATE_THRESHOLD, sample=VERIFY_SAMPLE, seed=0):
+    """Fraction of the exact (all-pairs) duplicate pairs that LSH also finds,
+    on a random sample of clips"""
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.permutation(len(vectors))[:sample])
+    unit = unit_vectors(vectors)[rows]
+    i, j = np.nonzero(np.triu(unit @ unit.T >= threshold, 1))
+    exact = matching_pairs(unit, durations[rows], np.stack([i, j], axis=1), threshold)
+    found = matching_pairs(unit, durations[rows], lsh_pairs(unit), threshold)
+    n = len(rows)
+    hits = np.isin(exact[:, 0] * n + exact[:, 1], found[:, 0] * n + found[:, 1]).sum()
+    return int(hits), len(exact)
+
+
+def find_clips(folders, index_path=DEFAULT_INDEX):
+    """Clips in the given folders, or every clip in the dataset index"""
+    if folders:
+        return [p for folder in folders for p in sorted(Path(folder).glob("*.wav"))]
+    with DatasetIndex(index_path) as index:
+        index.sync()  # Stat-only: drops deleted clips, picks up ones added by hand
+        return index.paths()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate and bad clips")
+    parser.add_argument("folders", nargs="*", help="folders to lint (default: the dataset index)")
+    parser.add_argument("--threshold", type=float, default=DUPLICATE_THRESHOLD,
+                        help=f"cosine similarity for near-duplicates (default {DUPLICATE_THRESHOLD})")
+    parser.add_argument("--include-augmented", action="store_true",
+                        help="also look for duplicates among aug_* clips")
+    parser.add_argument("--json", help="write the full report to this file")
+    parser.add_argument("--strict", action="store_true", help="exit 1 if anything is flagged")
+    parser.add_argument("--verify", action="store_true",
+                        help="also compare LSH against exact all-pairs search on a sample")
+    add_jobs_argument(parser, "parallel lint processes")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("lint_dataset", args)
+
+    print("🧹 HEY ARNIE - Dataset Lint")
+    print("=" * 45)
+
+    clips = find_clips(args.folders)
+    if not clips:
+        print("❌ No clips found")
+        return
+    start = time.perf_counter()
+    batches = [clips[i:i + BATCH_SIZE] for i in range(0, len(clips), BATCH_SIZE)]
+    with span("lint clips", clips=len(clips)), ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        results = [r for batch in pool.map(lint_batch, batches) for r in batch]
+    read_seconds = time.perf_counter() - start
+
+    problems = {str(p): issues for p, (issues, _, _) in zip(clips, results) if issues}
+    rows = [i for i, (p, (_, _, fp)) in enumerate(zip(clips, results))
+            if fp is not None and (args.include_augmented or not p.name.startswith(AUG_PREFIX))]
+    vectors = np.stack([results[i][2] for i in rows]) if rows else np.zeros((0, 1), np.float32)
+    durations = np.array([results[i][1] for i in rows])
+    with span("near-duplicates", clips=len(rows)):
+        groups, candidates = near_duplicates(vectors, durations, args.threshold)
+    duplicates = [[str(clips[rows[i]]) for i in sorted(g)] for g in groups]
+    elapsed = time.perf_counter() - start
+
+    by_kind = {}
+    for path, issues in problems.items():
+        for issue in issues:
+            by_kind.setdefault(issue.split(":")[0], []).append(f"{path} ({issue.split(': ', 1)[-1]})")
+    for kind, entries in sorted(by_kind.items()):
+        print(f"\n⚠️  {kind}: {len(entries)} clips")
+        for entry in entries[:10]:
+            print(f"   {entry}")
+        if len(entries) > 10:
+            print(f"   ... and {len(entries) - 10} more")
+
+    print(f"\n🔁 {len(duplicates)} near-duplicate groups "
+          f"({sum(len(g) - 1 for g in duplicates)} redundant clips)")
+    for group in duplicates[:10]:
+        print("   " + "  =  ".join(group))
+    if len(duplicates) > 10:
+        print(f"   ... and {len(duplicates) - 10} more groups")
+
+    print(f"\n⏱️  {len(clips)} clips in {elapsed:.1f}s (reading + checks {read_seconds:.1f}s, "
+          f"{candidates} LSH candidate pairs instead of {len(rows) * (len(rows) - 1) // 2})")
+
+    if args.verify and len(rows) > 1:
+        hits, total = verify_recall(vectors, durations, args.threshold)
+        recall = hits / total if total else 1.0
+        print(f"🔬 LSH found {hits}/{total} exact duplicate pairs in a "
+              f"{min(len(rows), VERIFY_SAMPLE)}-clip sample ({recall:.1%} recall)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"problems": problems, "near_duplicates": duplicates}, f, indent=1)
+        print(f"📄 Wrote {args.json}")
+    if args.strict and (problems or duplicates):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
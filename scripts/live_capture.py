@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Live Capture
+Callback-driven microphone capture with streaming voice detection
+
+The input stream stays open for the whole session. Its callback only
+copies each 10ms block into a preallocated ring buffer: no allocation,
+no locks, no I/O, so the audio thread never waits on Python and frames
+are not dropped. Takes are cut from the ring by the same energy rules
+the recording processor splits on (segmentation.StreamingSegmenter),
+fed as the audio arrives. A take starts when the speaker starts and
+ends 0.3s after they stop. Clips are written and registered in the
+dataset index on a background thread, so the next take can start
+straight away.
+
+take() records one utterance on demand. utterances() segments the
+stream continuously for hands-free sessions. Memory stays bounded
+however long they run: the ring is fixed-size and the segmenter only
+buffers the open utterance. A WAV file can stand in for the microphone
+(input_file=...), played at real-time pace or, with realtime=False,
+as fast as the reader keeps up.
+
+Shared by record_samples_mac.py.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, write_wav
+from dataset_index import register_clips
+from instrumentation import span
+from segmentation import (MAX_CLIP_SECONDS, STOP_SECONDS, StreamingSegmenter, keep_segment,
+                          stream_recording)
+
+BLOCK_SECONDS = 0.01     # Callback block: one VAD frame
+RING_SECONDS = 30.0      # Audio the ring holds; far longer than any take
+PAD_SECONDS = 0.1        # Kept either side of the detected speech
+PREROLL_SECONDS = 0.3    # Audio from just before a take starts still counts
+LISTEN_SECONDS = 5.0     # Give up on a take if nobody speaks for this long
+
+
+class RingBuffer:
+    """Preallocated int16 ring, written by the audio callback
+
+    Positions are absolute sample counts since the stream started. There
+    is one writer (the callback) and one reader; the writer never waits.
+    """
+
+    def __init__(self, seconds=RING_SECONDS, rate=TARGET_RATE):
+        self.data = np.zeros(int(seconds * rate), dtype=np.int16)
+        self.written = 0
+
+    def write(self, block):
+        capacity = len(self.data)
+        tail = block[-capacity:]
+        start = self.written + len(block) - len(tail)
+        pos = start % capacity
+        first = min(len(tail), capacity - pos)
+        self.data[pos:pos + first] = tail[:first]
+        self.data[:len(tail) - first] = tail[first:]
+        self.written += len(block)
+
+    def oldest(self):
+        """First position still held"""
+        return max(0, self.written - len(self.data))
+
+    def read(self, start, end):
+        """A copy of samples [start, end)"""
+        if start < self.oldest() or end > self.written:
+            raise IndexError(f"samples {start}-{end} are not in the ring "
+                             f"({self.oldest()}-{self.written})")
+        capacity = len(self.data)
+        out = np.empty(end - start, dtype=np.int16)
+        pos = start % capacity
+        first = min(len(out), capacity - pos)
+        out[:first] = self.data[pos:pos + first]
+        out[first:] = self.data[:len(out) - first]
+        if start < self.oldest():
+            raise IndexError(f"samples from {start} were overwritten while reading")
+        return out
+
+
+class LiveRecorder:
+    """An always-open input stream (microphone or WAV file) feeding a ring buffer"""
+
+    def __init__(self, device=None, rate=TARGET_RATE, ring_seconds=RING_SECONDS,
+                 input_file=None, realtime=True):
+        self.device = device
+        self.rate = rate
+        self.ring = RingBuffer(ring_seconds, rate)
+        self.input_file = input_file
+        self.realtime = realtime
+        self.overflows = 0
+        self.consumed = 0        # Reader position (paces file input with realtime=False)
+        self.finished = False    # File input has been fed completely
+        self._stream = None
+        self._player = None
+        self._closing = False
+
+    def _callback(self, indata, frames, time_info, status):
+        if status.input_overflow:
+            self.overflows += 1
+        self.ring.write(indata[:, 0])
+
+    def _play_file(self):
+        """Feed the input file into the ring in callback-sized blocks"""
+        block = int(BLOCK_SECONDS * self.rate)
+        started = time.monotonic()
+        fed = 0
+        for chunk in stream_recording(self.input_file, block_seconds=1.0):
+            for i in range(0, len(chunk), block):
+                if self._closing:
+                    return
+                if self.realtime:
+                    time.sleep(max(0.0, started + fed / self.rate - time.monotonic()))
+                else:
+                    while (self.ring.written - self.consumed > len(self.ring.data) // 2
+                           and not self._closing):
+                        time.sleep(BLOCK_SECONDS)
+                self.ring.write(chunk[i:i + block])
+                fed += len(chunk[i:i + block])
+        self.finished = True
+
+    def start(self):
+        if self.input_file is not None:
+            self._player = threading.Thread(target=self._play_file, daemon=True)
+            self._player.start()
+            return self
+        import sounddevice as sd
+        self._stream = sd.InputStream(samplerate=self.rate, channels=1, dtype="int16",
+                                      blocksize=int(BLOCK_SECONDS * self.rate),
+                                      device=self.device, callback=self._callback)
+        self._stream.start()
+        return self
+
+    def close(self):
+        self._closing = True
+        if self._player is not None:
+            self._player.join()
+            self._player = None
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def level(self, seconds=0.05):
+        """RMS level of the most recent audio, in dBFS"""
+        end = self.ring.written
+        start = max(self.ring.oldest(), end - int(seconds * self.rate))
+        if end <= start:
+            return -96.0
+        samples = self.ring.read(start, end) / 32768.0
+        return float(10 * np.log10(np.mean(samples * samples) + 1e-10))
+
+    def _cut(self, origin, start, stop, clip, end):
+        """(clip, None) with padding from the ring, or (None, reason)"""
+        if clip is None or not keep_segment(start, stop, self.rate):
+            return None, f"{(stop - start) / self.rate:.1f}s is too short or too long"
+        pad = int(PAD_SECONDS * self.rate)
+        return self.ring.read(max(self.ring.oldest(), origin + start - pad),
+                              min(end, origin + stop + pad)), None
+
+    def take(self, listen_seconds=LISTEN_SECONDS):
+        """Record one utterance from now. Returns (int16 clip, None), or
+        (None, reason) when nobody spoke or the take was too short/long."""
+        origin = max(self.ring.oldest(), self.ring.written - int(PREROLL_SECONDS * self.rate))
+        segmenter = StreamingSegmenter(self.rate)
+        listen_until = time.monotonic() + listen_seconds
+        give_up = listen_until + MAX_CLIP_SECONDS + STOP_SECONDS
+        pos = origin
+        while True:
+            end = self.ring.written
+            if end > pos:
+                for start, stop, clip in segmenter.feed(self.ring.read(pos, end)):
+                    return self._cut(origin, start, stop, clip, end)
+                pos = self.consumed = end
+            now = time.monotonic()
+            if segmenter.seg_start is None and now > listen_until:
+                return None, "no speech heard"
+            if now > give_up:
+                return None, "still talking"
+            time.sleep(BLOCK_SECONDS)
+
+    def utterances(self, tick=None):
+        """Yield (clip, None) or (None, reason) for every utterance, until file
+        input runs out or the caller stops. tick() is called between reads."""
+        origin = pos = self.ring.oldest()
+        segmenter = StreamingSegmenter(self.rate)
+        while True:
+            done = self.finished  # Checked first, so the last write is read below
+            end = self.ring.written
+            if end > pos:
+                for start, stop, clip in segmenter.feed(self.ring.read(pos, end)):
+                    yield self._cut(origin, start, stop, clip, end)
+                pos = self.consumed = end
+            if done:
+                for start, stop, clip in segmenter.flush():
+                    yield self._cut(origin, start, stop, clip, end)
+                return
+            if tick is not None:
+                tick()
+            time.sleep(BLOCK_SECONDS)
+
+
+class ClipWriter:
+    """Writes and registers clips on a background thread"""
+
+    def __init__(self, numbering, source, meta=None):
+        self.numbering = numbering
+        self.source = source
+        self.meta = meta
+        self.saved = []
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, clip):
+        """Queue a clip. Returns the path it will be written to."""
+        path = self.numbering.reserve()
+        self._queue.put((path, clip))
+        return path
+
+    def _run(self):
+        # A failure is reported and the loop carries on: if this thread died,
+        # every clip queued after it would be silently lost
+        done = False
+        while not done:
+            batch = [self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get())
+            done = None in batch
+            written = []
+            for path, clip in (item for item in batch if item is not None):
+                try:
+                    with span("write clip", cat="item"):
+                        self.numbering.fill(path, lambda tmp: write_wav(tmp, clip, TARGET_RATE))
+                    written.append(path)
+                except Exception as e:
+                    self.numbering.release(path)
+                    print(f"\n   ❌ Could not write {path.name}: {e}")
+            try:
+                register_clips(written, self.source, [self.meta] * len(written) if self.meta else None)
+            except Exception as e:
+                # The clips are on disk; the next index sync picks them up
+                print(f"\n   ⚠️  Could not index {len(written)} clip(s): {e}")
+            self.saved += written
+
+    def close(self):
+        """Finish writing everything queued"""
+        self._queue.put(None)
+        self._thread.join()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Hard Negative Mining
+Replays unlabeled audio through the current model and harvests what it confuses
+
+Every recording is streamed through the model exactly as
+evaluate_model.py does it (same chunks, same probability cache, so
+mining after an evaluation only re-reads audio where something scored).
+Long recordings are cut into 10-minute chunks that run in parallel,
+whatever their format or sample rate (podcast mp3s, 44.1/48kHz TV
+rips), and only the chunk being scored is decoded.
+Wherever micro_wake_word's sliding-window average comes within --margin
+of probability_cutoff, the audio leading up to the peak is cut out.
+False triggers are included, and so are near-misses. Each clip is saved
+to samples/negative and registered in the dataset index.
+
+Mined clips are deduplicated three ways before they are written:
+- the same spot in the same recording mined in an earlier round
+- hits within 1s of each other (one clip per confusion)
+- near-identical audio (lint_dataset.py fingerprints), against each
+  other and against earlier mined clips
+Each recording contributes at most --max-per-source clips over all
+rounds (highest scores first), so one noisy podcast can't swamp the set.
+
+Usage: python scripts/mine_hard_negatives.py ~/podcasts ~/tv_audio [--jobs N]
+       python scripts/mine_hard_negatives.py ~/ambient --config esphome_config_example.yaml --dry-run
+"""
+
+import argparse
+import json
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, read_wav, write_wav
+from dataset_index import DatasetIndex, clip_key, register_clips
+from evaluate_model import (TAIL_SECONDS, WARMUP_SECONDS, moving_average, plan_negative_chunks,
+                            read_piece)
+from frontend import STEP_SAMPLES, WINDOW_SAMPLES, StreamingFrontend
+from instrumentation import add_trace_arguments, sampled, span, start_trace
+from lint_dataset import fingerprint, near_duplicates
+from probability_cache import ProbabilityCache, audio_identity
+from process_iphone_recordings import expand_recordings
+from sample_numbering import SampleNumbering
+from stream_detector import (DEFAULT_CUTOFF, DEFAULT_MODEL, DEFAULT_WINDOW,
+                             StreamingModel, ignore_calls, read_esphome_settings)
+from synth_engine import add_jobs_argument
+
+SOURCE = "mine_hard_negatives"
+MARGIN = 0.2                  # Mine where the average gets within this of the cutoff
+MAX_PER_SOURCE = 25           # Clips per recording, over all rounds
+CLIP_BEFORE_SECONDS = 1.5     # Audio kept before the peak (the model's view of the "word")
+CLIP_AFTER_SECONDS = 0.25
+MIN_SEPARATION_SECONDS = 1.0  # Hits closer than this are one confusion
+
+
+def find_peaks(average, threshold, min_gap):
+    """(call, score) at the highest point of each run of calls scoring >= threshold.
+    Runs less than min_gap calls apart count as one."""
+    above = np.flatnonzero(average >= threshold)
+    if not len(above):
+        return []
+    peaks = []
+    for group in np.split(above, np.flatnonzero(np.diff(above) > min_gap) + 1):
+        best = group[np.argmax(average[group])]
+        peaks.append((int(best), float(average[best])))
+    return peaks
+
+
+def mine_chunk(task):
+    """Worker: probabilities for one chunk (unless cached) and the clips around its peaks.
+    Returns (probabilities, seconds, hits)."""
+    model_path, frontend_name, pieces, probabilities, seconds, stride, threshold, window = task
+    audio = None
+    if probabilities is None:
+        model = StreamingModel(model_path)
+        frontend = StreamingFrontend(frontend_name)
+        audio, out = [], []
+        with span("mine chunk", cat="item", pieces=len(pieces)), sampled("inference"):
+            for piece in pieces:
+                audio.append(read_piece(*piece))
+                model.process_features(frontend.process(audio[-1]), out)
+        probabilities = np.asarray(out, dtype=np.uint8)
+        seconds = sum(len(a) for a in audio) / TARGET_RATE
+
+    average = moving_average(probabilities, window)
+    average[:ignore_calls(stride)] = 0  # Model state is still settling
+    call_samples = stride * STEP_SAMPLES
+    min_gap = int(MIN_SEPARATION_SECONDS * TARGET_RATE / call_samples)
+    peaks = find_peaks(average, threshold, min_gap)
+    if not peaks:
+        return probabilities, seconds, []
+
+    if audio is None:
+        audio = [read_piece(*piece) for piece in pieces]  # Cached: only read when something scored
+    stream = np.concatenate(audio)
+    bounds = np.cumsum([0] + [len(a) for a in audio])
+    before = int(CLIP_BEFORE_SECONDS * TARGET_RATE)
+    after = int(CLIP_AFTER_SECONDS * TARGET_RATE)
+    hits = []
+    for call, score in peaks:
+        # The last sample the model had heard when it produced this probability
+        end = min((call + 1) * call_samples + WINDOW_SAMPLES - STEP_SAMPLES, len(stream))
+        k = int(np.searchsorted(bounds, end - 1, side="right")) - 1
+        path, start, _ = pieces[k]
+        hits.append({"recording": clip_key(path),
+                     "at": round((start or 0.0) + (end - bounds[k]) / TARGET_RATE, 2),
+                     "score": round(score, 3),
+                     "clip": stream[max(0, end - before):end + after].copy()})
+    return probabilities, seconds, hits
+
+
+def previous_mining(index):
+    """Earlier mined clips: {recording: [times]} and [(path, recording)]"""
+    spots, clips = {}, []
+    for row in index.clips(source=SOURCE):
+        meta = json.loads(row["meta"]) if row["meta"] else {}
+        if "recording" in meta:
+            spots.setdefault(meta["recording"], []).append(meta.get("at", -1e9))
+            clips.append((row["path"], meta["recording"]))
+    return spots, clips
+
+
+def select_hits(hits, spots, previous_clips, max_per_source):
+    """Deduplicate, then cap, mined hits (highest scores first).
+    Returns (kept hits, {reason: dropped count})."""
+    dropped = {"mined before": 0, "near-duplicate": 0, "per-source cap": 0}
+    candidates = []
+    for hit in sorted(hits, key=lambda h: -h["score"]):
+        times = spots.get(hit["recording"], [])
+        if any(abs(hit["at"] - t) < MIN_SEPARATION_SECONDS for t in times):
+            dropped["mined before"] += 1
+        else:
+            candidates.append(hit)
+    if not candidates:
+        return [], dropped
+
+    # Near-duplicate audio: earlier clips win, then higher scores
+    old = []
+    for path, _ in previous_clips:
+        try:
+            samples, _ = read_wav(path)
+            old.append((fingerprint(samples), len(samples) / TARGET_RATE))
+        except (OSError, EOFError, ValueError, wave.Error):
+            continue  # Moved or deleted since; lint_dataset.py reports it
+    new = [(fingerprint(h["clip"] / 32768.0), len(h["clip"]) / TARGET_RATE) for h in candidates]
+    everything = old + new
+    groups, _ = near_duplicates(np.stack([f for f, _ in everything]),
+                                np.array([d for _, d in everything]))
+    redundant = set()
+    for group in groups:
+        redundant.update(sorted(group)[1:])  # Row order = old clips first, then by score
+    unique = [h for i, h in enumerate(candidates) if len(old) + i not in redundant]
+    dropped["near-duplicate"] = len(candidates) - len(unique)
+
+    taken = {recording: len(times) for recording, times in spots.items()}
+    kept = []
+    for hit in unique:
+        if taken.get(hit["recording"], 0) >= max_per_source:
+            dropped["per-source cap"] += 1
+        else:
+            taken[hit["recording"]] = taken.get(hit["recording"], 0) + 1
+            kept.append(hit)
+    return kept, dropped
+
+
+def save_hits(hits, output_dir, cutoff, model_path):
+    """Write mined clips and register them in the dataset index"""
+    numbering = SampleNumbering(output_dir, "mined")
+    paths, metas = [], []
+    for hit in hits:
+        paths.append(numbering.save(lambda tmp: write_wav(tmp, hit["clip"], TARGET_RATE)))
+        metas.append({"recording": hit["recording"], "at": hit["at"], "score": hit["score"],
+                      "triggered": hit["score"] > cutoff, "model": Path(model_path).name})
+    register_clips(paths, SOURCE, metas)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Harvest false triggers and near-misses as negatives")
+    parser.add_argument("audio", nargs="+", help="unlabeled recordings or folders of them")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    parser.add_argument("--config", help="read probability_cutoff / sliding_window_size from an ESPHome YAML")
+    parser.add_argument("--cutoff", type=float, help=f"probability_cutoff (default {DEFAULT_CUTOFF})")
+    parser.add_argument("--window", type=int, help=f"sliding_window_size (default {DEFAULT_WINDOW})")
+    parser.add_argument("--margin", type=float, default=MARGIN,
+                        help=f"also mine near-misses this far below the cutoff (default {MARGIN})")
+    parser.add_argument("--max-per-source", type=int, default=MAX_PER_SOURCE,
+                        help=f"clips per recording over all rounds (default {MAX_PER_SOURCE})")
+    parser.add_argument("--output-dir", default="samples/negative")
+    parser.add_argument("--frontend", choices=["micro", "numpy"], default=None)
+    parser.add_argument("--no-cache", action="store_true",
+                        help="recompute probabilities instead of using the cache")
+    parser.add_argument("--dry-run", action="store_true", help="report hits without saving them")
+    add_jobs_argument(parser, "parallel model processes")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("mine_hard_negatives", args)
+
+    cutoff, window = DEFAULT_CUTOFF, DEFAULT_WINDOW
+    if args.config:
+        cutoff, window = read_esphome_settings(args.config, Path(args.model).name)
+    cutoff = args.cutoff if args.cutoff is not None else cutoff
+    window = args.window if args.window is not None else window
+    threshold = max(0.0, cutoff - args.margin)
+
+    print("⛏️  HEY ARNIE - Hard Negative Mining")
+    print("=" * 45)
+    print(f"Model: {args.model}")
+    print(f"probability_cutoff: {cutoff}, sliding_window_size: {window}, mining above {threshold:.2f}")
+
+    paths = expand_recordings(args.audio)
+    if not paths:
+        print("❌ No audio found")
+        return
+    start = time.perf_counter()
+    stride = StreamingModel(args.model).stride
+    cache = None if args.no_cache else ProbabilityCache(
+        args.model, args.frontend, settings=[WARMUP_SECONDS, TAIL_SECONDS])
+
+    chunks = plan_negative_chunks(paths)
+    tasks, keys, reused = [], [], 0
+    for chunk in chunks:
+        key = cache.key([audio_identity(*piece) for piece in chunk]) if cache else None
+        hit = cache.load(key) if cache else None
+        reused += hit is not None
+        tasks.append((args.model, args.frontend, chunk,
+                      None if hit is None else hit["probabilities"],
+                      None if hit is None else float(hit["seconds"]),
+                      stride, threshold, window))
+        keys.append(None if hit is not None else key)
+    if reused:
+        print(f"♻️  Reusing cached probabilities for {reused}/{len(chunks)} chunks")
+
+    hits, seconds = [], 0.0
+    with span("inference", chunks=len(chunks)), ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for key, (probabilities, chunk_seconds, chunk_hits) in zip(keys, pool.map(mine_chunk, tasks)):
+            seconds += chunk_seconds
+            hits += chunk_hits
+            if key is not None:
+                cache.store(key, probabilities=probabilities, seconds=chunk_seconds)
+    elapsed = time.perf_counter() - start
+    triggered = sum(h["score"] > cutoff for h in hits)
+    print(f"\n🎧 {len(paths)} recordings, {seconds / 3600:.2f}h of audio in {elapsed:.1f}s "
+          f"({seconds / max(elapsed, 1e-9):.0f}x real time)")
+    print(f"🎯 {len(hits)} hits: {triggered} false triggers, {len(hits) - triggered} near-misses")
+
+    with DatasetIndex() as index:
+        spots, previous = previous_mining(index)
+    with span("select", hits=len(hits)):
+        kept, dropped = select_hits(hits, spots, previous, args.max_per_source)
+    for reason, count in dropped.items():
+        if count:
+            print(f"   ⏭️  {count} dropped: {reason}")
+    for hit in kept[:10]:
+        print(f"   {hit['score']:.2f}  {hit['recording']} @ {int(hit['at'] // 60)}:{hit['at'] % 60:05.2f}")
+    if len(kept) > 10:
+        print(f"   ... and {len(kept) - 10} more")
+
+    if args.dry_run:
+        print(f"\n🔍 Dry run: {len(kept)} clips would be added to {args.output_dir}/")
+        return
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    saved = save_hits(kept, output_dir, cutoff, args.model)
+    print(f"\n✅ Added {len(saved)} hard negatives to {output_dir}/ (retrain to use them)")
+
+
+if __name__ == "__main__":
+    main()
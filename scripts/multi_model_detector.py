@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Multi-Model Detector
+What running several wake word models together costs, on the same audio
+
+esphome_config_example.yaml can run hey_arnie.tflite with okay_nabu as
+a fallback. On the device both models share one audio frontend. This
+does the same offline. Audio is fed 10ms at a time, each feature frame
+is computed once, and it is handed to every model in turn. Each model
+has its own streaming state and its own sliding-window detector.
+
+It reports:
+- per model: time per call (mean / p99 / max), CPU load as a fraction
+  of real time, memory, and detections
+- the shared frontend's time per frame and load
+- combined: cost per 10ms frame (frontend + every model) and total
+  load, plus what sharing the frontend saves
+- conflicts: audio where two models both fired within 1s of each other
+
+Timings are host timings. --scale multiplies them to estimate a slower
+CPU. --budget fails the run (exit 1) when the combined load exceeds a
+fraction of one core.
+
+Each model's probabilities are stored in evaluate_model.py's
+probability cache, under the same keys as an evaluation of the same
+audio. Evaluating any of the models on that audio afterwards reuses
+them instead of running the frontend again.
+
+Usage: python scripts/multi_model_detector.py ~/ambient --model trained_model/hey_arnie.tflite \\
+           --model okay_nabu.tflite --config esphome_config_example.yaml
+"""
+
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import TARGET_RATE
+from dataset_index import clip_key
+from evaluate_model import TAIL_SECONDS, WARMUP_SECONDS, plan_negative_chunks, read_piece
+from frontend import STEP_SAMPLES, StreamingFrontend
+from instrumentation import add_trace_arguments, span, start_trace
+from probability_cache import ProbabilityCache, audio_identity
+from process_iphone_recordings import expand_recordings
+from stream_detector import (DEFAULT_CUTOFF, DEFAULT_MODEL, DEFAULT_WINDOW, SlidingWindowDetector,
+                             StreamingModel, load_interpreter, read_esphome_settings)
+
+CONFLICT_SECONDS = 1.0    # Detections by different models this close are one conflict
+BLOCK_SAMPLES = STEP_SAMPLES  # Audio per step: one feature frame, as on the device
+
+
+def run_chunk(task):
+    """Worker: one stream through a shared frontend and every model.
+    Returns (seconds, frame costs, [per-model results])."""
+    models, frontend_name, pieces = task
+    frontend = StreamingFrontend(frontend_name)
+    streams = []
+    for path, cutoff, window in models:
+        model = StreamingModel(path)
+        streams.append((model, SlidingWindowDetector(cutoff, window, model.stride)))
+    probabilities = [[] for _ in models]
+    call_frames = [[] for _ in models]
+    detections = [[] for _ in models]
+    costs = []  # Per block: [frontend, model 1, model 2, ...] seconds
+    bounds = [0]
+    clock = time.perf_counter
+
+    with span("shared stream", cat="item", pieces=len(pieces), models=len(models)):
+        for piece in pieces:
+            audio = read_piece(*piece)
+            for offset in range(0, len(audio), BLOCK_SAMPLES):
+                start = clock()
+                rows = frontend.process(audio[offset:offset + BLOCK_SAMPLES])
+                cost = [clock() - start]
+                for k, (model, decider) in enumerate(streams):
+                    calls = len(probabilities[k])
+                    start = clock()
+                    model.process_features(rows, probabilities[k])
+                    cost.append(clock() - start)
+                    for call in range(calls, len(probabilities[k])):
+                        call_frames[k].append(len(costs))
+                        if decider.update(probabilities[k][call]):
+                            detections[k].append(bounds[-1] + min(offset + BLOCK_SAMPLES, len(audio)))
+                costs.append(cost)
+            bounds.append(bounds[-1] + len(audio))
+
+    located = [[locate(end, pieces, bounds) for end in ends] for ends in detections]
+    results = [{"probabilities": np.asarray(p, dtype=np.uint8),
+                "call_frames": np.asarray(f, dtype=np.int64),
+                "detections": d} for p, f, d in zip(probabilities, call_frames, located)]
+    return bounds[-1] / TARGET_RATE, np.asarray(costs, dtype=np.float64), results
+
+
+def locate(end, pieces, bounds):
+    """(recording, seconds into it) for a sample position in a chunk's stream"""
+    k = int(np.searchsorted(bounds, end - 1, side="right")) - 1
+    path, start, _ = pieces[k]
+    return clip_key(path), round((start or 0.0) + (end - bounds[k]) / TARGET_RATE, 2)
+
+
+def current_rss():
+    """Resident memory of this process in bytes, or None where /proc isn't available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def model_memory(path):
+    """(file bytes, tensor bytes, resident memory added by loading it or None)"""
+    before = current_rss()
+    interpreter = load_interpreter(path)
+    after = current_rss()
+    tensors = sum(int(np.prod(t["shape"])) * np.dtype(t["dtype"]).itemsize
+                  for t in interpreter.get_tensor_details())
+    return (os.path.getsize(path), tensors,
+            after - before if before is not None and after is not None else None)
+
+
+def conflicts(detections, names, window=CONFLICT_SECONDS):
+    """Detections by two different models within 'window' seconds in the same recording"""
+    events = sorted((recording, at, name) for name, found in zip(names, detections)
+                    for recording, at in found)
+    found = []
+    for i, (recording, at, name) in enumerate(events):
+        for other_recording, other_at, other in events[i + 1:]:
+            if other_recording != recording or other_at - at > window:
+                break
+            if other != name:
+                found.append({"recording": recording, "at": at, "models": [name, other],
+                              "apart": round(other_at - at, 2)})
+    return found
+
+
+def percentile_ms(values, q):
+    return float(np.percentile(values, q)) * 1000 if len(values) else 0.0
+
+
+def summarize(names, seconds, costs, calls, scale=1.0):
+    """Per-model, frontend and combined timing stats (times multiplied by scale)"""
+    costs = costs * scale
+    frames = len(costs)
+    report = {"audio_seconds": round(seconds, 2), "frames": frames, "scale": scale, "models": {}}
+    frontend = costs[:, 0] if frames else np.zeros(0)
+    report["frontend"] = {"per_frame_us": float(frontend.mean() * 1e6) if frames else 0.0,
+                          "load": float(frontend.sum() / seconds) if seconds else 0.0}
+    for k, name in enumerate(names):
+        per_call = costs[calls[k], k + 1] if frames else np.zeros(0)
+        report["models"][name] = {
+            "calls": int(len(per_call)),
+            "call_mean_ms": float(per_call.mean() * 1000) if len(per_call) else 0.0,
+            "call_p99_ms": percentile_ms(per_call, 99),
+            "call_max_ms": float(per_call.max() * 1000) if len(per_call) else 0.0,
+            "load": float(costs[:, k + 1].sum() / seconds) if seconds else 0.0,
+        }
+    per_frame = costs.sum(axis=1) if frames else np.zeros(0)
+    separate = frontend.sum() * len(names) + costs[:, 1:].sum() if frames else 0.0
+    report["combined"] = {
+        "per_frame_mean_ms": float(per_frame.mean() * 1000) if frames else 0.0,
+        "per_frame_p99_ms": percentile_ms(per_frame, 99),
+        "per_frame_max_ms": float(per_frame.max() * 1000) if frames else 0.0,
+        "load": float(per_frame.sum() / seconds) if seconds else 0.0,
+        "saved_by_sharing": float(1 - per_frame.sum() / separate) if separate else 0.0,
+    }
+    return report
+
+
+def model_settings(paths, config, cutoff, window):
+    """[(path, probability_cutoff, sliding_window_size)] from the config, then the overrides"""
+    models = []
+    for path in paths:
+        c, w = read_esphome_settings(config, Path(path).name) if config else (DEFAULT_CUTOFF, DEFAULT_WINDOW)
+        models.append((str(path), cutoff if cutoff is not None else c,
+                       window if window is not None else w))
+    return models
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several wake word models on one shared frontend")
+    parser.add_argument("audio", nargs="+", help="recordings or folders of them")
+    parser.add_argument("-m", "--model", action="append", dest="models",
+                        help=f"a model to run (repeat for each; default {DEFAULT_MODEL})")
+    parser.add_argument("--config", help="read each model's probability_cutoff / sliding_window_size "
+                                         "from an ESPHome YAML")
+    parser.add_argument("--cutoff", type=float, help="probability_cutoff for every model")
+    parser.add_argument("--window", type=int, help="sliding_window_size for every model")
+    parser.add_argument("--frontend", choices=["micro", "numpy"], default=None)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply host timings by this (to estimate a slower CPU)")
+    parser.add_argument("--budget", type=float,
+                        help="exit 1 if the combined load exceeds this fraction of one core")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="don't store probabilities in the evaluation cache")
+    parser.add_argument("--json", help="write the full report to this file")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="parallel streams (default 1: more is faster, but timings get noisier)")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("multi_model_detector", args)
+
+    models = model_settings(args.models or [DEFAULT_MODEL], args.config, args.cutoff, args.window)
+    names = [Path(path).name for path, _, _ in models]
+    if len(set(names)) != len(names):
+        parser.error("models need distinct file names")
+
+    print("👥 HEY ARNIE - Multi-Model Detector")
+    print("=" * 45)
+    load_interpreter(models[0][0])  # So the runtime's own import isn't charged to the first model
+    memory = {}
+    for (path, cutoff, window), name in zip(models, names):
+        memory[name] = model_memory(path)
+        print(f"Model: {name} (probability_cutoff {cutoff}, sliding_window_size {window})")
+
+    paths = expand_recordings(args.audio)
+    if not paths:
+        print("❌ No audio found")
+        return
+    chunks = plan_negative_chunks(paths)
+    caches = [] if args.no_cache else [
+        ProbabilityCache(path, args.frontend, settings=[WARMUP_SECONDS, TAIL_SECONDS])
+        for path, _, _ in models]
+
+    start = time.perf_counter()
+    seconds, all_costs, all_calls, detections = 0.0, [], [[] for _ in models], [[] for _ in models]
+    frames = 0
+    tasks = [(models, args.frontend, chunk) for chunk in chunks]
+    with span("shared inference", chunks=len(chunks)), ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for chunk, (chunk_seconds, costs, results) in zip(chunks, pool.map(run_chunk, tasks)):
+            for k, result in enumerate(results):
+                all_calls[k].append(result["call_frames"] + frames)
+                detections[k] += result["detections"]
+                if caches:
+                    key = caches[k].key([audio_identity(*piece) for piece in chunk])
+                    caches[k].store(key, probabilities=result["probabilities"], seconds=chunk_seconds)
+            seconds += chunk_seconds
+            frames += len(costs)
+            all_costs.append(costs)
+    elapsed = time.perf_counter() - start
+    costs = np.concatenate(all_costs) if all_costs else np.zeros((0, len(models) + 1))
+    calls = [np.concatenate(c) if c else np.zeros(0, dtype=np.int64) for c in all_calls]
+
+    report = summarize(names, seconds, costs, calls, args.scale)
+    report["conflicts"] = conflicts(detections, names)
+    for k, name in enumerate(names):
+        file_bytes, tensor_bytes, rss = memory[name]
+        report["models"][name].update(
+            file_bytes=file_bytes, tensor_bytes=tensor_bytes, rss_bytes=rss,
+            detections=len(detections[k]),
+            detections_per_hour=len(detections[k]) / (seconds / 3600) if seconds else 0.0)
+
+    print(f"\n🎧 {len(paths)} recordings, {seconds / 3600:.2f}h of audio in {elapsed:.1f}s"
+          + (f" (timings x{args.scale:g})" if args.scale != 1.0 else ""))
+    print(f"\n{'':22} {'calls':>8} {'mean':>8} {'p99':>8} {'max':>8} {'load':>7} "
+          f"{'file':>7} {'tensors':>8} {'RSS':>7} {'wakes':>6}")
+    for name, m in report["models"].items():
+        rss = f"{m['rss_bytes'] / 1e6:6.1f}M" if m["rss_bytes"] is not None else f"{'n/a':>7}"
+        print(f"{name[:22]:22} {m['calls']:8d} {m['call_mean_ms']:6.3f}ms {m['call_p99_ms']:6.3f}ms "
+              f"{m['call_max_ms']:6.3f}ms {m['load']:7.2%} {m['file_bytes'] / 1e3:6.0f}K "
+              f"{m['tensor_bytes'] / 1e3:7.0f}K {rss} {m['detections']:6d}")
+    f, c = report["frontend"], report["combined"]
+    print(f"{'frontend (shared)':22} {frames:8d} {f['per_frame_us'] / 1000:6.3f}ms {'':8} {'':8} "
+          f"{f['load']:7.2%}")
+    print(f"\n⏱️  Combined per 10ms frame: mean {c['per_frame_mean_ms']:.3f}ms, "
+          f"p99 {c['per_frame_p99_ms']:.3f}ms, max {c['per_frame_max_ms']:.3f}ms")
+    print(f"🖥️  Combined load: {c['load']:.2%} of one core "
+          f"(sharing the frontend saves {c['saved_by_sharing']:.0%})")
+
+    if len(models) > 1:
+        found = report["conflicts"]
+        print(f"\n{'⚔️ ' if found else '✅'} {len(found)} conflicts "
+              f"(two models firing within {CONFLICT_SECONDS:g}s)")
+        for conflict in found[:10]:
+            at = conflict["at"]
+            print(f"   {conflict['recording']} @ {int(at // 60)}:{at % 60:05.2f}  "
+                  f"{' + '.join(conflict['models'])} ({conflict['apart']:.2f}s apart)")
+        if len(found) > 10:
+            print(f"   ... and {len(found) - 10} more")
+    if caches:
+        print(f"\n♻️  Probabilities cached: evaluate_model.py on this audio reuses them")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"📄 Wrote {args.json}")
+    if args.budget is not None:
+        if c["load"] > args.budget:
+            print(f"\n❌ Combined load {c['load']:.2%} is over the budget of {args.budget:.2%}")
+            raise SystemExit(1)
+        print(f"\n✅ Combined load {c['load']:.2%} is within the budget of {args.budget:.2%}")
+
+
+if __name__ == "__main__":
+    main()
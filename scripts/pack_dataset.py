@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Packed Dataset
+Packs samples/positive and samples/negative into a few large shards
+
+Each shard is one flat file of 16kHz mono int16 PCM, clips back to
+back. A JSON index holds each clip's original path, label, SHA-256,
+shard, offset and length. Readers memory-map the shards, so a clip is a
+zero-copy slice and a whole pass over the dataset is a few long
+sequential reads instead of one open/stat/read per file. Shuffled
+iteration visits blocks of neighbouring clips in random order (and the
+clips within each block in random order), so reads stay near-sequential.
+
+The clip list comes from the dataset index. Packing is skipped when no
+clip has changed since the last pack. A new pack is written next to the
+old one and the index is swapped in atomically, so readers never see a
+half-written pack. microWakeWord still wants WAV files; 'export' writes
+them back out.
+
+Usage: python scripts/pack_dataset.py                  # pack (if anything changed)
+       python scripts/pack_dataset.py info
+       python scripts/pack_dataset.py export out_dir [--label positive]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, read_wav, to_16k_mono, write_wav
+from dataset_index import DatasetIndex, DEFAULT_INDEX
+from instrumentation import add_trace_arguments, span, start_trace
+from synth_engine import add_jobs_argument
+
+DEFAULT_PACK_DIR = Path("samples/packed")
+INDEX_NAME = "pack_index.json"
+LABELS = ["positive", "negative"]
+SHARD_SAMPLES = 128 * 1024 * 1024   # 256MB of PCM per shard (~2.3 hours)
+SHUFFLE_BLOCK = 256                  # Neighbouring clips shuffled together
+READ_BATCH = 256                     # Clips per packing task
+
+
+def read_clip(path):
+    """A clip as 16kHz mono int16. 16-bit 16kHz mono WAVs are copied exactly."""
+    with wave.open(str(path)) as w:
+        if (w.getframerate(), w.getnchannels(), w.getsampwidth()) == (TARGET_RATE, 1, 2):
+            return np.frombuffer(w.readframes(w.getnframes()), dtype="<i2")
+    samples, rate = read_wav(path)
+    return to_16k_mono(samples, rate)
+
+
+def read_batch(paths):
+    """Worker: clips for a batch of paths (None for unreadable ones)"""
+    clips = []
+    with span("read batch", cat="item", clips=len(paths)):
+        for path in paths:
+            try:
+                clips.append(read_clip(path))
+            except (OSError, EOFError, ValueError, wave.Error):
+                clips.append(None)
+    return clips
+
+
+def load_index(pack_dir):
+    try:
+        with open(Path(pack_dir) / INDEX_NAME) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def source_digest(rows):
+    """Identifies a clip list by path and content"""
+    h = hashlib.sha256()
+    for path, label, sha in rows:
+        h.update(f"{path}\t{label}\t{sha}\n".encode())
+    return h.hexdigest()
+
+
+def pack(rows, pack_dir=DEFAULT_PACK_DIR, jobs=None, shard_samples=SHARD_SAMPLES):
+    """Pack [(path, label, sha256)] into shards. Returns (clips packed, clips skipped)."""
+    pack_dir = Path(pack_dir)
+    pack_dir.mkdir(parents=True, exist_ok=True)
+    previous = load_index(pack_dir)
+    generation = previous["generation"] + 1 if previous else 1
+    labels = sorted({label for _, label, _ in rows})
+    index = {"version": 1, "rate": TARGET_RATE, "generation": generation,
+             "source": source_digest(rows), "labels": labels, "shards": [],
+             "path": [], "label": [], "sha256": [], "shard": [], "offset": [], "length": []}
+
+    shard_file, fill, skipped = None, 0, 0
+    batches = [rows[i:i + READ_BATCH] for i in range(0, len(rows), READ_BATCH)]
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for batch, clips in zip(batches, pool.map(read_batch, [[r[0] for r in b] for b in batches])):
+                for (path, label, sha), clip in zip(batch, clips):
+                    if clip is None:
+                        skipped += 1
+                        continue
+                    if shard_file is None or (fill and fill + len(clip) > shard_samples):
+                        if shard_file is not None:
+                            shard_file.close()
+                        name = f"shard_{generation:04d}_{len(index['shards']):04d}.i16"
+                        shard_file = open(pack_dir / name, "wb")
+                        index["shards"].append({"name": name, "samples": 0})
+                        fill = 0
+                    shard_file.write(np.ascontiguousarray(clip, dtype="<i2").tobytes())
+                    for key, value in (("path", path), ("label", labels.index(label)),
+                                       ("sha256", sha), ("shard", len(index["shards"]) - 1),
+                                       ("offset", fill), ("length", len(clip))):
+                        index[key].append(value)
+                    fill += len(clip)
+                    index["shards"][-1]["samples"] = fill
+    finally:
+        if shard_file is not None:
+            shard_file.close()
+
+    tmp = pack_dir / (INDEX_NAME + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp, pack_dir / INDEX_NAME)
+    # Open memory maps of the old shards stay valid after unlinking
+    current = {s["name"] for s in index["shards"]}
+    for stale in pack_dir.glob("shard_*.i16"):
+        if stale.name not in current:
+            stale.unlink()
+    return len(index["path"]), skipped
+
+
+def indexed_rows(labels=LABELS, index_path=DEFAULT_INDEX):
+    """(path, label, sha256) of every clip with one of the labels, from the dataset
+    index after a stat-only sync (so deleted and hand-added clips are accounted for)"""
+    with DatasetIndex(index_path) as index:
+        index.sync()
+        return [(row["path"], row["label"], row["sha256"])
+                for label in labels for row in index.clips(label)]
+
+
+class PackedDataset:
+    """A pack opened read-only: every clip is a zero-copy slice of a memory-mapped shard"""
+
+    def __init__(self, pack_dir=DEFAULT_PACK_DIR):
+        self.pack_dir = Path(pack_dir)
+        self.index = load_index(self.pack_dir)
+        if self.index is None:
+            raise FileNotFoundError(f"No pack in {self.pack_dir} (run pack_dataset.py)")
+        self.paths = self.index["path"]
+        self.label_names = self.index["labels"]
+        self.labels = np.asarray(self.index["label"], dtype=np.int16)
+        self.shard_of = np.asarray(self.index["shard"], dtype=np.int32)
+        self.offsets = np.asarray(self.index["offset"], dtype=np.int64)
+        self.lengths = np.asarray(self.index["length"], dtype=np.int64)
+        self._shards = [np.memmap(self.pack_dir / s["name"], dtype="<i2", mode="r",
+                                  shape=(s["samples"],))
+                        if s["samples"] else np.zeros(0, dtype="<i2")  # Empty files can't be mapped
+                        for s in self.index["shards"]]
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        """Clip i as an int16 view into its shard"""
+        offset = self.offsets[i]
+        return self._shards[self.shard_of[i]][offset:offset + self.lengths[i]]
+
+    def label(self, i):
+        return self.label_names[self.labels[i]]
+
+    def indices(self, label=None):
+        """Clip numbers (in shard order), optionally only one label's"""
+        if label is None:
+            return np.arange(len(self))
+        if label not in self.label_names:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.labels == self.label_names.index(label))
+
+    def __iter__(self):
+        """Clips in shard order (purely sequential reads)"""
+        for i in range(len(self)):
+            yield self[i]
+
+    def shuffled(self, seed=0, label=None, block=SHUFFLE_BLOCK):
+        """(clip number, clip) in random order: blocks of neighbouring clips in
+        random order, and the clips within each block in random order"""
+        rng = np.random.default_rng(seed)
+        order = self.indices(label)
+        blocks = [order[i:i + block] for i in range(0, len(order), block)]
+        for b in rng.permutation(len(blocks)):
+            for i in rng.permutation(blocks[b]):
+                yield int(i), self[i]
+
+    def seconds(self, label=None):
+        return float(self.lengths[self.indices(label)].sum()) / self.index["rate"]
+
+
+def export(dataset, out_dir, label=None):
+    """Write clips back out as WAVs in out_dir/<label>/. Returns the number written."""
+    out_dir = Path(out_dir)
+    for name in ([label] if label else dataset.label_names):
+        (out_dir / name).mkdir(parents=True, exist_ok=True)
+    count = 0
+    for i in dataset.indices(label):
+        write_wav(out_dir / dataset.label(i) / Path(dataset.paths[i]).name, dataset[i],
+                  dataset.index["rate"])
+        count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack the dataset into memory-mappable shards")
+    parser.add_argument("command", nargs="?", default="pack", choices=["pack", "info", "export"])
+    parser.add_argument("out_dir", nargs="?", help="export: where to write WAVs")
+    parser.add_argument("--pack-dir", default=str(DEFAULT_PACK_DIR))
+    parser.add_argument("--label", help="export: only this label")
+    parser.add_argument("--force", action="store_true", help="pack even if nothing changed")
+    add_jobs_argument(parser, "parallel reader processes")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("pack_dataset", args)
+
+    print("📦 HEY ARNIE - Packed Dataset")
+    print("=" * 45)
+
+    if args.command == "pack":
+        start = time.perf_counter()
+        rows = indexed_rows()
+        previous = load_index(args.pack_dir)
+        if previous and previous["source"] == source_digest(rows) and not args.force:
+            print(f"✅ {args.pack_dir} is up to date ({len(rows)} clips)")
+            return
+        with span("pack", clips=len(rows)):
+            packed, skipped = pack(rows, args.pack_dir, args.jobs)
+        print(f"✅ Packed {packed} clips into {args.pack_dir}/ in {time.perf_counter() - start:.1f}s")
+        if skipped:
+            print(f"⚠️  Skipped {skipped} unreadable clips (see lint_dataset.py)")
+
+    dataset = PackedDataset(args.pack_dir)
+    if args.command in ("pack", "info"):
+        for label in dataset.label_names:
+            print(f"   {label:>10}: {len(dataset.indices(label)):6d} clips, "
+                  f"{dataset.seconds(label) / 3600:.2f}h")
+        size = sum(s["samples"] for s in dataset.index["shards"]) * 2
+        print(f"   {len(dataset.index['shards'])} shards, {size / 1e6:.0f}MB")
+    elif args.command == "export":
+        if not args.out_dir:
+            parser.error("export needs an output folder")
+        start = time.perf_counter()
+        count = export(dataset, args.out_dir, args.label)
+        print(f"✅ Exported {count} WAVs to {args.out_dir}/ in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
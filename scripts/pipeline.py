@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Pipeline
+Runs the steps from synthesis to an evaluated model, skipping whatever is up to date
+
+Each step is a stage in a small DAG:
+
+    positives ─────────┐
+    negatives ─────────┼──> index ──> train ──┬──> evaluate (if samples/holdout exists)
+    ingest:<memo> ... ─┘                       └──> profile
+
+There is one ingest stage per recording in --memos (default recordings/).
+A stage's inputs are fingerprinted:
+- the script it runs, plus every sibling module it imports
+- its arguments
+- its input files (by content)
+- the outputs of the stages it depends on
+A stage is skipped when its fingerprint matches the last successful run
+and its outputs are still there, unchanged. Stages run concurrently once
+their dependencies are done (positives, negatives and every ingest).
+State lives in .cache/pipeline/.
+
+Outputs are fingerprinted by content (clips by their dataset index
+SHA-256). A stage that reruns but writes identical clips therefore
+triggers nothing downstream. Within a stage the existing caches keep
+rebuilds small. Editing one negative phrase synthesizes that phrase's
+clips plus the few whose balanced voice/rate/pitch picks shift (the
+rest come from the synthesis cache), and training stages only those
+clips. 'index' always runs (a cheap
+stat-only sync), so clips recorded or mined by hand are picked up.
+augment_samples.py is not a stage because it rewrites every variant on
+each run. 'profile' fails the build when the model is over its size or
+arena budget, or micro_wake_word couldn't load it. Deploying (Step 6)
+stays manual.
+
+Usage: python scripts/pipeline.py                     # everything that's out of date
+       python scripts/pipeline.py negatives --dry-run  # what would run, and why
+       python scripts/pipeline.py train --force positives --backend piper
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from dataset_index import DatasetIndex
+from instrumentation import add_trace_arguments, span, start_trace
+from process_iphone_recordings import expand_recordings
+from synth_engine import add_jobs_argument
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+STATE_DIR = Path(".cache/pipeline")
+STATE_FILE = STATE_DIR / "state.json"
+DEFAULT_MEMOS = Path("recordings")
+HOLDOUT_DIR = Path("samples/holdout")
+MODEL_FILE = Path("trained_model/hey_arnie.tflite")
+CONFIG_FILE = Path("trained_model/recommended_config.yaml")
+PROFILE_FILE = Path("trained_model/profile.json")
+LOG_TAIL_LINES = 15
+
+
+class Stage:
+    """One step: a script run as a subprocess, what it reads and what it writes"""
+
+    def __init__(self, name, script, args=(), deps=(), files=(), outputs=None,
+                 required=True, always=False, before=None):
+        self.name = name
+        self.script = script
+        self.args = list(args)
+        self.deps = list(deps)
+        self.files = list(files)      # Input files, fingerprinted by content
+        self.outputs = outputs        # () -> (digest, count), digest None if an output is missing
+        self.required = required      # Fail if the run produced nothing
+        self.always = always          # Run every time (cheap, and sees changes made by hand)
+        self.before = before          # Called before each run (e.g. to drop stale outputs)
+
+    def argv(self):
+        return [sys.executable, str(SCRIPTS_DIR / self.script)] + self.args
+
+
+def script_sources(script):
+    """The script and every sibling module it imports, directly or not"""
+    seen, todo = set(), [Path(script).stem]
+    while todo:
+        name = todo.pop()
+        path = SCRIPTS_DIR / f"{name}.py"
+        if name in seen or not path.exists():
+            continue
+        seen.add(name)
+        for node in ast.walk(ast.parse(path.read_text())):
+            if isinstance(node, ast.Import):
+                todo += [alias.name.split(".")[0] for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                todo.append(node.module.split(".")[0])
+    return [SCRIPTS_DIR / f"{name}.py" for name in sorted(seen)]
+
+
+def file_digest(path, known):
+    """SHA-256 of a file's contents, reusing 'known' while its size and mtime hold"""
+    st = os.stat(path)
+    key = str(path)
+    cached = known.get(key)
+    if cached and cached[:2] == [st.st_size, st.st_mtime_ns]:
+        return cached[2]
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    known[key] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+    return known[key][2]
+
+
+def clip_outputs(source=None, recording=None):
+    """Digest of the indexed clips one stage wrote: by source, optionally one recording's"""
+    def outputs():
+        h, count = hashlib.sha256(), 0
+        with DatasetIndex() as index:
+            for row in index.clips(source=source):
+                if recording is not None and json.loads(row["meta"] or "{}").get("recording") != recording:
+                    continue
+                if not os.path.exists(row["path"]):
+                    return None, 0
+                h.update(f"{row['path']}\t{row['label']}\t{row['sha256']}\n".encode())
+                count += 1
+        return h.hexdigest(), count
+    return outputs
+
+
+def file_outputs(paths, known):
+    """Digest of output files by content"""
+    def outputs():
+        h = hashlib.sha256()
+        for path in paths:
+            if not Path(path).exists():
+                return None, 0
+            h.update(f"{path}\t{file_digest(path, known)}\n".encode())
+        return h.hexdigest(), len(paths)
+    return outputs
+
+
+def forget_recording(name):
+    """Delete the clips an earlier ingest of this recording produced (it's being re-split)"""
+    def before():
+        with DatasetIndex() as index:
+            stale = [row["path"] for row in index.clips(source="process_iphone_recordings")
+                     if json.loads(row["meta"] or "{}").get("recording") == name]
+            for path in stale:
+                Path(path).unlink(missing_ok=True)
+            index.remove(stale)
+    return before
+
+
+def build_stages(args, known):
+    """The DAG, in dependency order"""
+    synth_args = ["--backend", args.backend] if args.backend else []
+    if args.seed is not None:
+        synth_args += ["--seed", str(args.seed)]
+    stages = [
+        Stage("positives", "generate_samples.py",
+              synth_args + (["--count", str(args.positives)] if args.positives else []),
+              outputs=clip_outputs("generate_samples")),
+        Stage("negatives", "generate_negative_samples.py",
+              synth_args + (["--count", str(args.negatives)] if args.negatives else []),
+              outputs=clip_outputs("generate_negative_samples")),
+    ]
+    for memo in expand_recordings([args.memos]) if Path(args.memos).is_dir() else []:
+        stages.append(Stage(f"ingest:{memo.name}", "process_iphone_recordings.py",
+                            [str(memo), "--jobs", "1"], files=[memo],
+                            outputs=clip_outputs("process_iphone_recordings", memo.name),
+                            required=False, before=forget_recording(memo.name)))
+    stages.append(Stage("index", "dataset_index.py", ["sync"], deps=[s.name for s in stages],
+                        outputs=clip_outputs(), required=False, always=True))
+    stages.append(Stage("train", "train_model.py", ["--yes"], deps=["index"],
+                        outputs=file_outputs([MODEL_FILE], known)))
+    holdout = sorted(HOLDOUT_DIR.glob("*.wav")) if HOLDOUT_DIR.is_dir() else []
+    if holdout:
+        stages.append(Stage("evaluate", "evaluate_model.py", ["--config-out", str(CONFIG_FILE)],
+                            deps=["train", "index"], files=holdout,
+                            outputs=file_outputs([CONFIG_FILE], known)))
+    stages.append(Stage("profile", "profile_model.py",
+                        [str(MODEL_FILE), "--esphome", "--no-accuracy", "--json", str(PROFILE_FILE)],
+                        deps=["train"], outputs=file_outputs([PROFILE_FILE], known)))
+    return stages
+
+
+def matching(stages, names):
+    """Stages named, or prefixed ('ingest' matches every ingest:<memo>)"""
+    found = []
+    for name in names:
+        hits = [s for s in stages if s.name == name or s.name.startswith(name + ":")]
+        if not hits:
+            raise SystemExit(f"❌ No stage '{name}' (stages: {', '.join(s.name for s in stages)})")
+        found += hits
+    return {s.name for s in found}
+
+
+def with_dependencies(stages, names):
+    by_name = {s.name: s for s in stages}
+    todo, needed = list(names), set()
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo += by_name[name].deps
+    return [s for s in stages if s.name in needed]
+
+
+class Pipeline:
+    """Runs stages in dependency order, concurrently where possible, skipping up-to-date ones"""
+
+    def __init__(self, stages, state, forced=(), parallel=1, dry_run=False):
+        self.stages = stages
+        self.state = state
+        self.forced = set(forced)
+        self.parallel = parallel
+        self.dry_run = dry_run
+        self.outputs = {}  # Stage name -> output digest, once done
+        self.ran, self.skipped, self.failed, self.blocked = [], [], [], []
+
+    def fingerprint(self, stage):
+        """{input: digest} for everything the stage reads"""
+        known = self.state.setdefault("files", {})
+        inputs = {"args": hashlib.sha256(json.dumps(stage.args).encode()).hexdigest()}
+        for path in script_sources(stage.script):
+            inputs[f"script {path.name}"] = file_digest(path, known)
+        for path in stage.files:
+            inputs[f"file {path}"] = file_digest(path, known)
+        for dep in stage.deps:
+            inputs[f"stage {dep}"] = self.outputs[dep]
+        return inputs
+
+    def reason_to_run(self, stage, inputs):
+        """Why the stage must run, or None if it is up to date"""
+        last = self.state["stages"].get(stage.name)
+        if stage.name in self.forced:
+            return "forced"
+        if stage.always:
+            return "runs every time"
+        if last is None:
+            return "never run"
+        changed = sorted(k for k in inputs.keys() | last["inputs"].keys()
+                         if inputs.get(k) != last["inputs"].get(k))
+        if changed:
+            shown = ", ".join(k.split(" ", 1)[-1] for k in changed[:3])
+            return f"changed: {shown}" + (f" +{len(changed) - 3} more" if len(changed) > 3 else "")
+        digest, _ = stage.outputs()
+        if digest != last["outputs"]:
+            return "outputs missing or modified"
+        return None
+
+    def run_stage(self, stage):
+        """Worker thread: run the script, logging its output. Returns (ok, seconds, log path)."""
+        STATE_DIR.joinpath("logs").mkdir(parents=True, exist_ok=True)
+        log_path = STATE_DIR / "logs" / f"{stage.name.replace(':', '_').replace(os.sep, '_')}.log"
+        start = time.perf_counter()
+        if stage.before:
+            stage.before()
+        env = dict(os.environ, PYTHONUNBUFFERED="1")
+        with open(log_path, "w") as log, span(stage.name, cat="pipeline stage"):
+            code = subprocess.run(stage.argv(), stdin=subprocess.DEVNULL, stdout=log,
+                                  stderr=subprocess.STDOUT, env=env).returncode
+        return code, time.perf_counter() - start, log_path
+
+    def finish(self, stage, inputs, code, seconds, log_path):
+        digest, count = stage.outputs()
+        problem = (f"exited with {code}" if code else
+                   "outputs missing" if digest is None else
+                   "produced nothing" if stage.required and not count else None)
+        if problem:
+            self.failed.append(stage.name)
+            print(f"❌ {stage.name} {problem} after {seconds:.1f}s - last lines of {log_path}:")
+            for line in log_path.read_text(errors="replace").splitlines()[-LOG_TAIL_LINES:]:
+                print(f"      {line}")
+            return
+        self.outputs[stage.name] = digest
+        self.ran.append(stage.name)
+        self.state["stages"][stage.name] = {"inputs": inputs, "outputs": digest,
+                                            "finished": time.time()}
+        save_state(self.state)
+        print(f"✅ {stage.name} ({count} outputs) in {seconds:.1f}s")
+
+    def run(self):
+        pending = list(self.stages)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.parallel) as pool:
+            while pending or running:
+                for stage in list(pending):
+                    if any(d in self.failed or d in self.blocked for d in stage.deps):
+                        pending.remove(stage)
+                        self.blocked.append(stage.name)
+                        print(f"⛔ {stage.name} not run: a dependency failed")
+                        continue
+                    if not all(d in self.outputs for d in stage.deps):
+                        continue
+                    pending.remove(stage)
+                    inputs = self.fingerprint(stage)
+                    reason = self.reason_to_run(stage, inputs)
+                    if reason is None or (self.dry_run and stage.always):
+                        # Dry runs treat always-run stages as unchanged
+                        self.outputs[stage.name] = stage.outputs()[0]
+                        (self.skipped if reason is None else self.ran).append(stage.name)
+                        print(f"⏭️  {stage.name}: up to date" if reason is None else
+                              f"🔍 {stage.name}: would run ({reason})")
+                    elif self.dry_run:
+                        print(f"🔍 {stage.name}: would run ({reason})")
+                        self.ran.append(stage.name)
+                        self.blocked_by_dry_run(stage, pending)
+                    else:
+                        print(f"▶️  {stage.name}: {reason}")
+                        running[pool.submit(self.run_stage, stage)] = (stage, inputs)
+                if not running:
+                    if pending and not self.dry_run:
+                        raise RuntimeError(f"Unrunnable stages: {[s.name for s in pending]}")
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, inputs = running.pop(future)
+                    self.finish(stage, inputs, *future.result())
+        return not self.failed and not self.blocked
+
+    def blocked_by_dry_run(self, stage, pending):
+        """Everything downstream of a stage that would run can't be judged without running it"""
+        downstream = {stage.name}
+        for other in list(pending):
+            if any(d in downstream for d in other.deps):
+                downstream.add(other.name)
+                pending.remove(other)
+                self.ran.append(other.name)
+                print(f"🔍 {other.name}: would run if {stage.name} changes its outputs")
+
+
+def load_state():
+    try:
+        with open(STATE_FILE) as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        state = {}
+    state.setdefault("stages", {})
+    state.setdefault("files", {})
+    return state
+
+
+def save_state(state):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, STATE_FILE)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the pipeline, skipping up-to-date stages")
+    parser.add_argument("targets", nargs="*",
+                        help="stages to bring up to date, with what they depend on (default: all)")
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="rerun this stage even if it is up to date (repeatable)")
+    parser.add_argument("--dry-run", action="store_true", help="show what would run, and why")
+    parser.add_argument("--memos", default=str(DEFAULT_MEMOS),
+                        help=f"folder of recordings to ingest (default {DEFAULT_MEMOS}/)")
+    parser.add_argument("--backend", help="TTS backend for both generators (default: auto)")
+    parser.add_argument("--positives", type=int, help="positive clips to synthesize")
+    parser.add_argument("--negatives", type=int, help="negative clips to synthesize")
+    parser.add_argument("--seed", type=int, help="synthesis plan seed")
+    add_jobs_argument(parser, "stages run at once")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("pipeline", args)
+
+    print("🧩 HEY ARNIE - Pipeline")
+    print("=" * 45)
+
+    state = load_state()
+    stages = build_stages(args, state["files"])
+    if args.targets:
+        stages = with_dependencies(stages, matching(stages, args.targets))
+    forced = matching(stages, args.force) if args.force else set()
+
+    start = time.perf_counter()
+    pipeline = Pipeline(stages, state, forced, args.jobs, args.dry_run)
+    ok = pipeline.run()
+    if not args.dry_run:
+        save_state(state)
+
+    print("-" * 45)
+    verb = "would run" if args.dry_run else "ran"
+    print(f"{'🔍' if args.dry_run else '✅' if ok else '❌'} {len(pipeline.ran)} {verb}, "
+          f"{len(pipeline.skipped)} up to date, {len(pipeline.failed)} failed, "
+          f"{len(pipeline.blocked)} blocked "
+          f"in {time.perf_counter() - start:.1f}s")
+    if ok and not args.dry_run and "train" in pipeline.ran:
+        print(f"\n📦 {MODEL_FILE} is ready - deploy it to your devices (README Step 6)")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Probability Cache
+On-disk cache of per-call model probabilities for evaluation audio
+
+Entries are namespaced by a hash of the .tflite file and the frontend
+version, so retraining or switching frontend invalidates them. Within a
+namespace, entries are keyed by the audio they cover (path, size, mtime
+and the piece of the file used). Threshold sweeps then re-score cached
+probabilities instead of re-running inference.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from frontend import frontend_version
+
+DEFAULT_CACHE_DIR = Path(".cache/probabilities")
+
+
+def audio_identity(path, start=None, end=None):
+    """Cheap identity of (a piece of) an audio file"""
+    st = os.stat(path)
+    return [str(Path(path).resolve()), st.st_size, st.st_mtime_ns, start, end]
+
+
+class ProbabilityCache:
+    """npz files of probabilities, one per evaluated stream or clip"""
+
+    def __init__(self, model_path, frontend=None, cache_dir=DEFAULT_CACHE_DIR, settings=None):
+        h = hashlib.sha256()
+        with open(model_path, "rb") as f:
+            h.update(f.read())
+        # Anything that changes how probabilities are produced goes in the namespace
+        h.update(json.dumps([frontend_version(frontend), settings]).encode())
+        self.dir = Path(cache_dir) / h.hexdigest()[:16]
+        self.dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(identity):
+        return hashlib.sha256(json.dumps(identity).encode()).hexdigest()
+
+    def load(self, key):
+        """Cached arrays for key as a dict, or None"""
+        try:
+            with np.load(self.dir / f"{key}.npz") as data:
+                return {name: data[name] for name in data.files}
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+
+    def store(self, key, **arrays):
+        fd, tmp = tempfile.mkstemp(dir=self.dir, suffix=".npz")
+        os.close(fd)
+        np.savez(tmp, **arrays)
+        os.replace(tmp, self.dir / f"{key}.npz")
@@ -12,15 +12,49 @@ The script will:
 - Convert to proper format (16kHz mono WAV)
 - Split on silence to get individual samples
 - Save to samples/positive/
+
+Splitting runs in-process with NumPy by default. Use --splitter sox for
+the original sox-based split. Use --stream for very long recordings:
+the input is read in blocks and clips are written as they are found,
+so memory use stays constant however long the recording is.
+
+Several recordings (or folders of them) are processed in parallel, one
+process per core (--jobs N). Each job works in its own temp directory
+and claims output numbers atomically, so concurrent runs never collide.
 """
 
+import argparse
+import shutil
 import subprocess
 import sys
 import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-def process_recording(input_file, output_dir="samples/positive", prefix="real"):
-    """Process an iPhone recording into individual samples"""
+from audio_convert import TARGET_RATE, write_wav
+from dataset_index import register_clips
+from instrumentation import add_trace_arguments, sampled, span, start_trace
+from sample_numbering import SampleNumbering
+from segmentation import (StreamingSegmenter, decode_recording, find_segments,
+                          keep_segment, stream_recording)
+from synth_engine import add_jobs_argument
+
+SPLITTERS = ["numpy", "sox"]
+AUDIO_EXTENSIONS = {".m4a", ".wav", ".mp3", ".aac", ".caf", ".aiff", ".flac", ".ogg"}
+
+def register(saved, input_path):
+    """Record the clips cut from one recording in the dataset index"""
+    register_clips(saved, "process_iphone_recordings", [{"recording": input_path.name}] * len(saved))
+
+def process_recording(input_file, output_dir="samples/positive", prefix="real", splitter="numpy",
+                      stream=False, index=True):
+    """Process an iPhone recording into individual samples.
+    index=False leaves the dataset index alone (for scratch output)."""
+    if splitter == "sox":
+        return process_recording_sox(input_file, output_dir, prefix, index)
+    if stream:
+        return process_recording_streaming(input_file, output_dir, prefix, index)
     
     input_path = Path(input_file)
     output_path = Path(output_dir)
@@ -32,71 +66,181 @@ def process_recording(input_file, output_dir="samples/positive", prefix="real"):
     
     print(f"🎤 Processing: {input_path.name}")
     
-    # Count existing real samples to continue numbering
-    existing = list(output_path.glob(f"{prefix}_*.wav"))
-    start_num = len(existing)
-    
-    # Step 1: Convert to WAV (16kHz mono)
-    temp_wav = output_path / "temp_full.wav"
-    print("  Converting to WAV...")
-    subprocess.run([
-        'sox', str(input_path),
-        '-r', '16000',
-        '-c', '1',
-        '-b', '16',
-        str(temp_wav)
-    ], check=True, capture_output=True)
-    
-    # Step 2: Split on silence
+    numbering = SampleNumbering(output_path, prefix)
+    
+    # Step 1: Decode once to 16kHz mono samples in memory
+    print("  Decoding...")
+    with span("decode"):
+        samples = decode_recording(input_path)
+    
+    # Step 2: Find utterances and keep those within the duration window
     print("  Splitting on silence...")
-    output_pattern = output_path / f"{prefix}_{start_num:04d}_.wav"
-    
-    # Sox silence command to split on pauses
-    subprocess.run([
-        'sox', str(temp_wav),
-        str(output_path / f"{prefix}_.wav"),
-        'silence', '1', '0.1', '1%',  # Strip leading silence
-        '1', '0.3', '1%',              # Split on 0.3s silence
-        ':', 'newfile', ':', 'restart'
-    ], check=True, capture_output=True)
-    
-    # Clean up temp file
-    temp_wav.unlink()
-    
-    # Rename split files with proper numbering
-    split_files = sorted(output_path.glob(f"{prefix}_*.wav"))
-    renamed_count = 0
-    
-    for i, f in enumerate(split_files):
-        # Skip very short files (< 0.3 seconds = likely noise)
-        result = subprocess.run(
-            ['sox', '--i', '-D', str(f)],
-            capture_output=True, text=True
-        )
-        duration = float(result.stdout.strip())
+    with span("split"), sampled("split"):
+        segments = [(s, e) for s, e in find_segments(samples) if keep_segment(s, e)]
+    
+    saved = []
+    with span("write clips", clips=len(segments)):
+        for start, end in segments:
+            clip = samples[start:end]
+            saved.append(numbering.save(lambda tmp: write_wav(tmp, clip, TARGET_RATE)))
+        if index:
+            register(saved, input_path)
+    
+    print(f"✅ Extracted {len(segments)} samples!")
+    print(f"   Saved to: {output_path}/")
+    
+    return len(segments)
+
+def process_recording_streaming(input_file, output_dir="samples/positive", prefix="real",
+                                index=True):
+    """Process a (long) recording block by block, writing clips as they finish"""
+    
+    input_path = Path(input_file)
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    if not input_path.exists():
+        print(f"❌ File not found: {input_file}")
+        return
+    
+    print(f"🎤 Processing (streaming): {input_path.name}")
+    
+    numbering = SampleNumbering(output_path, prefix)
+    segmenter = StreamingSegmenter()
+    count = 0
+    saved = []
+    
+    def save(segments):
+        nonlocal count
+        for start, end, clip in segments:
+            if clip is None or not keep_segment(start, end):
+                continue
+            saved.append(numbering.save(lambda tmp: write_wav(tmp, clip, TARGET_RATE)))
+            count += 1
+    
+    with span("stream and split"), sampled("stream and split"):
+        for block in stream_recording(input_path):
+            save(segmenter.feed(block))
+        save(segmenter.flush())
+    if index:
+        register(saved, input_path)
+    
+    print(f"✅ Extracted {count} samples!")
+    print(f"   Saved to: {output_path}/")
+    
+    return count
+
+def process_recording_sox(input_file, output_dir="samples/positive", prefix="real", index=True):
+    """Process an iPhone recording by splitting with the sox silence effect"""
+    
+    input_path = Path(input_file)
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    if not input_path.exists():
+        print(f"❌ File not found: {input_file}")
+        return
+    
+    print(f"🎤 Processing: {input_path.name}")
+    
+    numbering = SampleNumbering(output_path, prefix)
+    saved = []
+    
+    # Private scratch space next to the output (same filesystem for renames)
+    work_dir = Path(tempfile.mkdtemp(prefix=".ingest-", dir=output_path))
+    try:
+        # Step 1: Convert to WAV (16kHz mono)
+        temp_wav = work_dir / "temp_full.wav"
+        print("  Converting to WAV...")
+        subprocess.run([
+            'sox', str(input_path),
+            '-r', '16000',
+            '-c', '1',
+            '-b', '16',
+            str(temp_wav)
+        ], check=True, capture_output=True)
+        
+        # Step 2: Split on silence
+        print("  Splitting on silence...")
+        
+        # Sox silence command to split on pauses
+        subprocess.run([
+            'sox', str(temp_wav),
+            str(work_dir / "split_.wav"),
+            'silence', '1', '0.1', '1%',  # Strip leading silence
+            '1', '0.3', '1%',              # Split on 0.3s silence
+            ':', 'newfile', ':', 'restart'
+        ], check=True, capture_output=True)
         
-        if duration < 0.3:
-            f.unlink()  # Remove too-short samples
-            continue
+        # Clean up temp file
+        temp_wav.unlink()
         
-        if duration > 3.0:
-            f.unlink()  # Remove too-long samples (probably multiple words)
-            continue
+        # Move split files into place with proper numbering
+        split_files = sorted(work_dir.glob("split_*.wav"))
+        renamed_count = 0
         
-        new_name = output_path / f"{prefix}_{start_num + renamed_count:04d}.wav"
-        f.rename(new_name)
-        renamed_count += 1
+        for f in split_files:
+            # Skip very short files (< 0.3 seconds = likely noise)
+            result = subprocess.run(
+                ['sox', '--i', '-D', str(f)],
+                capture_output=True, text=True
+            )
+            duration = float(result.stdout.strip())
+            
+            if duration < 0.3:
+                continue  # Too short
+            
+            if duration > 3.0:
+                continue  # Too long (probably multiple words)
+            
+            saved.append(numbering.save(lambda tmp: os.replace(f, tmp)))
+            renamed_count += 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    if index:
+        register(saved, input_path)
     
     print(f"✅ Extracted {renamed_count} samples!")
     print(f"   Saved to: {output_path}/")
     
     return renamed_count
 
+def expand_recordings(paths):
+    """Expand folders into the audio files they contain (sorted)"""
+    recordings = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            recordings += sorted(f for f in p.iterdir()
+                                 if f.suffix.lower() in AUDIO_EXTENSIONS and not f.name.startswith("."))
+        else:
+            recordings.append(p)
+    return recordings
+
+def ingest(input_file, splitter="numpy", stream=False):
+    """Worker entry point: process one recording, reporting failures"""
+    try:
+        with span("ingest recording", cat="item", recording=Path(input_file).name):
+            return process_recording(input_file, splitter=splitter, stream=stream)
+    except Exception as e:
+        print(f"❌ Failed: {Path(input_file).name} - {e}")
+        return None
+
 def main():
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(description="Split recordings into wake word samples")
+    parser.add_argument("recordings", nargs="*", help="recordings or folders of recordings")
+    parser.add_argument("--splitter", choices=SPLITTERS, default="numpy",
+                        help="silence splitting backend (default: numpy, in-process)")
+    parser.add_argument("--stream", action="store_true",
+                        help="read long recordings in blocks with constant memory")
+    add_jobs_argument(parser, "recordings processed in parallel")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("process_iphone_recordings", args)
+    
+    if not args.recordings:
         print("🎤 Hey Arnie - iPhone Recording Processor")
         print("=" * 45)
-        print("\nUsage: python process_iphone_recordings.py <recording.m4a>")
+        print("\nUsage: python process_iphone_recordings.py <recording.m4a|folder> ... [--jobs N] [--splitter numpy|sox] [--stream]")
         print("\nTips for recording on iPhone:")
         print("  1. Open Voice Memos app")
         print("  2. Start recording")
@@ -110,8 +254,25 @@ def main():
         print("  - Get Angela and Alden to record too!")
         return
     
-    for input_file in sys.argv[1:]:
-        process_recording(input_file)
+    recordings = expand_recordings(args.recordings)
+    workers = max(1, min(args.jobs, len(recordings)))
+    
+    if workers == 1:
+        counts = [ingest(f, args.splitter, args.stream) for f in recordings]
+    else:
+        print(f"⚡ Processing {len(recordings)} recordings with {workers} workers\n")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(ingest, recordings,
+                                   [args.splitter] * len(recordings),
+                                   [args.stream] * len(recordings)))
+    
+    if len(recordings) > 1:
+        failed = sum(1 for c in counts if c is None)
+        print(f"\n✅ {sum(c or 0 for c in counts)} samples from {len(recordings) - failed} recordings")
+        if failed:
+            print(f"⚠️  {failed} recordings failed")
+    if any(c is None for c in counts):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
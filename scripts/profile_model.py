@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Model Profiler
+Will the model fit the device, how fast is it, and what does quantization cost?
+
+Reads the .tflite flatbuffer directly (this part needs no TFLite runtime)
+and reports:
+- parameter bytes: constant tensors (weights, biases), which go in flash
+- arena: the tensor arena micro_wake_word needs. Activations are planned
+  the way TFLite Micro plans them (greedily, by size and lifetime), plus
+  the streaming state variables. Kernel scratch buffers and TFLite
+  Micro's own bookkeeping (a few KB) aren't counted.
+- MACs per op and per model call, and anything that would stop
+  micro_wake_word from loading the model (--esphome makes that an error)
+It also times each model call on this machine, and it measures accuracy
+when held-out positives exist. Accuracy is the recommended setting's
+FA/hour and FRR, the same as evaluate_model.py (and it shares its cache).
+
+Given several variants of one model (float, int8, int8 weights with
+16-bit activations, ...), it compares them side by side. Any variant
+over a budget (--max-size, --max-arena, --max-latency, --max-frr) makes
+it exit 1.
+
+Usage: python scripts/profile_model.py trained_model/hey_arnie.tflite
+       python scripts/profile_model.py int8.tflite float.tflite int16x8.tflite --max-frr 0.05
+"""
+
+import argparse
+import json
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from evaluate_model import TARGET_FA_PER_HOUR, compute_probabilities, recommend, sweep
+from frontend import FEATURE_CHANNELS, STEP_SAMPLES, SAMPLE_RATE
+from instrumentation import add_trace_arguments, span, start_trace
+from process_iphone_recordings import expand_recordings
+from stream_detector import DEFAULT_MODEL, StreamingModel
+from synth_engine import add_jobs_argument
+
+# Budgets: comfortably above the stock micro_wake_word models. Set your own for a tighter device.
+DEFAULT_MAX_SIZE = 128 * 1024
+DEFAULT_MAX_ARENA = 64 * 1024
+LATENCY_STEPS = 2000      # Timed model calls per variant
+WARMUP_STEPS = 50
+ALIGNMENT = 16            # TFLite Micro aligns arena buffers to 16 bytes
+
+# TensorType -> (name, bytes per element). Resource handles hold no data in the arena.
+TENSOR_TYPES = {0: ("float32", 4), 1: ("float16", 2), 2: ("int32", 4), 3: ("uint8", 1),
+                4: ("int64", 8), 6: ("bool", 1), 7: ("int16", 2), 9: ("int8", 1),
+                10: ("float64", 8), 13: ("resource", 0), 15: ("uint32", 4), 16: ("uint16", 2)}
+
+# BuiltinOperator codes for the ops wake word models use (others print as BUILTIN_<code>)
+BUILTIN_OPS = {0: "ADD", 1: "AVERAGE_POOL_2D", 2: "CONCATENATION", 3: "CONV_2D",
+               4: "DEPTHWISE_CONV_2D", 6: "DEQUANTIZE", 9: "FULLY_CONNECTED", 14: "LOGISTIC",
+               17: "MAX_POOL_2D", 18: "MUL", 19: "RELU", 21: "RELU6", 22: "RESHAPE",
+               25: "SOFTMAX", 28: "TANH", 32: "CUSTOM", 34: "PAD", 39: "TRANSPOSE", 40: "MEAN",
+               41: "SUB", 43: "SQUEEZE", 45: "STRIDED_SLICE", 49: "SPLIT", 65: "SLICE",
+               70: "EXPAND_DIMS", 83: "PACK", 88: "UNPACK", 102: "SPLIT_V", 114: "QUANTIZE",
+               126: "BATCH_MATMUL", 129: "CALL_ONCE", 142: "VAR_HANDLE", 143: "READ_VARIABLE",
+               144: "ASSIGN_VARIABLE"}
+CUSTOM = 32
+
+# The op resolver micro_wake_word builds on the device: any other op fails to load
+ESPHOME_OPS = {"CALL_ONCE", "VAR_HANDLE", "RESHAPE", "READ_VARIABLE", "STRIDED_SLICE",
+               "CONCATENATION", "ASSIGN_VARIABLE", "CONV_2D", "MUL", "ADD", "MEAN",
+               "FULLY_CONNECTED", "LOGISTIC", "QUANTIZE", "DEPTHWISE_CONV_2D", "AVERAGE_POOL_2D",
+               "MAX_POOL_2D", "PAD", "PACK", "SPLIT_V"}
+WEIGHTED_OPS = {"CONV_2D", "DEPTHWISE_CONV_2D", "FULLY_CONNECTED", "BATCH_MATMUL"}
+
+
+def _u32(buf, pos):
+    return struct.unpack_from("<I", buf, pos)[0]
+
+
+class _Table:
+    """A flatbuffer table: just enough of the format to read a .tflite model"""
+
+    def __init__(self, buf, pos):
+        self.buf, self.pos = buf, pos
+        self.vtable = pos - struct.unpack_from("<i", buf, pos)[0]
+        self.vtable_size = struct.unpack_from("<H", buf, self.vtable)[0]
+
+    def _offset(self, field):
+        entry = 4 + 2 * field
+        if entry >= self.vtable_size:
+            return 0
+        return struct.unpack_from("<H", self.buf, self.vtable + entry)[0]
+
+    def _target(self, field):
+        """Where an offset field (vector, string, table) points, or None if absent"""
+        offset = self._offset(field)
+        if not offset:
+            return None
+        return self.pos + offset + _u32(self.buf, self.pos + offset)
+
+    def scalar(self, field, fmt, default=0):
+        offset = self._offset(field)
+        return struct.unpack_from("<" + fmt, self.buf, self.pos + offset)[0] if offset else default
+
+    def length(self, field):
+        at = self._target(field)
+        return 0 if at is None else _u32(self.buf, at)
+
+    def vector(self, field, fmt):
+        at = self._target(field)
+        if at is None:
+            return []
+        return list(struct.unpack_from(f"<{_u32(self.buf, at)}{fmt}", self.buf, at + 4))
+
+    def tables(self, field):
+        at = self._target(field)
+        if at is None:
+            return []
+        slots = range(at + 4, at + 4 + 4 * _u32(self.buf, at), 4)
+        return [_Table(self.buf, slot + _u32(self.buf, slot)) for slot in slots]
+
+    def string(self, field):
+        at = self._target(field)
+        if at is None:
+            return ""
+        return self.buf[at + 4:at + 4 + _u32(self.buf, at)].decode("utf-8", "replace")
+
+
+def read_model(path):
+    """Tensors and ops of a .tflite model's main subgraph, read from its flatbuffer"""
+    buf = Path(path).read_bytes()
+    if buf[4:8] != b"TFL3":
+        raise ValueError(f"{path} is not a TFLite model")
+    model = _Table(buf, _u32(buf, 0))
+    codes = []
+    for code in model.tables(1):
+        # Old files only set the byte-sized deprecated code; new ones set both
+        builtin = max(code.scalar(0, "b"), code.scalar(3, "i"))
+        codes.append(code.string(1) if builtin == CUSTOM
+                     else BUILTIN_OPS.get(builtin, f"BUILTIN_{builtin}"))
+    # Data inline, or (models over 2GB) an offset/size pair
+    buffers = [b.length(0) or b.scalar(2, "Q") for b in model.tables(4)]
+    graphs = model.tables(2)
+
+    tensors = []
+    for t in graphs[0].tables(0):
+        kind, itemsize = TENSOR_TYPES.get(t.scalar(1, "b"), (f"type{t.scalar(1, 'b')}", 1))
+        shape = t.vector(0, "i")
+        buffer = t.scalar(2, "I")
+        tensors.append({"name": t.string(3), "shape": shape, "type": kind,
+                        "bytes": int(np.prod([max(d, 1) for d in shape])) * itemsize,
+                        "constant": buffer < len(buffers) and buffers[buffer] > 0,
+                        "variable": bool(t.scalar(5, "B"))})
+    ops = [{"op": codes[op.scalar(0, "I")],
+            "inputs": [i for i in op.vector(1, "i") if i >= 0],
+            "outputs": op.vector(2, "i")} for op in graphs[0].tables(3)]
+    return {"file_bytes": len(buf), "parameter_bytes": sum(buffers), "tensors": tensors,
+            "ops": ops, "inputs": graphs[0].vector(1, "i"), "outputs": graphs[0].vector(2, "i"),
+            "all_ops": sorted({codes[op.scalar(0, "I")] for g in graphs for op in g.tables(3)})}
+
+
+def arena_buffers(model):
+    """(aligned bytes, first op, last op) for every tensor that lives in the arena"""
+    ops, tensors = model["ops"], model["tensors"]
+    first, last = {i: 0 for i in model["inputs"]}, {}
+    for k, op in enumerate(ops):
+        for i in op["outputs"]:
+            first.setdefault(i, k)
+        for i in op["inputs"]:
+            last[i] = k
+    for i in model["outputs"]:
+        last[i] = len(ops) - 1
+    buffers = []
+    for i, t in enumerate(tensors):
+        if i not in first or t["constant"] or t["variable"] or not t["bytes"]:
+            continue
+        size = -(-t["bytes"] // ALIGNMENT) * ALIGNMENT
+        buffers.append((size, first[i], max(last.get(i, first[i]), first[i])))
+    return buffers
+
+
+def plan_arena(buffers):
+    """Arena bytes for the activations, placed largest first at the lowest
+    offset that doesn't overlap a buffer alive at the same time (as
+    TFLite Micro's GreedyMemoryPlanner does)"""
+    placed, size_needed = [], 0
+    for size, first, last in sorted(buffers, key=lambda b: -b[0]):
+        alive = sorted((offset, offset + s) for offset, s, f, l in placed if f <= last and first <= l)
+        offset = 0
+        for start, end in alive:
+            if start >= offset + size:
+                break  # Fits in the gap before this one
+            offset = max(offset, end)
+        placed.append((offset, size, first, last))
+        size_needed = max(size_needed, offset + size)
+    return size_needed
+
+
+def peak_live(buffers, op_count):
+    """Most activation bytes alive at once (what no planner can go below)"""
+    return max((sum(size for size, f, l in buffers if f <= k <= l) for k in range(op_count)), default=0)
+
+
+def state_bytes(model):
+    """Streaming state kept between calls: resource variables plus variable tensors"""
+    tensors = model["tensors"]
+    assigned = sum(tensors[op["inputs"][1]]["bytes"] for op in model["ops"]
+                   if op["op"] == "ASSIGN_VARIABLE" and len(op["inputs"]) > 1)
+    return assigned + sum(t["bytes"] for t in tensors if t["variable"])
+
+
+def op_macs(op, tensors):
+    """Multiply-accumulates for one op (0 for ops without weights)"""
+    if op["op"] not in WEIGHTED_OPS or len(op["inputs"]) < 2 or not op["outputs"]:
+        return 0
+    out = int(np.prod(tensors[op["outputs"][0]]["shape"]))
+    data, weights = tensors[op["inputs"][0]]["shape"], tensors[op["inputs"][1]]["shape"]
+    if op["op"] == "CONV_2D":              # filter [out, h, w, in]
+        return out * int(np.prod(weights[1:]))
+    if op["op"] == "DEPTHWISE_CONV_2D":    # filter [1, h, w, channels]
+        return out * int(np.prod(weights[1:3]))
+    if op["op"] == "FULLY_CONNECTED":      # weights [units, in]
+        return out * weights[-1]
+    return out * data[-1]                  # BATCH_MATMUL
+
+
+def precision(model):
+    """'float', 'int8', 'int16x8' (16-bit activations), 'int8 weights' (float activations) or 'mixed'"""
+    tensors = model["tensors"]
+    ops = [op for op in model["ops"] if op["op"] in WEIGHTED_OPS and len(op["inputs"]) > 1]
+    activations = {tensors[op["inputs"][0]]["type"] for op in ops}
+    weights = {tensors[op["inputs"][1]]["type"] for op in ops}
+    names = {("float32", "float32"): "float", ("int8", "int8"): "int8",
+             ("int16", "int8"): "int16x8", ("float32", "int8"): "int8 weights"}
+    if len(activations) == 1 and len(weights) == 1:
+        return names.get((activations.pop(), weights.pop()), "mixed")
+    return "mixed" if ops else "none"
+
+
+def esphome_problems(model):
+    """Reasons micro_wake_word would refuse to load the model (empty if none)"""
+    problems = []
+    unsupported = [op for op in model["all_ops"] if op not in ESPHOME_OPS]
+    if unsupported:
+        problems.append(f"ops micro_wake_word doesn't register: {', '.join(unsupported)}")
+    inp = model["tensors"][model["inputs"][0]]
+    out = model["tensors"][model["outputs"][0]]
+    if inp["type"] != "int8" or len(inp["shape"]) != 3 or inp["shape"][2] != FEATURE_CHANNELS:
+        problems.append(f"input is {inp['type']} {inp['shape']}, "
+                        f"not int8 [1, stride, {FEATURE_CHANNELS}]")
+    if out["type"] != "uint8" or list(out["shape"]) != [1, 1]:
+        problems.append(f"output is {out['type']} {out['shape']}, not uint8 [1, 1]")
+    return problems
+
+
+def profile(path):
+    """Everything the flatbuffer says about a model"""
+    model = read_model(path)
+    tensors = model["tensors"]
+    buffers = arena_buffers(model)
+    rows = []
+    for k, op in enumerate(model["ops"]):
+        out = tensors[op["outputs"][0]] if op["outputs"] else {"shape": [], "type": ""}
+        rows.append({"index": k, "op": op["op"], "shape": list(out["shape"]), "type": out["type"],
+                     "parameter_bytes": sum(tensors[i]["bytes"] for i in op["inputs"]
+                                            if tensors[i]["constant"]),
+                     "macs": op_macs(op, tensors)})
+    activations = plan_arena(buffers)
+    state = state_bytes(model)
+    return {"file_bytes": model["file_bytes"], "parameter_bytes": model["parameter_bytes"],
+            "activation_bytes": activations, "peak_live_bytes": peak_live(buffers, len(model["ops"])),
+            "state_bytes": state, "arena_bytes": activations + state,
+            "macs": sum(r["macs"] for r in rows), "precision": precision(model),
+            "esphome_problems": esphome_problems(model), "ops": rows}
+
+
+def step_latency(path, steps=LATENCY_STEPS):
+    """Per-call seconds on this machine, one call per 'stride' feature frames"""
+    model = StreamingModel(path)
+    rng = np.random.default_rng(0)
+    # Roughly the frontend's value range, so quantized inputs aren't all clipped
+    features = rng.uniform(0, 26, (model.stride * (WARMUP_STEPS + steps), FEATURE_CHANNELS))
+    blocks = features.reshape(-1, model.stride, FEATURE_CHANNELS)
+    clock = time.perf_counter
+    times = []
+    for block in blocks[:WARMUP_STEPS]:
+        model.process_features(block)
+    for block in blocks[WARMUP_STEPS:]:
+        start = clock()
+        model.process_features(block)
+        times.append(clock() - start)
+    return model.stride, np.asarray(times)
+
+
+def accuracy(path, negatives, positives, jobs, frontend, use_cache, target):
+    """The recommended setting's (cutoff, window, FA/hour, FRR) on held-out audio"""
+    neg, hours, pos = compute_probabilities(path, negatives, positives, jobs, frontend, use_cache)
+    rows = sweep(neg, hours, pos, stride=StreamingModel(path).stride)
+    cutoff, window, _, fa_hour, _, frr = recommend(rows, target)
+    return {"cutoff": cutoff, "window": window, "fa_per_hour": fa_hour, "frr": frr}
+
+
+def kb(n):
+    return f"{n / 1024:.1f}K"
+
+
+def print_ops(name, report):
+    print(f"\n{name} ({report['precision']})")
+    print(f"{'#':>3} {'op':20} {'output':18} {'type':8} {'params':>8} {'MACs':>10}")
+    for r in report["ops"]:
+        shape = "x".join(str(d) for d in r["shape"])
+        print(f"{r['index']:3d} {r['op'][:20]:20} {shape[:18]:18} {r['type']:8} "
+              f"{kb(r['parameter_bytes']) if r['parameter_bytes'] else '':>8} "
+              f"{r['macs'] if r['macs'] else '':>10}")
+
+
+def over_budget(name, report, args):
+    """What this variant exceeds, as printable lines"""
+    problems = []
+    if args.max_size is not None and report["file_bytes"] > args.max_size:
+        problems.append(f"model size {kb(report['file_bytes'])} > {kb(args.max_size)}")
+    if args.max_arena is not None and report["arena_bytes"] > args.max_arena:
+        problems.append(f"arena {kb(report['arena_bytes'])} > {kb(args.max_arena)}")
+    latency = report.get("latency")
+    if args.max_latency is not None and latency and latency["p99_ms"] > args.max_latency:
+        problems.append(f"p99 call {latency['p99_ms']:.3f}ms > {args.max_latency}ms")
+    quality = report.get("accuracy")
+    if args.max_frr is not None and quality and quality["frr"] > args.max_frr:
+        problems.append(f"FRR {quality['frr']:.1%} > {args.max_frr:.1%} "
+                        f"at {quality['fa_per_hour']:.2f} FA/hour")
+    if args.esphome:
+        problems += report["esphome_problems"]
+    return [f"{name}: {p}" for p in problems]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Size, arena, MACs, latency and accuracy of wake word models")
+    parser.add_argument("models", nargs="*", default=[str(DEFAULT_MODEL)],
+                        help=f"one model or several variants of it (default {DEFAULT_MODEL})")
+    parser.add_argument("--ops", action="store_true",
+                        help="print the per-op table for every model (always shown for one)")
+    parser.add_argument("--max-size", type=int, default=DEFAULT_MAX_SIZE,
+                        help=f"model file budget in bytes (default {DEFAULT_MAX_SIZE})")
+    parser.add_argument("--max-arena", type=int, default=DEFAULT_MAX_ARENA,
+                        help=f"tensor arena budget in bytes (default {DEFAULT_MAX_ARENA})")
+    parser.add_argument("--max-latency", type=float, help="p99 ms per model call budget (after --scale)")
+    parser.add_argument("--max-frr", type=float, help="FRR budget at the recommended setting, e.g. 0.05")
+    parser.add_argument("--esphome", action="store_true",
+                        help="fail if micro_wake_word couldn't load a model")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply host timings by this (to estimate a slower CPU)")
+    parser.add_argument("--steps", type=int, default=LATENCY_STEPS, help="model calls to time")
+    parser.add_argument("--negatives", nargs="+", default=["samples/negative"],
+                        help="negative clips, long recordings, or folders of them")
+    parser.add_argument("--positives", nargs="+", default=["samples/holdout"],
+                        help="held-out positive clips or folders (not used for training)")
+    parser.add_argument("--target-fa-per-hour", type=float, default=TARGET_FA_PER_HOUR)
+    parser.add_argument("--frontend", choices=["micro", "numpy"], default=None)
+    parser.add_argument("--no-accuracy", action="store_true", help="skip the held-out evaluation")
+    parser.add_argument("--no-latency", action="store_true",
+                        help="skip timing (no TFLite runtime needed)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="recompute probabilities instead of using the cache")
+    parser.add_argument("--json", help="write the full report to this file")
+    add_jobs_argument(parser, "parallel model processes for the accuracy pass")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("profile_model", args)
+
+    print("📏 HEY ARNIE - Model Profiler")
+    print("=" * 45)
+
+    names = [Path(m).name for m in args.models]
+    if len(set(names)) != len(names):
+        names = [str(m) for m in args.models]
+    reports = {}
+    for path, name in zip(args.models, names):
+        try:
+            with span("parse", model=name):
+                reports[name] = profile(path)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"❌ {path}: {e}")
+            sys.exit(1)
+
+    if not args.no_latency:
+        for path, name in zip(args.models, names):
+            with span("latency", model=name):
+                stride, times = step_latency(path, args.steps)
+            times = times * args.scale
+            reports[name]["latency"] = {
+                "stride": stride, "mean_ms": float(times.mean() * 1000),
+                "p50_ms": float(np.percentile(times, 50) * 1000),
+                "p99_ms": float(np.percentile(times, 99) * 1000),
+                "load": float(times.mean() / (stride * STEP_SAMPLES / SAMPLE_RATE))}
+
+    positives = [] if args.no_accuracy else expand_recordings(args.positives)
+    if not args.no_accuracy and not positives:
+        print(f"⚠️  No held-out positives in {' '.join(args.positives)} - skipping accuracy")
+    if positives:
+        negatives = expand_recordings(args.negatives)
+        for path, name in zip(args.models, names):
+            with span("accuracy", model=name):
+                reports[name]["accuracy"] = accuracy(path, negatives, positives, args.jobs,
+                                                     args.frontend, not args.no_cache,
+                                                     args.target_fa_per_hour)
+
+    for name, report in reports.items():
+        if len(reports) == 1 or args.ops:
+            print_ops(name, report)
+
+    print(f"\n{'':20} {'type':>12} {'file':>7} {'params':>7} {'arena':>7} {'MACs':>9} "
+          f"{'call':>8} {'p99':>8} {'load':>6} {'FA/h':>5} {'FRR':>6}  ESPHome")
+    for name, r in reports.items():
+        latency, quality = r.get("latency"), r.get("accuracy")
+        timing = (f"{latency['mean_ms']:6.3f}ms {latency['p99_ms']:6.3f}ms {latency['load']:6.2%}"
+                  if latency else f"{'':8} {'':8} {'':6}")
+        scores = (f"{quality['fa_per_hour']:5.2f} {quality['frr']:6.1%}" if quality
+                  else f"{'':5} {'':6}")
+        print(f"{name[:20]:20} {r['precision']:>12} {kb(r['file_bytes']):>7} "
+              f"{kb(r['parameter_bytes']):>7} {kb(r['arena_bytes']):>7} {r['macs']:9d} "
+              f"{timing} {scores}  {'✅' if not r['esphome_problems'] else '❌'}")
+    for name, r in reports.items():
+        print(f"\n{name}: arena {kb(r['arena_bytes'])} = {kb(r['activation_bytes'])} activations "
+              f"(peak live {kb(r['peak_live_bytes'])}) + {kb(r['state_bytes'])} streaming state")
+        if r["esphome_problems"]:
+            print(f"   ⚠️  micro_wake_word can't load it: {'; '.join(r['esphome_problems'])}")
+    if args.scale != 1.0:
+        print(f"\n(timings x{args.scale:g})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(reports, f, indent=1)
+        print(f"\n📄 Wrote {args.json}")
+
+    problems = [p for name, r in reports.items() for p in over_budget(name, r, args)]
+    if problems:
+        print("\n❌ Checks failed:")
+        for problem in problems:
+            print(f"   {problem}")
+        sys.exit(1)
+    print("\n✅ Within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,36 +4,52 @@ Hey Arnie - Direct Mac Recording
 Record wake word samples directly from your Mac's microphone
 
 Usage: python record_samples_mac.py [--negative]
+       python record_samples_mac.py --continuous [--count 200]
+       python record_samples_mac.py --continuous --input session.wav [--fast]
 
 Controls:
-  SPACE  = Record a sample (hold while speaking)
-  S      = Skip / mark bad take
-  Q      = Quit and save
+  SPACE/ENTER = Record a sample (just start talking - it stops when you do)
+  Q           = Quit and save
+
+The microphone stays open for the whole session (see live_capture.py),
+so there is no countdown and no fixed-length recording: each take is
+trimmed to your speech as you say it and saved in the background.
+
+--continuous is hands-free: keep repeating the phrase with a short
+pause in between and every utterance is saved as it finishes, split by
+the same rules process_iphone_recordings.py uses. A live counter and
+level meter show progress; Ctrl+C stops. --input plays a WAV file in
+place of the microphone (no audio device or sounddevice needed).
 """
 
+import argparse
 import subprocess
 import sys
-import os
 import time
-import tempfile
 from pathlib import Path
 
-# Check for required dependencies
-try:
-    import sounddevice as sd
-    import soundfile as sf
-    import numpy as np
-except ImportError:
-    print("📦 Installing required packages...")
-    subprocess.check_call([sys.executable, "-m", "pip", "install", 
-                          "sounddevice", "soundfile", "numpy", "-q"])
-    import sounddevice as sd
-    import soundfile as sf
-    import numpy as np
+import numpy as np
+
+from instrumentation import add_trace_arguments, start_trace
+from live_capture import ClipWriter, LiveRecorder
+from sample_numbering import SampleNumbering, highest_number
 
 # Configuration
 SAMPLE_RATE = 16000  # Required for microWakeWord
-CHANNELS = 1         # Mono
+METER_WIDTH = 24
+METER_FLOOR_DB = -60.0
+STATUS_SECONDS = 0.1  # Status line refresh interval
+
+def require_sounddevice():
+    """Import sounddevice, installing it first if needed (only the microphone needs it)"""
+    try:
+        import sounddevice as sd
+    except ImportError:
+        print("📦 Installing required packages...")
+        subprocess.check_call([sys.executable, "-m", "pip", "install",
+                              "sounddevice", "-q"])
+        import sounddevice as sd
+    return sd
 
 def get_key():
     """Get a single keypress (macOS/Unix)"""
@@ -48,42 +64,7 @@ def get_key():
         termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
     return ch
 
-def record_sample(duration=2.0):
-    """Record audio for specified duration"""
-    print("🔴 RECORDING...", end=" ", flush=True)
-    audio = sd.rec(int(duration * SAMPLE_RATE), 
-                   samplerate=SAMPLE_RATE, 
-                   channels=CHANNELS,
-                   dtype='float32')
-    sd.wait()
-    print("✅ Done!")
-    return audio
-
-def record_while_held():
-    """Record while spacebar is held (push-to-talk style)"""
-    print("🔴 RECORDING (release SPACE to stop)...", end=" ", flush=True)
-    
-    frames = []
-    
-    # Start recording stream
-    with sd.InputStream(samplerate=SAMPLE_RATE, channels=CHANNELS, dtype='float32') as stream:
-        while True:
-            data, _ = stream.read(1024)
-            frames.append(data.copy())
-            
-            # Check if key released (non-blocking check is tricky, use timeout)
-            # For simplicity, record for max 3 seconds or until buffer
-            if len(frames) > int(SAMPLE_RATE * 3 / 1024):
-                break
-    
-    print("✅ Done!")
-    return np.concatenate(frames)
-
-def save_sample(audio, output_path):
-    """Save audio to WAV file"""
-    sf.write(output_path, audio, SAMPLE_RATE)
-
-def list_microphones():
+def list_microphones(sd):
     """List available input devices"""
     print("\n🎤 Available microphones:")
     devices = sd.query_devices()
@@ -93,77 +74,143 @@ def list_microphones():
             print(f"   [{i}] {dev['name']}{default}")
     print()
 
+def level_meter(level_db):
+    """A text bar for a dBFS level"""
+    filled = int(np.clip(1 - level_db / METER_FLOOR_DB, 0, 1) * METER_WIDTH)
+    return "█" * filled + "░" * (METER_WIDTH - filled)
+
+def record_on_keypress(recorder, writer, sample_num):
+    """One take per SPACE/ENTER until Q. Returns the number saved."""
+    recorded = 0
+    while True:
+        print(f"\n[Sample #{sample_num}] Press SPACE to record (Q to quit): ", end="", flush=True)
+
+        key = get_key()
+        print()  # New line after keypress
+
+        if key.lower() == 'q':
+            return recorded
+
+        if key in ['\r', '\n', ' ']:
+            print("🔴 Listening... say it now", end=" ", flush=True)
+            audio, problem = recorder.take()
+            if problem:
+                print(f"⏭️  Not saved: {problem}")
+                continue
+
+            # Written and indexed in the background while you record the next one
+            output_path = writer.save(audio)
+            print(f"💾 {output_path.name} ({len(audio)/SAMPLE_RATE:.2f}s)")
+            recorded += 1
+            sample_num = int(output_path.stem.split("_")[-1]) + 1
+
+def record_continuously(recorder, writer, count=None):
+    """Save every utterance until Ctrl+C, the input ends or 'count' are saved.
+    Returns the number saved."""
+    recorded = skipped = 0
+    started = time.monotonic()
+    last_status = 0.0
+    last_name = ""
+
+    def status(force=False):
+        nonlocal last_status
+        now = time.monotonic()
+        if not force and now - last_status < STATUS_SECONDS:
+            return
+        last_status = now
+        elapsed = int(now - started)
+        print(f"\r🎙️  {level_meter(recorder.level())} {recorded:4d} saved, {skipped} skipped"
+              f"  {elapsed // 60:02d}:{elapsed % 60:02d}  {last_name:<14}", end="", flush=True)
+
+    try:
+        for audio, problem in recorder.utterances(tick=status):
+            if problem:
+                skipped += 1
+            else:
+                last_name = writer.save(audio).name
+                recorded += 1
+            status(force=True)
+            if count is not None and recorded >= count:
+                break
+    except KeyboardInterrupt:
+        pass
+    status(force=True)
+    print()
+    return recorded
+
 def main():
-    is_negative = "--negative" in sys.argv or "-n" in sys.argv
-    
+    parser = argparse.ArgumentParser(description="Record wake word samples from the microphone")
+    parser.add_argument("-n", "--negative", action="store_true",
+                        help="record negative samples (phrases that should not trigger)")
+    parser.add_argument("--continuous", action="store_true",
+                        help="hands-free: save every utterance as it finishes")
+    parser.add_argument("--count", type=int, help="with --continuous: stop after this many clips")
+    parser.add_argument("--device", type=int, help="input device number (see the list shown)")
+    parser.add_argument("--input", help="play this WAV file instead of using the microphone")
+    parser.add_argument("--fast", action="store_true",
+                        help="with --input: read the file as fast as possible, not in real time")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("record_samples_mac", args)
+
+    is_negative = args.negative
     sample_type = "NEGATIVE" if is_negative else "POSITIVE"
     output_dir = Path("samples/negative" if is_negative else "samples/positive")
     output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Count existing samples
-    existing = list(output_dir.glob("mac_*.wav"))
-    sample_num = len(existing)
-    
+
+    # Numbers are claimed atomically, so two sessions never overwrite each other
+    numbering = SampleNumbering(output_dir, "mac")
+    sample_num = highest_number(output_dir, "mac") + 1
+
     print("🎤 HEY ARNIE - Mac Recording Studio")
     print("=" * 45)
     print(f"Recording: {sample_type} samples")
     print(f"Output: {output_dir}/")
     print(f"Starting from sample #{sample_num}")
     print()
-    
-    list_microphones()
-    
+
+    if args.input:
+        print(f"🎧 Input: {args.input} (in place of the microphone)")
+    else:
+        list_microphones(require_sounddevice())
+
     if is_negative:
         print("📝 Say phrases that should NOT trigger 'Hey Arnie'")
         print("   Examples: 'hey honey', 'harmony', 'turn on lights'")
     else:
         print("📝 Say 'HEY ARNIE' clearly when recording")
         print("   Vary your tone, speed, and distance from mic!")
-    
+
     print()
-    print("Controls:")
-    print("  ENTER = Record 2-second sample")
-    print("  Q     = Quit")
+    if args.continuous:
+        print("Hands-free: repeat the phrase with a short pause in between.")
+        print("Every utterance is saved as you finish it. Ctrl+C to stop.")
+    else:
+        print("Controls:")
+        print("  SPACE/ENTER = Record (just start talking - it stops when you do)")
+        print("  Q           = Quit")
     print()
     print("Ready when you are! 💪")
     print("-" * 45)
-    
-    while True:
-        print(f"\n[Sample #{sample_num}] Press ENTER to record (Q to quit): ", end="", flush=True)
-        
-        key = get_key()
-        print()  # New line after keypress
-        
-        if key.lower() == 'q':
-            print(f"\n✅ Session complete! Recorded {sample_num - len(existing)} new samples.")
-            print(f"   Total in {output_dir}/: {sample_num}")
-            break
-        
-        if key in ['\r', '\n', ' ']:
-            # Countdown
-            for i in [3, 2, 1]:
-                print(f"   {i}...", end=" ", flush=True)
-                time.sleep(0.5)
-            print()
-            
-            # Record
-            audio = record_sample(duration=2.0)
-            
-            # Trim silence from start/end
-            threshold = 0.01
-            nonsilent = np.where(np.abs(audio) > threshold)[0]
-            if len(nonsilent) > 0:
-                start = max(0, nonsilent[0] - 1600)  # 0.1s padding
-                end = min(len(audio), nonsilent[-1] + 1600)
-                audio = audio[start:end]
-            
-            # Save
-            filename = f"mac_{sample_num:04d}.wav"
-            output_path = output_dir / filename
-            save_sample(audio, str(output_path))
-            
-            print(f"   💾 Saved: {filename} ({len(audio)/SAMPLE_RATE:.2f}s)")
-            sample_num += 1
+
+    meta = {"mode": "continuous" if args.continuous else "keypress"}
+    if args.input:
+        meta["recording"] = Path(args.input).name
+    writer = ClipWriter(numbering, "record_samples_mac", meta)
+    try:
+        with LiveRecorder(device=args.device, input_file=args.input,
+                          realtime=not args.fast) as recorder:
+            if args.continuous:
+                recorded = record_continuously(recorder, writer, args.count)
+            else:
+                recorded = record_on_keypress(recorder, writer, sample_num)
+            overflows = recorder.overflows
+    finally:
+        writer.close()
+
+    print(f"\n✅ Session complete! Recorded {recorded} new samples.")
+    if overflows:
+        print(f"⚠️  The input overflowed {overflows} times - some audio was dropped")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Sample Numbering
+Collision-free allocation of numbered sample files (real_0042.wav, ...)
+
+Counting existing files to pick the next number races as soon as two
+processes write into the same folder. Instead, each number is claimed
+by creating a hidden .real_0042.wav.part file with O_CREAT | O_EXCL,
+which the OS guarantees only one process can win. The clip is written
+into that file and moved into place with os.replace, so a crash or a
+failed write never leaves an empty or half-written real_0042.wav for
+training to pick up.
+"""
+
+import os
+import re
+from pathlib import Path
+
+NUMBER_WIDTH = 4
+
+
+def highest_number(directory, prefix):
+    """Highest N among <prefix>_N.wav files in directory (-1 if none)"""
+    pattern = re.compile(rf"^{re.escape(prefix)}_(\d+)\.wav$")
+    highest = -1
+    for entry in os.scandir(directory):
+        match = pattern.match(entry.name)
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest
+
+
+class SampleNumbering:
+    """Hands out <prefix>_NNNN.wav paths no other writer can also receive"""
+
+    def __init__(self, directory, prefix):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._next = highest_number(self.directory, prefix) + 1
+
+    def reserve(self):
+        """Atomically claim the next free number. Returns the clip's final path;
+        nothing is there until fill() moves the written clip into place."""
+        while True:
+            path = self.directory / f"{self.prefix}_{self._next:0{NUMBER_WIDTH}d}.wav"
+            self._next += 1
+            try:
+                fd = os.open(partial_path(path), os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            except FileExistsError:
+                continue  # Another writer is filling it
+            os.close(fd)
+            if path.exists():
+                # Another writer filled it since we scanned the folder
+                os.unlink(partial_path(path))
+                continue
+            return path
+
+    def fill(self, path, write):
+        """Call write(tmp_path) to write a reserved clip, then move it into place.
+        If writing fails the claim is removed and the error re-raised."""
+        tmp = partial_path(path)
+        try:
+            write(tmp)
+            os.replace(tmp, path)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        return path
+
+    def release(self, path):
+        """Give up a reserved number without writing it"""
+        partial_path(path).unlink(missing_ok=True)
+
+    def save(self, write):
+        """reserve() and fill() in one go. Returns the clip's path."""
+        return self.fill(self.reserve(), write)
+
+
+def partial_path(path):
+    """Where a reserved clip is written before it is moved into place"""
+    path = Path(path)
+    return path.with_name(f".{path.name}.part")
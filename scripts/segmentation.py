@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Silence Segmentation
+Splits 16kHz recordings into utterances in-process with NumPy
+
+Mirrors the sox effect the recording processor used to shell out to:
+    silence 1 0.1 1% 1 0.3 1% : newfile : restart
+An utterance starts once the level stays above 1% of full scale for
+0.1s, and ends when it stays below 1% for 0.3s. Levels are the RMS of
+10ms frames, computed for the whole recording at once.
+
+StreamingSegmenter applies the same rules to audio fed block by block,
+keeping only a small carry-over buffer, so hour-long recordings split
+in constant memory with identical segment boundaries.
+"""
+
+import subprocess
+
+import numpy as np
+
+from audio_convert import TARGET_RATE, read_wav, to_16k_mono
+
+FRAME_SECONDS = 0.01     # Energy frame (hop) length
+START_SECONDS = 0.1      # Above threshold this long to start an utterance
+STOP_SECONDS = 0.3       # Below threshold this long to end it
+THRESHOLD = 0.01         # 1% of full scale
+MIN_CLIP_SECONDS = 0.3   # Shorter clips are likely noise
+MAX_CLIP_SECONDS = 3.0   # Longer clips are probably multiple words
+
+
+def frame_length(rate=TARGET_RATE):
+    return int(round(rate * FRAME_SECONDS))
+
+
+def frame_rms(samples, frame_len):
+    """RMS level of each frame of int16 samples, as a fraction of full scale.
+    A trailing partial frame is zero-padded."""
+    samples = np.asarray(samples)
+    n_frames = -(-len(samples) // frame_len)
+    padded = np.zeros(n_frames * frame_len, dtype=np.float32)
+    padded[:len(samples)] = samples
+    frames = padded.reshape(n_frames, frame_len) / 32768.0
+    return np.sqrt(np.mean(frames * frames, axis=1))
+
+
+def runs(flags):
+    """Run-length encode a boolean array into (values, starts, lengths)"""
+    flags = np.asarray(flags, dtype=bool)
+    if len(flags) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return np.zeros(0, dtype=bool), empty, empty
+    starts = np.concatenate([[0], np.flatnonzero(flags[1:] != flags[:-1]) + 1])
+    lengths = np.diff(np.concatenate([starts, [len(flags)]]))
+    return flags[starts], starts, lengths
+
+
+def find_segments(samples, rate=TARGET_RATE, threshold=THRESHOLD,
+                  start_seconds=START_SECONDS, stop_seconds=STOP_SECONDS):
+    """Return (start, end) sample offsets of every utterance in samples"""
+    frame_len = frame_length(rate)
+    start_frames = int(round(start_seconds / FRAME_SECONDS))
+    stop_frames = int(round(stop_seconds / FRAME_SECONDS))
+
+    loud = frame_rms(samples, frame_len) > threshold
+    segments = []
+    seg_start = None
+    for value, start, length in zip(*runs(loud)):
+        if seg_start is None:
+            if value and length >= start_frames:
+                seg_start = start
+        elif not value and length >= stop_frames:
+            segments.append((seg_start, start))
+            seg_start = None
+    if seg_start is not None:
+        segments.append((seg_start, len(loud)))
+
+    return [(int(s) * frame_len, min(int(e) * frame_len, len(samples)))
+            for s, e in segments]
+
+
+def keep_segment(start, end, rate=TARGET_RATE):
+    """Duration filter applied to every utterance before it is saved"""
+    duration = (end - start) / rate
+    return MIN_CLIP_SECONDS <= duration <= MAX_CLIP_SECONDS
+
+
+class StreamingSegmenter:
+    """Finds utterances in audio fed block by block
+
+    feed() and flush() return (start, end, clip) tuples for utterances that
+    have finished. Offsets match find_segments() on the whole recording.
+    clip is None when the utterance is longer than max_seconds; its audio
+    is dropped as soon as that is certain, which bounds memory.
+    """
+
+    def __init__(self, rate=TARGET_RATE, threshold=THRESHOLD,
+                 start_seconds=START_SECONDS, stop_seconds=STOP_SECONDS,
+                 max_seconds=MAX_CLIP_SECONDS):
+        self.frame_len = frame_length(rate)
+        self.threshold = threshold
+        self.start_frames = int(round(start_seconds / FRAME_SECONDS))
+        self.stop_frames = int(round(stop_seconds / FRAME_SECONDS))
+        self.max_samples = None if max_seconds is None else int(max_seconds * rate)
+
+        self.frames = 0          # Complete frames processed
+        self.run_value = False   # Current (unfinished) run of loud/quiet frames
+        self.run_start = 0
+        self.run_len = 0
+        self.seg_start = None    # Frame where the open utterance started
+        self.overlong = False
+
+        self._partial = np.zeros(0, dtype=np.int16)  # Samples short of a frame
+        self._buf = np.zeros(0, dtype=np.int16)      # Audio from _buf_start on
+        self._buf_start = 0
+        self._consumed = 0
+
+    def _clip(self, start, end):
+        if self.overlong:
+            return None
+        return self._buf[start - self._buf_start:end - self._buf_start].copy()
+
+    def _advance(self, value, length, emitted):
+        """Extend the current run, applying start/stop rules as soon as
+        a run crosses its duration threshold."""
+        if self.run_len and value == self.run_value:
+            self.run_len += length
+        else:
+            self.run_value, self.run_start, self.run_len = value, self.frames, length
+        self.frames += length
+
+        if self.seg_start is None:
+            if self.run_value and self.run_len >= self.start_frames:
+                self.seg_start = self.run_start
+                self.overlong = False
+        elif not self.run_value and self.run_len >= self.stop_frames:
+            start = self.seg_start * self.frame_len
+            end = self.run_start * self.frame_len
+            emitted.append((start, end, self._clip(start, end)))
+            self.seg_start = None
+
+    def _trim(self):
+        """Drop buffered audio no future utterance can need"""
+        framed = self.frames * self.frame_len  # Partial-frame samples stay
+        if self.seg_start is not None:
+            origin = self.seg_start * self.frame_len
+            if self.max_samples is not None and not self.overlong:
+                # The utterance can end no earlier than the current quiet run
+                earliest_end = self.run_start if not self.run_value else self.frames
+                if (earliest_end - self.seg_start) * self.frame_len > self.max_samples:
+                    self.overlong = True
+            if self.overlong:
+                origin = framed
+        elif self.run_value:
+            origin = self.run_start * self.frame_len
+        else:
+            origin = framed
+        if origin > self._buf_start:
+            self._buf = self._buf[origin - self._buf_start:]
+            self._buf_start = origin
+
+    def feed(self, block):
+        """Add int16 samples. Returns utterances that finished in this block."""
+        block = np.asarray(block, dtype=np.int16)
+        self._buf = np.concatenate([self._buf, block])
+        self._consumed += len(block)
+
+        pending = np.concatenate([self._partial, block])
+        usable = len(pending) - len(pending) % self.frame_len
+        self._partial = pending[usable:]
+
+        emitted = []
+        loud = frame_rms(pending[:usable], self.frame_len) > self.threshold
+        for value, _, length in zip(*runs(loud)):
+            self._advance(bool(value), int(length), emitted)
+        self._trim()
+        return emitted
+
+    def flush(self):
+        """Finish the stream. Returns any utterance still open."""
+        emitted = []
+        if len(self._partial):
+            # Zero-padded final frame, as in find_segments()
+            loud = frame_rms(self._partial, self.frame_len) > self.threshold
+            self._advance(bool(loud[0]), 1, emitted)
+            self._partial = np.zeros(0, dtype=np.int16)
+        if self.seg_start is not None:
+            start = self.seg_start * self.frame_len
+            emitted.append((start, self._consumed, self._clip(start, self._consumed)))
+            self.seg_start = None
+        return emitted
+
+
+def stream_recording(path, block_seconds=10.0):
+    """Yield 16kHz mono int16 blocks of a recording without loading it all.
+    16kHz files soundfile can read are read directly; anything else is
+    decoded by a sox pipe that is consumed incrementally."""
+    block_size = int(block_seconds * TARGET_RATE)
+    try:
+        import soundfile as sf
+        info = sf.info(str(path))
+    except Exception:
+        info = None
+
+    if info is not None and info.samplerate == TARGET_RATE:
+        for block in sf.blocks(str(path), blocksize=block_size, dtype='int16', always_2d=True):
+            if block.shape[1] == 1:
+                yield block[:, 0]
+            else:
+                yield block.mean(axis=1).round().astype(np.int16)
+        return
+
+    proc = subprocess.Popen([
+        'sox', str(path),
+        '-t', 'raw',
+        '-r', str(TARGET_RATE),
+        '-c', '1',
+        '-b', '16',
+        '-e', 'signed-integer',
+        '-L',
+        '-'
+    ], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        leftover = b""
+        while True:
+            chunk = proc.stdout.read(block_size * 2)
+            if not chunk:
+                break
+            chunk = leftover + chunk
+            usable = len(chunk) - len(chunk) % 2
+            leftover = chunk[usable:]
+            yield np.frombuffer(chunk[:usable], dtype="<i2")
+    finally:
+        proc.stdout.close()
+        if proc.wait() != 0:
+            raise subprocess.CalledProcessError(proc.returncode, 'sox')
+
+
+def decode_recording(path, start=None, end=None):
+    """Decode any recording to 16kHz mono int16 samples in one pass.
+    WAVs are read directly; anything else is piped through sox.
+    With start/end (seconds), sox decodes only that piece of the file."""
+    path = str(path)
+    trim = [] if start is None else ['trim', str(start), f'={end}']
+    if path.lower().endswith(".wav") and not trim:
+        try:
+            samples, rate = read_wav(path)
+            return to_16k_mono(samples, rate)
+        except Exception:
+            pass  # Not plain PCM (e.g. float or extensible) - let sox handle it
+    result = subprocess.run([
+        'sox', path,
+        '-t', 'raw',
+        '-r', str(TARGET_RATE),
+        '-c', '1',
+        '-b', '16',
+        '-e', 'signed-integer',
+        '-L',
+        '-'
+    ] + trim, check=True, capture_output=True)
+    return np.frombuffer(result.stdout, dtype="<i2")
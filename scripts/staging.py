@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Training Data Staging
+Incrementally mirrors samples/ into microWakeWord's training_data folder
+
+A manifest in each target folder records size, mtime and SHA-256 of
+every staged clip. On each run:
+- unchanged clips (same size + mtime) are skipped without reading them
+- new or changed clips are hard-linked in (copied across filesystems)
+- clips deleted from samples/ are removed from the target
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+from instrumentation import span
+
+MANIFEST_NAME = ".staging_manifest.json"
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's contents"""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def place_file(source, target):
+    """Atomically hard-link (or copy) source to target, replacing it"""
+    if target.exists() and os.path.samefile(source, target):
+        return  # Already linked; an in-place edit shows up in both
+    tmp = target.with_name(f".{target.name}.staging")
+    if os.path.lexists(tmp):
+        os.unlink(tmp)
+    try:
+        os.link(source, tmp)
+    except OSError:
+        shutil.copy2(source, tmp)
+    os.replace(tmp, target)
+
+
+def load_manifest(target_dir):
+    try:
+        with open(target_dir / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_manifest(target_dir, manifest):
+    path = target_dir / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def sync_dir(source_dir, target_dir, pattern="*.wav", sources=None):
+    """Make target_dir mirror the clips in source_dir (or the given source
+    paths, e.g. from the dataset index). Returns a stats dict."""
+    source_dir, target_dir = Path(source_dir), Path(target_dir)
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = load_manifest(target_dir)
+    staged = {p.name for p in target_dir.glob(pattern)}
+    if sources is not None:
+        sources = sorted(Path(p) for p in sources)
+    else:
+        sources = sorted(source_dir.glob(pattern)) if source_dir.exists() else []
+    stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+    new_manifest = {}
+
+    for source in sources:
+        st = source.stat()
+        entry = manifest.get(source.name)
+        present = source.name in staged
+
+        if (present and entry and entry["size"] == st.st_size
+                and entry["mtime_ns"] == st.st_mtime_ns):
+            new_manifest[source.name] = entry
+            stats["unchanged"] += 1
+            continue
+
+        digest = file_hash(source)
+        new_manifest[source.name] = {
+            "size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": digest}
+        if present and entry and entry["sha256"] == digest:
+            stats["unchanged"] += 1  # Touched but identical
+            continue
+
+        place_file(source, target_dir / source.name)
+        stats["updated" if present else "added"] += 1
+
+    for name in staged - new_manifest.keys():
+        (target_dir / name).unlink()
+        stats["removed"] += 1
+
+    save_manifest(target_dir, new_manifest)
+    return stats
+
+
+def staged_clips(train_dir, folders=("positive", "negative")):
+    """{sha256: staged path} for every clip recorded in the staging manifests"""
+    clips = {}
+    for name in folders:
+        target_dir = Path(train_dir) / name
+        for filename, entry in load_manifest(target_dir).items():
+            clips[entry["sha256"]] = target_dir / filename
+    return clips
+
+
+def stage_samples(train_dir, sources=(("samples/positive", "positive"),
+                                      ("samples/negative", "negative")), clips=None):
+    """Sync every sample folder into train_dir, reporting how long it took.
+    clips, if given, maps each name to its clip paths instead of scanning the folder."""
+    start = time.perf_counter()
+    for source, name in sources:
+        with span(f"stage {name}"):
+            stats = sync_dir(source, Path(train_dir) / name,
+                             sources=clips.get(name) if clips is not None else None)
+        print(f"   {name}: +{stats['added']} added, ~{stats['updated']} updated, "
+              f"-{stats['removed']} removed, {stats['unchanged']} unchanged")
+    elapsed = time.perf_counter() - start
+    print(f"   ⏱️  Staging took {elapsed:.2f}s")
+    return elapsed
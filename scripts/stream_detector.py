@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Offline Wake Word Detector
+Replays audio through trained_model/hey_arnie.tflite the way micro_wake_word does
+
+Audio is turned into 10ms feature frames by the streaming frontend and
+fed to the streaming model 'stride' frames at a time. The model keeps
+its own state between calls, as on the device. Each call yields one
+uint8 probability. A detection fires when the mean of the last
+sliding_window_size probabilities exceeds probability_cutoff. These are
+the same two settings as esphome_config_example.yaml.
+
+Usage: python scripts/stream_detector.py recording.wav [--cutoff 0.5] [--window 10]
+       python scripts/stream_detector.py recording.wav --config esphome_config_example.yaml
+"""
+
+import argparse
+import math
+import re
+import time
+from pathlib import Path
+
+import numpy as np
+
+from frontend import STEP_SAMPLES, SAMPLE_RATE, StreamingFrontend
+from instrumentation import add_trace_arguments, sampled, span, start_trace
+from segmentation import stream_recording
+
+DEFAULT_MODEL = Path("trained_model/hey_arnie.tflite")
+DEFAULT_CUTOFF = 0.5
+DEFAULT_WINDOW = 10
+
+# micro_wake_word ignores this many 10ms feature slices at start-up and
+# after a detection, while the streaming state settles
+MIN_SLICES_BEFORE_DETECTION = 100
+
+
+def load_interpreter(model_path):
+    """A TFLite interpreter from whichever runtime is installed"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                import tensorflow as tf
+                Interpreter = tf.lite.Interpreter
+            except ImportError:
+                raise RuntimeError("No TFLite runtime found "
+                                   "(pip install tflite-runtime or tensorflow)") from None
+    interpreter = Interpreter(model_path=str(model_path), num_threads=1)
+    interpreter.allocate_tensors()
+    return interpreter
+
+
+def read_esphome_settings(config_path, model_name="hey_arnie.tflite"):
+    """(probability_cutoff, sliding_window_size) for a model in an ESPHome YAML.
+    Missing values fall back to the defaults."""
+    cutoff, window = DEFAULT_CUTOFF, DEFAULT_WINDOW
+    in_model = False
+    for line in Path(config_path).read_text().splitlines():
+        line = line.split("#", 1)[0].rstrip()
+        if not line.strip():
+            continue
+        match = re.search(r"model:\s*(\S+)", line)
+        if match:
+            if in_model:
+                break  # Next model in the list
+            # okay_nabu-style entries name the model without .tflite
+            in_model = match.group(1) in (model_name, Path(model_name).stem)
+            continue
+        if not in_model:
+            continue
+        match = re.search(r"probability_cutoff:\s*([\d.]+)", line)
+        if match:
+            cutoff = float(match.group(1))
+        match = re.search(r"sliding_window_size:\s*(\d+)", line)
+        if match:
+            window = int(match.group(1))
+    return cutoff, window
+
+
+class StreamingModel:
+    """Runs a streaming microWakeWord model over feature frames
+
+    Features go into the interpreter's input tensor in place (a ring of
+    'stride' rows), and the output is read back as a scalar, so nothing
+    is allocated per call.
+    """
+
+    def __init__(self, model_path=DEFAULT_MODEL, interpreter=None):
+        self.interpreter = interpreter or load_interpreter(model_path)
+        inp = self.interpreter.get_input_details()[0]
+        out = self.interpreter.get_output_details()[0]
+        self.stride = int(inp["shape"][1])
+        self.input_dtype = inp["dtype"]
+        self.output_dtype = out["dtype"]
+        self.input_scale, self.input_zero = inp["quantization"]
+        self.output_scale, self.output_zero = out["quantization"]
+        self._input = self.interpreter.tensor(inp["index"])
+        self._output = self.interpreter.tensor(out["index"])
+        self._invoke = self.interpreter.invoke
+        self._filled = 0
+
+        if self.input_dtype == np.int8:
+            lo, hi = -128, 127
+        elif self.input_dtype == np.uint8:
+            lo, hi = 0, 255
+        else:
+            lo = hi = None
+        self._range = (lo, hi)
+
+    def quantize(self, features):
+        """Feature rows as the model's input type"""
+        if self._range[0] is None:
+            return np.asarray(features, dtype=self.input_dtype)
+        q = np.round(np.asarray(features) / self.input_scale) + self.input_zero
+        return np.clip(q, *self._range).astype(self.input_dtype)
+
+    def _probability(self):
+        """The output as a uint8-scale (0-255) probability, as on the device"""
+        value = self._output()[0, 0]
+        if self.output_dtype == np.uint8:
+            return int(value)
+        if self.output_dtype == np.int8:
+            return int(value) + 128
+        return int(round(float(value) * 255))
+
+    def reset(self):
+        """Start a new stream (fresh model state)"""
+        self.interpreter.reset_all_variables()
+        self._filled = 0
+
+    def process_features(self, features, out=None):
+        """Feed feature rows; returns the probabilities of the calls they complete.
+        'out', if given, is a list the probabilities are appended to."""
+        probabilities = [] if out is None else out
+        quantized = self.quantize(features)
+        for row in quantized:
+            # Views into the tensor are dropped before invoke(), as TFLite requires
+            self._input()[0, self._filled] = row
+            self._filled += 1
+            if self._filled == self.stride:
+                self._filled = 0
+                self._invoke()
+                probabilities.append(self._probability())
+        return probabilities
+
+
+def ignore_calls(stride):
+    """MIN_SLICES_BEFORE_DETECTION as model calls, for a model that takes
+    'stride' feature slices per call"""
+    return math.ceil(MIN_SLICES_BEFORE_DETECTION / stride)
+
+
+class SlidingWindowDetector:
+    """micro_wake_word's decision rule over a stream of uint8 probabilities,
+    one per call of a model with the given stride"""
+
+    def __init__(self, probability_cutoff=DEFAULT_CUTOFF, sliding_window_size=DEFAULT_WINDOW,
+                 stride=1):
+        self.cutoff = probability_cutoff
+        self.window = sliding_window_size
+        self.ignore_calls = ignore_calls(stride)
+        self._recent = np.zeros(sliding_window_size, dtype=np.int64)
+        self._pos = 0
+        self._ignore = self.ignore_calls
+        self.calls = 0
+
+    def update(self, probability):
+        """Add one probability. Returns True when the wake word is detected."""
+        self.calls += 1
+        self._recent[self._pos] = probability
+        self._pos = (self._pos + 1) % self.window
+        if self._ignore > 0:
+            self._ignore -= 1
+            return False
+        if self._recent.sum() / (255.0 * self.window) > self.cutoff:
+            self._recent[:] = 0
+            self._ignore = self.ignore_calls
+            return True
+        return False
+
+
+class WakeWordDetector:
+    """Audio in, detections out: frontend -> streaming model -> sliding window"""
+
+    def __init__(self, model_path=DEFAULT_MODEL, probability_cutoff=DEFAULT_CUTOFF,
+                 sliding_window_size=DEFAULT_WINDOW, frontend=None):
+        self.frontend = StreamingFrontend(frontend)
+        self.model = StreamingModel(model_path)
+        self.decider = SlidingWindowDetector(probability_cutoff, sliding_window_size,
+                                             self.model.stride)
+        self.samples_seen = 0
+        self.processing_seconds = 0.0
+
+    @property
+    def seconds_per_call(self):
+        return self.model.stride * STEP_SAMPLES / SAMPLE_RATE
+
+    def process(self, samples):
+        """Feed 16kHz int16 samples. Returns detection times (seconds into the stream)."""
+        start = time.perf_counter()
+        first_call = self.decider.calls
+        probabilities = self.model.process_features(self.frontend.process(samples))
+        detections = []
+        for i, p in enumerate(probabilities):
+            if self.decider.update(p):
+                detections.append((first_call + i + 1) * self.seconds_per_call)
+        self.samples_seen += len(samples)
+        self.processing_seconds += time.perf_counter() - start
+        return detections
+
+    @property
+    def real_time_factor(self):
+        """Processing time / audio time (below 1.0 is faster than real time)"""
+        audio_seconds = self.samples_seen / SAMPLE_RATE
+        return self.processing_seconds / audio_seconds if audio_seconds else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay audio through the wake word model")
+    parser.add_argument("audio", nargs="+", help="recordings to replay (any format sox reads)")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL))
+    parser.add_argument("--config", help="read probability_cutoff / sliding_window_size from an ESPHome YAML")
+    parser.add_argument("--cutoff", type=float, help=f"probability_cutoff (default {DEFAULT_CUTOFF})")
+    parser.add_argument("--window", type=int, help=f"sliding_window_size (default {DEFAULT_WINDOW})")
+    parser.add_argument("--frontend", choices=["micro", "numpy"], default=None)
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("stream_detector", args)
+
+    cutoff, window = DEFAULT_CUTOFF, DEFAULT_WINDOW
+    if args.config:
+        cutoff, window = read_esphome_settings(args.config, Path(args.model).name)
+    cutoff = args.cutoff if args.cutoff is not None else cutoff
+    window = args.window if args.window is not None else window
+
+    print("👂 HEY ARNIE - Offline Detector")
+    print("=" * 45)
+    print(f"Model: {args.model}")
+    print(f"probability_cutoff: {cutoff}, sliding_window_size: {window}")
+
+    for audio in args.audio:
+        detector = WakeWordDetector(args.model, cutoff, window, args.frontend)
+        print(f"\n🎧 {Path(audio).name}")
+        with span("detect", cat="item", recording=Path(audio).name), sampled("detect"):
+            for block in stream_recording(audio, block_seconds=1.0):
+                for t in detector.process(block):
+                    print(f"   💪 Detected at {int(t // 60)}:{t % 60:05.2f}")
+        seconds = detector.samples_seen / SAMPLE_RATE
+        print(f"   {seconds:.1f}s of audio, real-time factor {detector.real_time_factor:.3f} "
+              f"({1 / max(detector.real_time_factor, 1e-9):.0f}x real time)")
+
+
+if __name__ == "__main__":
+    main()
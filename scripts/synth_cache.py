@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Synthesis Cache
+Content-addressed on-disk cache of synthesized clips
+
+Clips are keyed by a hash of (text, voice, rate, pitch, backend version), so
+re-running the generators only synthesizes combinations that changed.
+Cache hits are hard-linked (or copied) into samples/. The cache is
+trimmed back under its size budget, least recently used first. Recency
+is kept in an empty <key>.used file next to each entry: the entry itself
+shares its inode (and mtime) with the clip in samples/, and touching it
+would make staging and the dataset index re-hash every cached clip.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from instrumentation import span
+
+DEFAULT_CACHE_DIR = Path(".cache/synth")
+DEFAULT_MAX_MB = 1024
+
+# Bump when the cached audio format changes
+CACHE_FORMAT = 1
+
+
+def add_cache_arguments(parser):
+    """Add the shared cache options to an argparse parser"""
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always synthesize, ignoring the synthesis cache")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_MB,
+                        help=f"synthesis cache size budget (default: {DEFAULT_MAX_MB} MB)")
+
+
+def link_or_copy(source, target):
+    """Hard-link source to target, copying when linking isn't possible"""
+    target = Path(target)
+    if target.exists() or target.is_symlink():
+        target.unlink()
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+class SynthCache:
+    """On-disk LRU cache of synthesized clips"""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_MB * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def key(text, voice, rate, backend_version, pitch=0):
+        fields = [CACHE_FORMAT, text, voice, rate, backend_version]
+        if pitch:
+            fields.append(pitch)  # Unpitched keys stay as they were
+        payload = json.dumps(fields)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path_for(self, key):
+        return self.cache_dir / key[:2] / f"{key}.wav"
+
+    @staticmethod
+    def used_path(entry):
+        return entry.with_suffix(".used")
+
+    def fetch(self, key, output_path):
+        """Place a cached clip at output_path. Returns False on a miss."""
+        entry = self.path_for(key)
+        try:
+            if not (os.path.exists(output_path) and os.path.samefile(entry, output_path)):
+                link_or_copy(entry, output_path)
+        except FileNotFoundError:
+            return False
+        # Refresh recency for LRU eviction (never the shared inode's mtime)
+        self.used_path(entry).touch()
+        return True
+
+    def store(self, key, source_path):
+        """Add a freshly synthesized clip to the cache (atomic)"""
+        entry = self.path_for(key)
+        entry.parent.mkdir(exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=entry.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(source_path, tmp)
+            os.replace(tmp, entry)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def evict(self):
+        """Delete least recently used entries until under the size budget.
+        Returns (entries removed, bytes freed)."""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*/*.wav"):
+            st = path.stat()
+            try:
+                used = self.used_path(path).stat().st_mtime
+            except FileNotFoundError:
+                used = st.st_mtime  # Stored but never fetched
+            entries.append((used, st.st_size, path))
+            total += st.st_size
+
+        removed = freed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            self.used_path(path).unlink(missing_ok=True)
+            total -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+
+class CachedSynthesizer:
+    """Wraps a synthesize(job) callable with cache lookups
+
+    Jobs that share a key are serialized, so a phrase repeated in one run
+    is synthesized once and linked for the rest.
+    """
+
+    def __init__(self, synthesize, cache, backend_version):
+        self.synthesize = synthesize
+        self.cache = cache
+        self.backend_version = backend_version
+        self.hits = 0
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def __call__(self, job):
+        key = self.cache.key(job.text, job.voice, job.rate, self.backend_version, job.pitch)
+        with self._lock_for(key):
+            with span("cache fetch", cat="item"):
+                hit = self.cache.fetch(key, job.output_path)
+            if hit:
+                with self._guard:
+                    self.hits += 1
+                return
+            self.synthesize(job)
+            self.cache.store(key, job.output_path)
+
+
+def cached(synthesize, args, backend_version):
+    """Wrap synthesize with the cache unless --no-cache was given"""
+    if args.no_cache:
+        return synthesize
+    cache = SynthCache(max_bytes=args.cache_max_mb * 1024 * 1024)
+    return CachedSynthesizer(synthesize, cache, backend_version)
+
+
+def report(synthesize):
+    """Print cache hits and trim the cache after a run"""
+    if not isinstance(synthesize, CachedSynthesizer):
+        return
+    print(f"  ♻️  Reused {synthesize.hits} cached clips")
+    removed, freed = synthesize.cache.evict()
+    if removed:
+        print(f"  🧹 Evicted {removed} old cache entries ({freed / 1e6:.1f} MB)")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Synthesis Engine
+Runs TTS sample generation jobs concurrently on a bounded worker pool
+
+Shared by generate_samples.py and generate_negative_samples.py.
+Each job is planned up front with a fixed index and output path, so
+file naming stays deterministic no matter which worker finishes first.
+"""
+
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dataset_index import register_clips
+from instrumentation import span
+
+# One clip to synthesize. index is fixed at planning time. pitch is in
+# semitones relative to the voice.
+SynthJob = namedtuple("SynthJob", ["index", "text", "voice", "rate", "output_path", "pitch"],
+                      defaults=[0])
+
+# Outcome of one job. error is None on success.
+JobResult = namedtuple("JobResult", ["job", "error", "seconds"])
+
+
+def default_jobs():
+    """Default worker count (one per CPU core)"""
+    return os.cpu_count() or 1
+
+
+def add_jobs_argument(parser, what="parallel synthesis workers"):
+    """Add the shared --jobs option to an argparse parser"""
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=default_jobs(),
+        help=f"{what} (default: {default_jobs()})")
+
+
+def _run_one(synthesize, job):
+    start = time.perf_counter()
+    try:
+        # Never write through a stale file (it may be hard-linked into a cache)
+        if os.path.lexists(job.output_path):
+            os.unlink(job.output_path)
+        with span("synthesize clip", cat="item", voice=job.voice):
+            synthesize(job)
+    except Exception as e:
+        return JobResult(job, e, time.perf_counter() - start)
+    return JobResult(job, None, time.perf_counter() - start)
+
+
+def run_jobs(jobs, synthesize, max_workers=None, progress_every=20, quiet=False):
+    """Run synthesize(job) for every job on a bounded thread pool
+
+    The work is dominated by TTS/sox subprocesses, so threads are enough
+    to keep every core busy. Returns JobResults ordered by job index.
+    """
+    jobs = list(jobs)
+    max_workers = max(1, min(max_workers or default_jobs(), len(jobs) or 1))
+    results = []
+    done = 0
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(_run_one, synthesize, job) for job in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            if quiet:
+                continue
+            if result.error is not None:
+                job = result.job
+                print(f"  ⚠️ Failed: '{job.text}' {job.voice} @ {job.rate}wpm - {result.error}")
+                continue
+            done += 1
+            if progress_every and done % progress_every == 0:
+                print(f"  Generated {done}/{len(jobs)} samples...")
+
+    results.sort(key=lambda r: r.job.index)
+    return results
+
+
+def summarize(results):
+    """Return (succeeded, failed) counts for a list of JobResults"""
+    failed = sum(1 for r in results if r.error is not None)
+    return len(results) - failed, failed
+
+
+def register_results(results, source, backend_version):
+    """Record every successfully synthesized clip in the dataset index"""
+    jobs = [r.job for r in results if r.error is None]
+    meta = [{"text": job.text, "voice": job.voice, "rate": job.rate, "pitch": job.pitch,
+             "backend": backend_version} for job in jobs]
+    return register_clips([job.output_path for job in jobs], source, meta)
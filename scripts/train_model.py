@@ -4,21 +4,29 @@ Hey Arnie - Wake Word Model Trainer
 Trains a microWakeWord model using collected samples
 
 This wraps the microWakeWord training process with Hey Arnie defaults.
+
+Usage: python scripts/train_model.py [--yes]
 """
 
+import argparse
 import subprocess
 import os
 import sys
 from pathlib import Path
 import shutil
 
-def check_samples():
+from dataset_index import indexed_clips
+from instrumentation import add_trace_arguments, span, start_trace
+from staging import stage_samples
+
+def dataset_clips():
+    """Positive and negative clip paths from the dataset index"""
+    return {label: indexed_clips(label) for label in ("positive", "negative")}
+
+def check_samples(clips):
     """Verify we have enough samples"""
-    pos_dir = Path("samples/positive")
-    neg_dir = Path("samples/negative")
-    
-    pos_count = len(list(pos_dir.glob("*.wav"))) if pos_dir.exists() else 0
-    neg_count = len(list(neg_dir.glob("*.wav"))) if neg_dir.exists() else 0
+    pos_count = len(clips["positive"])
+    neg_count = len(clips["negative"])
     
     print(f"📊 Sample counts:")
     print(f"   Positive (wake word): {pos_count}")
@@ -38,16 +46,17 @@ def check_samples():
     
     return True
 
-def train():
-    """Run the training process"""
+def train(assume_yes=False):
+    """Run the training process. Returns False if training failed."""
     print("🏋️ HEY ARNIE - Model Training")
     print("=" * 45)
     print()
     
-    if not check_samples():
+    clips = dataset_clips()
+    if not check_samples(clips) and not assume_yes:
         response = input("Continue anyway? (y/n): ")
         if response.lower() != 'y':
-            return
+            return True
     
     # Check if microWakeWord is cloned
     mww_dir = Path("microWakeWord")
@@ -64,17 +73,9 @@ def train():
     train_dir = mww_dir / "training_data" / "hey_arnie"
     train_dir.mkdir(parents=True, exist_ok=True)
     
-    # Copy positive samples
-    pos_target = train_dir / "positive"
-    pos_target.mkdir(exist_ok=True)
-    for f in Path("samples/positive").glob("*.wav"):
-        shutil.copy(f, pos_target / f.name)
-    
-    # Copy negative samples  
-    neg_target = train_dir / "negative"
-    neg_target.mkdir(exist_ok=True)
-    for f in Path("samples/negative").glob("*.wav"):
-        shutil.copy(f, neg_target / f.name)
+    # Sync positive and negative samples (only new/changed clips are linked)
+    with span("stage samples"):
+        stage_samples(train_dir, clips=clips)
     
     print("✅ Training data prepared")
     
@@ -87,12 +88,13 @@ def train():
     # The actual training command depends on microWakeWord's interface
     # This is a template - may need adjustment based on their current API
     try:
-        subprocess.run([
-            sys.executable, 'train.py',
-            '--name', 'hey_arnie',
-            '--epochs', '50',
-            '--batch-size', '32'
-        ], check=True)
+        with span("microWakeWord train.py"):
+            subprocess.run([
+                sys.executable, 'train.py',
+                '--name', 'hey_arnie',
+                '--epochs', '50',
+                '--batch-size', '32'
+            ], check=True)
         
         print("\n✅ Training complete!")
         
@@ -103,6 +105,7 @@ def train():
             output_dir.mkdir(exist_ok=True)
             shutil.copy(model_file, output_dir / "hey_arnie.tflite")
             print(f"📦 Model saved to: trained_model/hey_arnie.tflite")
+        return True
         
     except subprocess.CalledProcessError as e:
         print(f"\n❌ Training failed: {e}")
@@ -113,9 +116,17 @@ def train():
         print("\n⚠️  Training script not found in microWakeWord repo.")
         print("The repo structure may have changed. Check their docs.")
         print("https://github.com/kahrendt/microWakeWord")
+    return False
 
 def main():
-    train()
+    parser = argparse.ArgumentParser(description="Train the Hey Arnie model with microWakeWord")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="don't ask before training on too few samples")
+    add_trace_arguments(parser)
+    args = parser.parse_args()
+    start_trace("train_model", args)
+    if not train(args.yes):
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
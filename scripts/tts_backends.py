@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - TTS Backends
+One interface over the text-to-speech engines the generators can use
+
+- say:     macOS built-in voices
+- piper:   offline neural TTS on Linux (voice models in $PIPER_VOICES)
+- espeak:  offline formant TTS on Linux (espeak-ng, or espeak)
+- standin: deterministic synthetic "speech" for tests and benchmarks
+
+Every backend writes the final 16kHz mono WAV through audio_convert, so
+the rest of the pipeline doesn't care which one made a clip. Voice
+lists are read once and cached in .cache/voices/ (per backend version),
+so scripts don't re-run 'say -v ?' each time.
+
+Speech comes from a voice session. The default session starts the
+engine once per clip. Persistent sessions (stand-in, piper's Python
+package, libespeak-ng) load the voice once and then speak any number of
+clips in-process; tts_workers.py keeps them alive in worker processes.
+Per-clip time is split into spawn, synthesis, conversion and write.
+
+Usage: python scripts/tts_backends.py   # list backends and their voices
+"""
+
+import ctypes
+import ctypes.util
+import hashlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+from audio_convert import convert_file, read_wav, to_16k_mono, write_wav
+from instrumentation import span, start_trace
+
+VOICE_CACHE_DIR = Path(".cache/voices")
+PIPER_VOICE_DIR = Path(os.environ.get("PIPER_VOICES", "~/.local/share/piper")).expanduser()
+BACKENDS = ["auto", "say", "piper", "espeak", "standin"]
+
+# Speaking rate the rates in the generators are relative to (words per minute)
+NORMAL_RATE = 180
+
+# Where per-clip time goes
+STAGES = ["spawn", "synthesis", "conversion", "write"]
+
+
+class StageTimings:
+    """Thread-safe per-stage time totals over many clips"""
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+        self.clips = 0
+        self.startup = 0.0  # One-off costs: worker start-up and voice loading
+        self._lock = threading.Lock()
+
+    def add(self, stages, startup=0.0):
+        with self._lock:
+            for stage, seconds in stages.items():
+                self.totals[stage] += seconds
+            self.clips += 1
+            self.startup += startup
+
+    def add_startup(self, seconds):
+        with self._lock:
+            self.startup += seconds
+
+    def per_clip(self):
+        """Mean seconds per clip for each stage"""
+        return {stage: total / max(self.clips, 1) for stage, total in self.totals.items()}
+
+    def report(self, indent="  "):
+        if not self.clips:
+            return
+        parts = ", ".join(f"{stage} {seconds * 1000:.1f}ms"
+                          for stage, seconds in self.per_clip().items())
+        print(f"{indent}⏱️  Per clip ({self.clips} synthesized): {parts}")
+        if self.startup:
+            print(f"{indent}   One-off start-up, summed over workers (process + voice loads): "
+                  f"{self.startup:.2f}s")
+
+
+def speak_to_file(session, text, rate, output_path, stages, pitch=0):
+    """Speak with a session and write the 16kHz WAV, timing each stage"""
+    with span("tts speak", cat="item"):
+        samples, sample_rate = session.speak(text, rate, output_path, stages, pitch)
+    start = time.perf_counter()
+    with span("tts conversion", cat="item"):
+        converted = to_16k_mono(samples, sample_rate)
+    stages["conversion"] += time.perf_counter() - start
+    start = time.perf_counter()
+    with span("tts write", cat="item"):
+        write_wav(output_path, converted)
+    stages["write"] += time.perf_counter() - start
+    return output_path
+
+
+class ClipSession:
+    """Runs the backend's command once per clip (pays spawn + voice load every time)
+
+    The spawn share of each run is estimated by timing the engine once
+    on empty text (start-up and voice load, no speech); the rest of the
+    run counts as synthesis.
+    """
+
+    _startup = {}  # (backend version, voice) -> seconds
+
+    def __init__(self, backend, voice):
+        self.backend = backend
+        self.voice = voice
+
+    def _execute(self, text, rate, tts_path, pitch=0):
+        """Run the engine once. Returns its wall-clock seconds."""
+        argv, stdin = self.backend.command(text, self.voice, rate, tts_path, pitch)
+        start = time.perf_counter()
+        subprocess.run(argv, input=stdin, text=True, check=True, capture_output=True)
+        return time.perf_counter() - start
+
+    def startup_seconds(self, tts_path):
+        key = (self.backend.version, self.voice)
+        if key not in ClipSession._startup:
+            try:
+                ClipSession._startup[key] = self._execute("", NORMAL_RATE, tts_path)
+            except (OSError, subprocess.CalledProcessError):
+                ClipSession._startup[key] = 0.0
+            finally:
+                if os.path.exists(tts_path):
+                    os.remove(tts_path)
+        return ClipSession._startup[key]
+
+    def speak(self, text, rate, output_path, stages, pitch=0):
+        """Float samples and their rate. output_path names the scratch file."""
+        tts_path = output_path.replace('.wav', '.tts.wav')
+        startup = self.startup_seconds(tts_path)
+        start = time.perf_counter()
+        total = self._execute(text, rate, tts_path, pitch)
+        try:
+            samples, sample_rate = read_wav(tts_path)
+        finally:
+            os.remove(tts_path)
+        spawn = min(startup, total)
+        stages["spawn"] += spawn
+        stages["synthesis"] += time.perf_counter() - start - spawn
+        return samples, sample_rate
+
+    def close(self):
+        pass
+
+
+class TTSBackend:
+    """Base class: a named engine with a voice list and a synthesize() call"""
+
+    name = None
+    supports_pitch = True
+
+    def __init__(self):
+        self._voices = None
+
+    @property
+    def version(self):
+        """Identifies the engine build, for the synthesis and voice caches"""
+        return self.name
+
+    def list_voices(self):
+        """Query the engine for its voices (uncached)"""
+        raise NotImplementedError
+
+    def voices(self):
+        """Installed voices, read from the engine once and cached on disk"""
+        if self._voices is not None:
+            return self._voices
+        cache_path = VOICE_CACHE_DIR / f"{self.name}.json"
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            if cached.get("version") == self.version:
+                self._voices = cached["voices"]
+                return self._voices
+        except (FileNotFoundError, json.JSONDecodeError, KeyError):
+            pass
+        self._voices = self.list_voices()
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"version": self.version, "voices": self._voices}, f)
+        os.replace(tmp, cache_path)
+        return self._voices
+
+    def pick_voices(self, preferred=(), limit=None):
+        """The preferred voices that are installed, or else the first installed ones"""
+        installed = self.voices()
+        chosen = [v for v in preferred if v in installed] or list(installed)
+        return chosen[:limit] if limit else chosen
+
+    def cache_version(self, converter):
+        """Backend + conversion identity for synth_cache"""
+        return f"{self.version}-{converter}"
+
+    def tts_path(self, output_path, converter):
+        """Where the engine writes its native output before conversion"""
+        return output_path.replace('.wav', '.tts.wav')
+
+    def command(self, text, voice, rate, tts_path, pitch=0):
+        """(argv, stdin text or None) that speaks text into a WAV at tts_path.
+        pitch is in semitones relative to the voice."""
+        raise NotImplementedError
+
+    def run(self, text, voice, rate, tts_path, pitch=0):
+        """Speak text into tts_path in the engine's native format"""
+        argv, stdin = self.command(text, voice, rate, tts_path, pitch)
+        subprocess.run(argv, input=stdin, text=True, check=True, capture_output=True)
+
+    def session(self, voice):
+        """A session that starts the engine for every clip"""
+        return ClipSession(self, voice)
+
+    def persistent_session(self, voice):
+        """A session that loads the voice once, if the engine allows it"""
+        return self.session(voice)
+
+    def synthesize(self, text, voice, rate, output_path, converter="numpy", timings=None,
+                   pitch=0):
+        """Speak text into a 16kHz mono WAV at output_path, one engine run per clip"""
+        stages = dict.fromkeys(STAGES, 0.0)
+        if converter == "sox":
+            tts_path = self.tts_path(output_path, converter)
+            start = time.perf_counter()
+            self.run(text, voice, rate, tts_path, pitch)
+            converted = time.perf_counter()
+            convert_file(tts_path, output_path, converter)
+            stages["synthesis"] += converted - start
+            stages["conversion"] += time.perf_counter() - converted
+        else:
+            speak_to_file(self.session(voice), text, rate, output_path, stages, pitch)
+        if timings is not None:
+            timings.add(stages)
+        return output_path
+
+
+class SayBackend(TTSBackend):
+    """macOS 'say'"""
+
+    name = "say"
+
+    @property
+    def version(self):
+        return f"say-macos{platform.mac_ver()[0] or '?'}"
+
+    def list_voices(self):
+        result = subprocess.run(['say', '-v', '?'], capture_output=True, text=True, check=True)
+        return [line.split()[0] for line in result.stdout.strip().split('\n') if line.strip()]
+
+    def tts_path(self, output_path, converter):
+        if converter == "sox":
+            # AIFF is say's native format; sox converts it
+            return output_path.replace('.wav', '.aiff')
+        return output_path.replace('.wav', '.tts.wav')
+
+    def command(self, text, voice, rate, tts_path, pitch=0):
+        # 16-bit WAV is read straight into memory and resampled
+        format_args = [] if tts_path.endswith('.aiff') else \
+            ['--file-format=WAVE', '--data-format=LEI16@22050']
+        if pitch:
+            # Embedded command: shift the baseline pitch (in semitones)
+            text = f"[[pbas {pitch:+d}]] {text}"
+        return ['say', '-v', voice, '-r', str(rate), *format_args, '-o', tts_path, text], None
+
+
+def espeak_pitch(semitones):
+    """espeak's 0-99 pitch setting (50 = the voice's own) for a semitone offset"""
+    return max(0, min(99, 50 + 4 * semitones))
+
+
+class EspeakBackend(TTSBackend):
+    """espeak-ng (or classic espeak), English voices"""
+
+    name = "espeak"
+
+    def __init__(self):
+        super().__init__()
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+        self._version = None
+
+    @property
+    def version(self):
+        if self.binary is None:
+            return None  # Not installed
+        if self._version is None:
+            result = subprocess.run([self.binary, '--version'], capture_output=True, text=True)
+            words = result.stdout.split()
+            # "eSpeak NG text-to-speech: 1.51  Data at: ..."
+            number = next((w for w in words if w[:1].isdigit()), "?")
+            self._version = f"{Path(self.binary).name}-{number}"
+        return self._version
+
+    def list_voices(self):
+        if self.binary is None:
+            return []
+        result = subprocess.run([self.binary, '--voices=en'], capture_output=True, text=True,
+                                check=True)
+        # Columns: Pty Language Age/Gender VoiceName File Other Languages
+        voices = []
+        for line in result.stdout.strip().split('\n')[1:]:
+            fields = line.split()
+            if len(fields) >= 2 and fields[1] not in voices:
+                voices.append(fields[1])
+        return voices
+
+    def command(self, text, voice, rate, tts_path, pitch=0):
+        return [self.binary, '-v', voice, '-s', str(rate), '-p', str(espeak_pitch(pitch)),
+                '-w', tts_path, text], None
+
+    def persistent_session(self, voice):
+        try:
+            return EspeakLibrarySession(voice)
+        except OSError:
+            return self.session(voice)  # No libespeak-ng: run the binary per clip
+
+
+class PiperBackend(TTSBackend):
+    """piper neural TTS; each <voice>.onnx in PIPER_VOICE_DIR is a voice"""
+
+    name = "piper"
+    supports_pitch = False  # Planned pitch offsets collapse to 0
+
+    def __init__(self, voice_dir=PIPER_VOICE_DIR):
+        super().__init__()
+        self.voice_dir = Path(voice_dir)
+
+    def voices(self):
+        # A directory listing is already cheap; no need for the disk cache
+        if self._voices is None:
+            self._voices = self.list_voices()
+        return self._voices
+
+    def list_voices(self):
+        if not shutil.which("piper"):
+            return []
+        return sorted(p.stem for p in self.voice_dir.glob("*.onnx"))
+
+    def command(self, text, voice, rate, tts_path, pitch=0):
+        model = self.voice_dir / f"{voice}.onnx"
+        return ['piper', '--model', str(model), '--output_file', tts_path,
+                '--length_scale', f"{NORMAL_RATE / rate:.3f}"], text
+
+    def persistent_session(self, voice):
+        try:
+            return PiperModuleSession(self.voice_dir / f"{voice}.onnx")
+        except ImportError:
+            return self.session(voice)  # No piper Python package: run the CLI per clip
+
+
+class StandInBackend(TTSBackend):
+    """Deterministic in-process stand-in: harmonic 'syllables' shaped by the text
+
+    The same (text, voice, rate) always gives the same audio, and
+    'latency' simulates an engine's start-up time per clip.
+    """
+
+    name = "standin"
+    RATE = 22050
+
+    def __init__(self, latency=0.0, voice_count=6):
+        super().__init__()
+        self.latency = latency
+        self._voices = [f"StandIn{i}" for i in range(voice_count)]
+
+    def list_voices(self):
+        return list(self._voices)
+
+    def render(self, text, voice, rate, pitch=0):
+        """int16 samples at RATE for one utterance"""
+        seed = hashlib.sha256(f"{text}|{voice}|{rate}|{pitch}".encode()).digest()
+        rng = np.random.default_rng(int.from_bytes(seed[:8], "little"))
+        base = (90 + 10 * (sum(voice.encode()) % 16)) * 2 ** (pitch / 12)
+        syllable = int(self.RATE * 0.12 * NORMAL_RATE / rate)
+        pieces = []
+        for ch in text:
+            if ch == " ":
+                pieces.append(np.zeros(syllable // 2))
+                continue
+            t = np.arange(syllable) / self.RATE
+            f0 = base * (1 + 0.1 * ((ord(ch) % 7) - 3) / 3)
+            tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+            envelope = np.hanning(syllable)
+            pieces.append(tone * envelope + 0.02 * rng.standard_normal(syllable))
+        audio = np.concatenate([np.zeros(self.RATE // 10), *pieces, np.zeros(self.RATE // 10)])
+        return (audio / (np.max(np.abs(audio)) + 1e-9) * 0.5 * 32767).astype(np.int16)
+
+    def run(self, text, voice, rate, tts_path, pitch=0):
+        if self.latency:
+            time.sleep(self.latency)
+        write_wav(tts_path, self.render(text, voice, rate, pitch), self.RATE)
+
+    def session(self, voice):
+        return StandInSession(self, voice, per_clip=True)
+
+    def persistent_session(self, voice):
+        return StandInSession(self, voice, per_clip=False)
+
+
+class StandInSession:
+    """The stand-in's latency is paid per clip, or once when persistent"""
+
+    def __init__(self, backend, voice, per_clip):
+        self.backend = backend
+        self.voice = voice
+        self.per_clip = per_clip
+        if not per_clip and backend.latency:
+            time.sleep(backend.latency)  # "Load the voice"
+
+    def speak(self, text, rate, output_path, stages, pitch=0):
+        start = time.perf_counter()
+        if self.per_clip and self.backend.latency:
+            time.sleep(self.backend.latency)
+        spawned = time.perf_counter()
+        samples = self.backend.render(text, self.voice, rate, pitch) / 32768.0
+        stages["spawn"] += spawned - start
+        stages["synthesis"] += time.perf_counter() - spawned
+        return samples, self.backend.RATE
+
+    def close(self):
+        pass
+
+
+class PiperModuleSession:
+    """A piper voice model loaded once through the piper Python package"""
+
+    def __init__(self, model_path):
+        from piper import PiperVoice
+        self.voice = PiperVoice.load(str(model_path))
+
+    def speak(self, text, rate, output_path, stages, pitch=0):
+        start = time.perf_counter()
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as w:
+            if hasattr(self.voice, "synthesize_wav"):  # piper-tts >= 1.3
+                from piper import SynthesisConfig
+                self.voice.synthesize_wav(text, w, syn_config=SynthesisConfig(
+                    length_scale=NORMAL_RATE / rate))
+            else:
+                self.voice.synthesize(text, w, length_scale=NORMAL_RATE / rate)
+        samples, sample_rate = read_wav(buffer.getvalue())
+        stages["synthesis"] += time.perf_counter() - start
+        return samples, sample_rate
+
+    def close(self):
+        pass
+
+
+# libespeak-ng constants (speak_lib.h)
+ESPEAK_AUDIO_OUTPUT_SYNCHRONOUS = 2
+ESPEAK_RATE = 1
+ESPEAK_PITCH = 3
+ESPEAK_POS_CHARACTER = 1
+ESPEAK_CHARS_UTF8 = 1
+ESPEAK_SYNTH_CALLBACK = ctypes.CFUNCTYPE(
+    ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+
+_espeak = None  # (library, sample rate, callback, chunks), one per process
+
+
+def _espeak_library():
+    """Load and initialise libespeak-ng once per process"""
+    global _espeak
+    if _espeak is None:
+        name = ctypes.util.find_library("espeak-ng")
+        if name is None:
+            raise OSError("libespeak-ng not found")
+        lib = ctypes.CDLL(name)
+        lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        lib.espeak_SetParameter.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.espeak_Synth.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int,
+                                     ctypes.c_uint, ctypes.c_uint, ctypes.POINTER(ctypes.c_uint),
+                                     ctypes.c_void_p]
+        sample_rate = lib.espeak_Initialize(ESPEAK_AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+        if sample_rate <= 0:
+            raise OSError("espeak_Initialize failed")
+        chunks = []
+
+        def collect(wav, count, events):
+            if count > 0:
+                chunks.append(np.ctypeslib.as_array(wav, shape=(count,)).copy())
+            return 0
+
+        callback = ESPEAK_SYNTH_CALLBACK(collect)  # Referenced from _espeak so it isn't freed
+        lib.espeak_SetSynthCallback(callback)
+        _espeak = (lib, sample_rate, callback, chunks)
+    return _espeak
+
+
+class EspeakLibrarySession:
+    """espeak-ng through libespeak-ng, in-process (no exec, voice data loaded once)"""
+
+    current_voice = None  # libespeak-ng has one global voice
+
+    def __init__(self, voice):
+        self.lib, self.sample_rate, _, self.chunks = _espeak_library()
+        self.voice = voice
+        self._select()
+
+    def _select(self):
+        if EspeakLibrarySession.current_voice != self.voice:
+            if self.lib.espeak_SetVoiceByName(self.voice.encode()) != 0:
+                raise ValueError(f"Unknown espeak voice: {self.voice}")
+            EspeakLibrarySession.current_voice = self.voice
+
+    def speak(self, text, rate, output_path, stages, pitch=0):
+        start = time.perf_counter()
+        self._select()
+        self.lib.espeak_SetParameter(ESPEAK_RATE, int(rate), 0)
+        self.lib.espeak_SetParameter(ESPEAK_PITCH, espeak_pitch(pitch), 0)
+        self.chunks.clear()
+        data = text.encode("utf-8") + b"\0"
+        self.lib.espeak_Synth(data, len(data), 0, ESPEAK_POS_CHARACTER, 0, ESPEAK_CHARS_UTF8,
+                              None, None)
+        self.lib.espeak_Synchronize()
+        samples = np.concatenate(self.chunks) / 32768.0 if self.chunks else np.zeros(0)
+        stages["synthesis"] += time.perf_counter() - start
+        return samples, self.sample_rate
+
+    def close(self):
+        pass
+
+
+def detect_backend():
+    """The best backend installed on this machine"""
+    if shutil.which("say"):
+        return "say"
+    if PiperBackend().voices():
+        return "piper"
+    if shutil.which("espeak-ng") or shutil.which("espeak"):
+        return "espeak"
+    raise RuntimeError("No TTS engine found: install espeak-ng or piper "
+                       "(or run on macOS), or use --backend standin")
+
+
+def get_backend(name="auto"):
+    """A backend instance by name ('auto' picks the best installed one)"""
+    if name == "auto":
+        name = detect_backend()
+    return {
+        "say": SayBackend,
+        "piper": PiperBackend,
+        "espeak": EspeakBackend,
+        "standin": StandInBackend,
+    }[name]()
+
+
+def add_backend_argument(parser):
+    """Add the shared --backend option to an argparse parser"""
+    parser.add_argument("--backend", choices=BACKENDS, default="auto",
+                        help="TTS engine (default: auto - say on macOS, else piper or espeak-ng)")
+
+
+def main():
+    start_trace("tts_backends")
+    print("🗣️  HEY ARNIE - TTS Backends")
+    print("=" * 45)
+    for name in BACKENDS[1:]:
+        try:
+            backend = get_backend(name)
+            voices = backend.voices()
+        except (OSError, subprocess.CalledProcessError):
+            voices = []
+        if not voices:
+            print(f"  {name:8s} not installed")
+            continue
+        shown = ', '.join(voices[:8]) + (', ...' if len(voices) > 8 else '')
+        print(f"  {name:8s} {backend.version}: {len(voices)} voices ({shown})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Hey Arnie - Persistent TTS Workers
+Long-lived synthesis processes that load each voice once
+
+Each worker process keeps a persistent session per voice it has used
+(see tts_backends.py) and takes (text, voice, rate, pitch, output path) jobs
+over a pipe. It speaks, resamples and writes the clip, and replies with
+the per-stage timings. Jobs are routed to an idle worker that already
+has the voice loaded where possible. Nothing is started up again per
+clip: not the engine, not the voice, not the resampler's filter design.
+
+Shared by generate_samples.py and generate_negative_samples.py.
+"""
+
+import multiprocessing
+import threading
+import time
+from contextlib import contextmanager
+
+from tts_backends import STAGES, speak_to_file
+
+TTS_MODES = ["persistent", "per-clip"]
+
+
+def _worker_main(conn, backend):
+    """Worker process: serve jobs until the parent sends None"""
+    sessions = {}
+    conn.send("ready")
+    while True:
+        job = conn.recv()
+        if job is None:
+            break
+        text, voice, rate, pitch, output_path = job
+        stages = dict.fromkeys(STAGES, 0.0)
+        load = 0.0
+        try:
+            if voice not in sessions:
+                start = time.perf_counter()
+                sessions[voice] = backend.persistent_session(voice)
+                load = time.perf_counter() - start
+            speak_to_file(sessions[voice], text, rate, output_path, stages, pitch)
+            conn.send((stages, load, None))
+        except Exception as e:
+            conn.send((stages, load, f"{type(e).__name__}: {e}"))
+    for session in sessions.values():
+        session.close()
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.voices = set()
+
+
+class TTSWorkerPool:
+    """A fixed set of persistent worker processes behind a thread-safe synthesize(job)"""
+
+    def __init__(self, backend, workers, timings=None):
+        self.timings = timings
+        self._workers = []
+        self._idle = []
+        self._cond = threading.Condition()
+
+        start = time.perf_counter()
+        for _ in range(max(1, workers)):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_worker_main, args=(child, backend),
+                                              daemon=True)
+            process.start()
+            child.close()
+            self._workers.append(_Worker(process, parent))
+        for worker in self._workers:
+            worker.conn.recv()  # "ready"
+        self._idle = list(self._workers)
+        if timings is not None:
+            timings.add_startup(time.perf_counter() - start)
+
+    def _borrow(self, voice):
+        """An idle worker, preferring one that already has the voice loaded"""
+        with self._cond:
+            while not self._idle:
+                if not self._workers:
+                    raise RuntimeError("All TTS workers have exited")
+                self._cond.wait()
+            worker = (next((w for w in self._idle if voice in w.voices), None)
+                      or next((w for w in self._idle if not w.voices), None)
+                      or self._idle[0])
+            self._idle.remove(worker)
+            return worker
+
+    def _give_back(self, worker, alive=True):
+        with self._cond:
+            if alive:
+                self._idle.append(worker)
+            else:
+                self._workers.remove(worker)
+            self._cond.notify()
+
+    def synthesize(self, job):
+        """Synthesize one SynthJob on a worker (blocks until it is written)"""
+        worker = self._borrow(job.voice)
+        try:
+            worker.conn.send((job.text, job.voice, job.rate, job.pitch, job.output_path))
+            stages, load, error = worker.conn.recv()
+        except (EOFError, OSError):
+            self._give_back(worker, alive=False)
+            raise RuntimeError(f"TTS worker {worker.process.pid} exited") from None
+        worker.voices.add(job.voice)
+        self._give_back(worker)
+        if error is not None:
+            raise RuntimeError(error)
+        if self.timings is not None:
+            self.timings.add(stages, startup=load)
+
+    def close(self):
+        for worker in self._workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self._workers = []
+
+
+def add_tts_mode_argument(parser):
+    """Add the shared --tts-mode option to an argparse parser"""
+    parser.add_argument("--tts-mode", choices=TTS_MODES, default="persistent",
+                        help="persistent: long-lived workers that load each voice once; "
+                             "per-clip: start the TTS engine for every clip "
+                             "(always used with --converter sox)")
+
+
+@contextmanager
+def job_synthesizer(backend, converter, workers, mode="persistent", timings=None):
+    """A synthesize(job) callable for run_jobs, backed by persistent workers
+    (numpy conversion only) or by one engine run per clip"""
+    if mode == "persistent" and converter == "numpy":
+        pool = TTSWorkerPool(backend, workers, timings)
+        try:
+            yield pool.synthesize
+        finally:
+            pool.close()
+    else:
+        yield lambda job: backend.synthesize(job.text, job.voice, job.rate, job.output_path,
+                                             converter, timings, job.pitch)